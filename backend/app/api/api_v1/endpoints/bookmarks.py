@@ -1,19 +1,68 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Header, Form
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Header, Form, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from typing import Any, Dict, List, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import hashlib
 import os
 import uuid
+import weakref
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import dialect_name, get_async_db
+from app.core.etag import etag_matches, make_etag, not_modified, query_digest
+from app.core.pagination import InvalidCursorError, cursor_column, decode_cursor, encode_cursor, keyset_after
 from app.core.auth import get_current_user_id
-from app.models.bookmark import Bookmark
+from app.models.bookmark import Bookmark, TRANSCRIPTION_PENDING
 from app.models.user import User
+from app.services.bookmark_export import FORMATS as EXPORT_FORMATS, NDJSON, bookmark_export
+from app.services.bookmark_batch import CONFLICT, CREATED, BatchItem, bookmark_batch_service
+from app.services.bookmark_serializer import (
+    FULL_FIELDS, bookmark_dict, columns_for, json_response, resolve_fields, row_to_dict
+)
+from app.services.bookmark_sync import bookmark_sync_service, decode_sync_token, encode_sync_token
+from app.services.audio_upload import (
+    AudioUploadRoute, UploadTooLargeError, hash_file, is_audio_content_type,
+    parse_content_range, partial_upload_path, save_upload, stream_to_file, uploaded_size
+)
+from app.services.context_capture import queue_context_capture
+from app.services.episode_metadata import cover_url, episode_id_from_uri, episode_metadata
+from app.services.idempotency import (
+    IdempotencyKeyReusedError, idempotency_service, request_fingerprint, validate_idempotency_key
+)
+from app.services.job_queue import QueueFullError
+from app.services.search_service import search_service
+from app.services.spotify_client import SpotifyAPIError
 from app.services.spotify_service import spotify_service
-from app.services.openai_service import openai_service
+from app.services.spotify_tokens import spotify_tokens
+from app.services.summarization import summarizer
+from app.services.transcription_service import TranscriptionJob, transcription_pool
 
-router = APIRouter()
+router = APIRouter(route_class=AudioUploadRoute)
+
+AUDIO_EXTENSIONS = {
+    "audio/mp4": ".m4a",
+    "audio/x-m4a": ".m4a",
+    "audio/aac": ".aac",
+    "audio/mpeg": ".mp3",
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+    "audio/ogg": ".ogg",
+    "audio/webm": ".webm",
+    "audio/flac": ".flac",
+}
+
+# Clients may keep responses but must revalidate them with If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+# Serializes chunks of the same resumable upload within this worker; an entry
+# lives only while a request holds or waits on its lock
+_upload_locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
 
 class BookmarkCreate(BaseModel):
     podcast_name: str
@@ -22,6 +71,14 @@ class BookmarkCreate(BaseModel):
     spotify_episode_id: Optional[str] = None
     user_note: Optional[str] = None
 
+class BookmarkBatchItem(BookmarkCreate):
+    """One bookmark of an offline sync batch; the key plays the Idempotency-Key role."""
+    idempotency_key: Optional[str] = None
+
+class BookmarkBatchCreate(BaseModel):
+    # Validated per item so one bad bookmark does not fail the whole batch
+    bookmarks: List[Dict[str, Any]]
+
 class BookmarkCreateFromSpotify(BaseModel):
     """Create bookmark from current Spotify playback."""
     user_note: Optional[str] = None
@@ -40,6 +97,7 @@ class BookmarkResponse(BaseModel):
     podcast_cover_url: Optional[str] = None
     audio_file_path: Optional[str] = None
     transcript_text: Optional[str] = None
+    transcription_status: Optional[str] = None
     user_note: Optional[str] = None
     ai_summary: Optional[str] = None
     created_at: datetime
@@ -51,13 +109,40 @@ class BookmarkResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class AudioUploadStatus(BaseModel):
+    """Progress of a (resumable) audio upload."""
+    bookmark_id: int
+    received_bytes: int
+    total_bytes: Optional[int] = None
+    complete: bool
+    sha256: Optional[str] = None
+    transcription_status: Optional[str] = None
+
+class TranscriptionStatusResponse(BaseModel):
+    """Progress of a voice bookmark's background transcription."""
+    bookmark_id: int
+    status: Optional[str] = None
+    queue_position: Optional[int] = None  # Only known by the worker that queued it
+    transcript_text: Optional[str] = None
+    error: Optional[str] = None
+
 @router.post("/", response_model=BookmarkResponse)
 async def create_bookmark(
     bookmark: BookmarkCreate, 
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
-    """Create a new bookmark."""
+    """Create a new bookmark.
+    
+    Retries carrying the same `Idempotency-Key` return the original bookmark.
+    """
+    key = _idempotency_key(idempotency_key)
+    fingerprint = request_fingerprint("create", bookmark.dict())
+    replayed = await _replayed_bookmark(db, current_user_id, key, fingerprint)
+    if replayed is not None:
+        return json_response(replayed)
+    
     db_bookmark = Bookmark(
         user_id=current_user_id,
         podcast_name=bookmark.podcast_name,
@@ -66,17 +151,228 @@ async def create_bookmark(
         timestamp_ms=bookmark.timestamp_ms,
         user_note=bookmark.user_note
     )
+    if bookmark.spotify_episode_id:
+        access_token = await spotify_tokens.get_access_token(db, current_user_id)
+        await _fill_episode_metadata(db, db_bookmark, access_token)
+    
+    db_bookmark, _ = await _create_bookmark_once(db, current_user_id, key, fingerprint, db_bookmark)
+    return json_response(bookmark_dict(db_bookmark))
+
+@router.post("/batch")
+async def create_bookmarks_batch(
+    batch: BookmarkBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Create many bookmarks in one request, e.g. when an offline client syncs.
+    
+    New bookmarks are inserted together in one transaction. Items carrying
+    an `idempotency_key` are created at most once, across batches and single
+    `POST /bookmarks/` calls with the same key. Returns one result per item,
+    in request order: `created` or `existing` with the bookmark, `invalid`
+    or `conflict` with an error.
+    """
+    if len(batch.bookmarks) > bookmark_batch_service.max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {bookmark_batch_service.max_items} bookmarks per batch"
+        )
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(batch.bookmarks)
+    items = []
+    for index, raw in enumerate(batch.bookmarks):
+        try:
+            item = BookmarkBatchItem.parse_obj(raw)
+            key = validate_idempotency_key(item.idempotency_key)
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "invalid", "error": e.errors()}
+            continue
+        except ValueError as e:
+            results[index] = {"index": index, "status": "invalid", "error": str(e)}
+            continue
+        values = item.dict(exclude={"idempotency_key"})
+        items.append(BatchItem(index, values, key, request_fingerprint("create", values)))
+    
+    # Covers and durations come from the shared episode store, in bulk
+    episode_ids = {item.values["spotify_episode_id"] for item in items if item.values["spotify_episode_id"]}
+    if episode_ids:
+        access_token = await spotify_tokens.get_access_token(db, current_user_id)
+        episodes = await episode_metadata.get_episodes(db, episode_ids, access_token)
+        for item in items:
+            details = episodes.get(item.values["spotify_episode_id"])
+            if details is not None:
+                item.values["podcast_cover_url"] = cover_url(details)
+                item.values["duration_ms"] = details["duration_ms"]
+    
+    outcomes = await bookmark_batch_service.create_many(db, current_user_id, items) if items else {}
+    
+    bookmark_ids = {value for status, value in outcomes.values() if status != CONFLICT}
+    bookmarks = {}
+    if bookmark_ids:
+        rows = (await db.execute(select(*columns_for(FULL_FIELDS)).where(
+            Bookmark.id.in_(bookmark_ids),
+            Bookmark.user_id == current_user_id
+        ))).all()
+        bookmarks = {row.id: row_to_dict(row, FULL_FIELDS) for row in rows}
+    
+    for index, (status, value) in outcomes.items():
+        if status == CREATED and value in bookmarks:
+            created = bookmarks[value]
+            context_queued = queue_context_capture(
+                value, created["spotify_episode_id"], created["media_id"], created["source_app_package"]
+            )
+            _summarize_note(value, created["user_note"], created["transcription_status"], context_queued)
+        if status == CONFLICT:
+            results[index] = {"index": index, "status": status, "error": value}
+        else:
+            results[index] = {"index": index, "status": status, "bookmark": bookmarks.get(value)}
+    
+    counts = {"created": 0, "existing": 0, "failed": 0}
+    for result in results:
+        counts[result["status"] if result["status"] in counts else "failed"] += 1
+    return json_response({"results": results, **counts})
+
+@router.post("/{bookmark_id}/audio", response_model=AudioUploadStatus)
+async def upload_audio(
+    bookmark_id: int,
+    request: Request,
+    content_range: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Upload a bookmark's voice note as a raw audio body, resumably.
+    
+    Send the whole file at once, or send pieces with
+    `Content-Range: bytes start-end/total`. After an interruption, ask
+    `GET /bookmarks/{id}/audio` how many bytes arrived and continue from there.
+    The upload is transcribed in the background once complete.
+    """
+    content_type = request.headers.get("content-type")
+    if not is_audio_content_type(content_type):
+        raise HTTPException(status_code=415, detail="Body must be an audio file")
+    
+    try:
+        byte_range = parse_content_range(content_range)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    start, end, total = byte_range if byte_range else (0, None, None)
+    if total and total > settings.AUDIO_UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio upload exceeds {settings.AUDIO_UPLOAD_MAX_BYTES} bytes"
+        )
+    
+    bookmark = await _user_bookmark(db, bookmark_id, current_user_id)
+    if not bookmark:
+        raise HTTPException(status_code=404, detail="Bookmark not found")
     
-    db.add(db_bookmark)
-    db.commit()
-    db.refresh(db_bookmark)
+    completes_upload = total is None or end + 1 == total
+    if completes_upload and transcription_pool.is_full():
+        raise HTTPException(
+            status_code=503,
+            detail="Transcription queue is full, please retry later",
+            headers={"Retry-After": "30"}
+        )
     
-    return db_bookmark
+    lock = _upload_locks.setdefault(bookmark_id, asyncio.Lock())
+    async with lock:
+        partial_path = partial_upload_path(bookmark_id)
+        received = uploaded_size(partial_path)
+        if start > received:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload must resume at byte {received}",
+                headers={"Upload-Offset": str(received)}
+            )
+        
+        # The hash can only be computed on the fly when the file arrives in one piece
+        hasher = hashlib.sha256() if start == 0 and completes_upload else None
+        try:
+            received = await stream_to_file(
+                request.stream(),
+                partial_path,
+                max_bytes=total or settings.AUDIO_UPLOAD_MAX_BYTES,
+                offset=start,
+                hasher=hasher
+            )
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ClientDisconnect:
+            # Keep what arrived so the client can resume
+            return AudioUploadStatus(
+                bookmark_id=bookmark_id,
+                received_bytes=uploaded_size(partial_path),
+                total_bytes=total,
+                complete=False
+            )
+        
+        if end is not None and received != end + 1:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Body does not match Content-Range, received up to byte {received}",
+                headers={"Upload-Offset": str(received)}
+            )
+        if not completes_upload:
+            return AudioUploadStatus(
+                bookmark_id=bookmark_id,
+                received_bytes=received,
+                total_bytes=total,
+                complete=False
+            )
+        
+        sha256 = hasher.hexdigest() if hasher else await run_in_threadpool(hash_file, partial_path)
+        extension = AUDIO_EXTENSIONS.get(content_type.split(";")[0].strip().lower(), ".m4a")
+        file_path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}{extension}")
+        os.replace(partial_path, file_path)
+    
+    bookmark.audio_file_path = file_path
+    bookmark.transcription_status = TRANSCRIPTION_PENDING
+    bookmark.transcription_error = None
+    await db.commit()
+    
+    try:
+        transcription_pool.submit(
+            bookmark_id,
+            TranscriptionJob(bookmark_id=bookmark_id, audio_file_path=file_path, content_hash=sha256)
+        )
+    except QueueFullError:
+        # Put the bytes back so re-sending the final chunk finishes the upload
+        os.replace(file_path, partial_upload_path(bookmark_id))
+        bookmark.audio_file_path = None
+        bookmark.transcription_status = None
+        await db.commit()
+        raise HTTPException(
+            status_code=503,
+            detail="Transcription queue is full, please retry later",
+            headers={"Retry-After": "30"}
+        )
+    
+    return AudioUploadStatus(
+        bookmark_id=bookmark_id,
+        received_bytes=received,
+        total_bytes=received,
+        complete=True,
+        sha256=sha256,
+        transcription_status=TRANSCRIPTION_PENDING
+    )
 
-@router.post("/{bookmark_id}/audio")
-async def upload_audio(bookmark_id: int, audio: UploadFile = File(...)):
-    # TODO: 实现音频文件上传和转录
-    return {"message": f"Audio uploaded for bookmark {bookmark_id}"}
+@router.get("/{bookmark_id}/audio", response_model=AudioUploadStatus)
+async def get_audio_upload_status(
+    bookmark_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Report how many bytes of a resumable audio upload have arrived."""
+    bookmark = await _user_bookmark(db, bookmark_id, current_user_id)
+    if not bookmark:
+        raise HTTPException(status_code=404, detail="Bookmark not found")
+    
+    return AudioUploadStatus(
+        bookmark_id=bookmark_id,
+        received_bytes=uploaded_size(partial_upload_path(bookmark_id)),
+        complete=bookmark.transcription_status is not None,
+        transcription_status=bookmark.transcription_status
+    )
 
 @router.get("/current-playback")
 async def get_current_playback():
@@ -124,12 +420,13 @@ async def get_current_playback():
 
 @router.get("/debug")
 async def debug_bookmarks(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Debug endpoint to return raw bookmark data."""
-    bookmarks = db.query(Bookmark).filter(
+    result = await db.execute(select(Bookmark).where(
         Bookmark.user_id == 2
-    ).limit(1).all()
+    ).limit(1))
+    bookmarks = result.scalars().all()
     
     # Convert to dict manually to see what we have
     result = []
@@ -157,104 +454,239 @@ class SimpleBookmarkTest(BaseModel):
 
 @router.get("/test-simple", response_model=SimpleBookmarkTest)
 async def test_simple_bookmark(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Test pydantic conversion with minimal fields."""
-    bookmark = db.query(Bookmark).filter(
+    result = await db.execute(select(Bookmark).where(
         Bookmark.user_id == 2
-    ).first()
+    ))
+    bookmark = result.scalars().first()
     if not bookmark:
         raise HTTPException(status_code=404, detail="No bookmarks found")
     return bookmark
 
 @router.get("/")
 async def get_bookmarks(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db),
+    request: Request,
+    skip: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    fields: Optional[str] = Query(None, description="Field names or presets: summary, playback, full"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
-    """Get list of bookmarks for current user."""
-    bookmarks = db.query(Bookmark).filter(
-        Bookmark.user_id == current_user_id
-    ).offset(skip).limit(limit).all()
+    """Get list of bookmarks for current user, newest first.
     
-    # Manually convert to dict to avoid pydantic validation issues
-    result = []
-    for bookmark in bookmarks:
-        result.append({
-            "id": bookmark.id,
-            "podcast_name": bookmark.podcast_name,
-            "episode_name": bookmark.episode_name,
-            "timestamp_ms": bookmark.timestamp_ms,
-            "duration_ms": bookmark.duration_ms,
-            "spotify_episode_id": bookmark.spotify_episode_id,
-            "podcast_cover_url": bookmark.podcast_cover_url,
-            "audio_file_path": bookmark.audio_file_path,
-            "transcript_text": bookmark.transcript_text,
-            "user_note": bookmark.user_note,
-            "ai_summary": bookmark.ai_summary,
-            "created_at": bookmark.created_at.isoformat() if bookmark.created_at else None,
-            "media_id": bookmark.media_id,
-            "source_app_package": bookmark.source_app_package,
-            "album_art_uri": bookmark.album_art_uri
-        })
-    
-    return result
+    When more bookmarks exist, the `X-Next-Cursor` response header holds the
+    cursor of the next page. `skip` still selects offset paging for older
+    clients. `include_total=true` adds an `X-Total-Count` header.
+    `fields=summary` (or a comma separated list of field names) selects only
+    those columns; the default is the `full` preset.
+    
+    The `ETag` changes whenever any of the user's bookmarks does; sending it
+    back in `If-None-Match` gets a 304 without loading any rows.
+    """
+    if skip is not None and cursor:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+    try:
+        field_names = resolve_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Read the version before the rows, so a concurrent change can only make the tag stale, never the body
+    version = await bookmark_sync_service.collection_version(db, current_user_id)
+    etag = make_etag("c", current_user_id, version, query_digest(request.url.query))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    # Select only the requested columns, plus the cursor key
+    dialect = dialect_name(db)
+    query = select(
+        *columns_for(field_names),
+        cursor_column(dialect, Bookmark.created_at).label("cursor_created_at")
+    ).where(Bookmark.user_id == current_user_id)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if include_total:
+        total = await db.execute(
+            select(func.count(Bookmark.id)).where(Bookmark.user_id == current_user_id)
+        )
+        headers["X-Total-Count"] = str(total.scalar())
+    
+    if cursor:
+        try:
+            created_at, bookmark_id = decode_cursor(cursor, 2)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(keyset_after(
+            dialect, (Bookmark.created_at, Bookmark.id), (created_at, bookmark_id)
+        ))
+    
+    query = query.order_by(Bookmark.created_at.desc(), Bookmark.id.desc())
+    if skip:
+        query = query.offset(skip)
+    
+    # One extra row tells whether another page exists
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.cursor_created_at, last.id)
+    
+    return json_response([row_to_dict(row, field_names) for row in rows], headers=headers)
+
+@router.get("/search")
+async def search_bookmarks(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query("summary", description="Field names or presets: summary, playback, full"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Full-text search over transcripts, notes, AI summaries and titles.
+
+    Results are ordered by relevance and carry `rank` and a `snippet` with
+    matches wrapped in <b></b>. Quoted phrases, `or` and `-excluded` terms
+    are supported. Paging works like the list endpoint: pass the
+    `X-Next-Cursor` header back as `cursor`.
+    """
+    try:
+        field_names = resolve_fields(fields)
+        results, next_cursor = await search_service.search(
+            db, current_user_id, q, field_names, limit, cursor
+        )
+    except ValueError as e:  # Unknown fields, empty queries and bad cursors
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return json_response(results, headers=headers)
+
+@router.get("/export")
+async def export_bookmarks(
+    format: str = Query(NDJSON, description="ndjson, csv or markdown"),
+    gzip: bool = False,
+    fields: Optional[str] = Query(None, description="Field names or presets for ndjson and csv; default full"),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Download every bookmark of the current user as one file.
+    
+    Rows are streamed from the database as they are written, so the export
+    size is not limited. Markdown groups bookmarks by podcast and episode.
+    `gzip=true` sends a .gz file.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+    try:
+        field_names = resolve_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"poma-bookmarks-{datetime.utcnow():%Y-%m-%d}.{extension}"
+    if gzip:
+        media_type, filename = "application/gzip", filename + ".gz"
+    return StreamingResponse(
+        bookmark_export.stream(current_user_id, format, field_names, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    )
+
+@router.get("/changes")
+async def get_bookmark_changes(
+    since: Optional[str] = Query(None, description="next_token of the previous sync; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Field names or presets: summary, playback, full"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Get bookmarks created, updated or deleted since a sync token.
+    
+    Store `next_token` and pass it as `since` next time; while `has_more`
+    is true, call again right away. Without `since` every bookmark is sent.
+    """
+    try:
+        field_names = resolve_fields(fields)
+        since_sequence = decode_sync_token(since)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    bookmarks, deleted, next_sequence, has_more = await bookmark_sync_service.changes(
+        db, current_user_id, since_sequence, field_names, limit
+    )
+    return json_response({
+        "bookmarks": bookmarks,
+        "deleted": deleted,
+        "next_token": encode_sync_token(next_sequence),
+        "has_more": has_more,
+    })
 
 @router.get("/{bookmark_id}", response_model=BookmarkResponse)
-async def get_bookmark(bookmark_id: int, db: Session = Depends(get_db)):
-    """Get a specific bookmark by ID."""
-    bookmark = db.query(Bookmark).filter(Bookmark.id == bookmark_id).first()
+async def get_bookmark(
+    bookmark_id: int,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a specific bookmark by ID.
+    
+    Answers 304 without loading the row when `If-None-Match` holds the
+    current `ETag`.
+    """
+    version = await bookmark_sync_service.bookmark_version(db, bookmark_id)
+    etag = make_etag("b", bookmark_id, version or 0)
+    if version is not None and etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    bookmark = await db.get(Bookmark, bookmark_id)
     if not bookmark:
         raise HTTPException(status_code=404, detail="Bookmark not found")
-    return bookmark
+    return json_response(bookmark_dict(bookmark), headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 @router.delete("/{bookmark_id}")
 async def delete_bookmark(
     bookmark_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
-    """Delete a bookmark."""
-    bookmark = db.query(Bookmark).filter(
-        Bookmark.id == bookmark_id,
-        Bookmark.user_id == current_user_id
-    ).first()
+    """Delete a bookmark; other devices see it in `GET /bookmarks/changes` as deleted."""
+    bookmark = await _user_bookmark(db, bookmark_id, current_user_id)
     if not bookmark:
         raise HTTPException(status_code=404, detail="Bookmark not found")
     
-    db.delete(bookmark)
-    db.commit()
+    await db.delete(bookmark)
+    await db.commit()
     return {"message": f"Bookmark {bookmark_id} deleted successfully"}
 
 @router.put("/{bookmark_id}", response_model=BookmarkResponse)
 async def update_bookmark(
     bookmark_id: int,
     bookmark_update: BookmarkUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Update a bookmark's transcript text."""
-    bookmark = db.query(Bookmark).filter(
-        Bookmark.id == bookmark_id,
-        Bookmark.user_id == current_user_id
-    ).first()
+    bookmark = await _user_bookmark(db, bookmark_id, current_user_id)
     if not bookmark:
         raise HTTPException(status_code=404, detail="Bookmark not found")
     
     # Update the transcript text
     bookmark.transcript_text = bookmark_update.transcript_text
     
-    db.commit()
-    db.refresh(bookmark)
-    return bookmark
+    await db.commit()
+    await db.refresh(bookmark)
+    if bookmark.transcript_text or bookmark.user_note:
+        summarizer.submit(bookmark.id)  # The summary follows the edited text
+    return json_response(bookmark_dict(bookmark))
 
 @router.post("/from-spotify", response_model=BookmarkResponse)
 async def create_bookmark_from_spotify(
     bookmark_data: BookmarkCreateFromSpotify,
     authorization: str = Header(..., description="Bearer token from Spotify OAuth"),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a bookmark from current Spotify playback."""
     # Extract access token from Authorization header
@@ -262,9 +694,20 @@ async def create_bookmark_from_spotify(
         raise HTTPException(status_code=400, detail="Invalid authorization header format")
     
     access_token = authorization.replace("Bearer ", "")
+    user_id = 1  # TODO: Get from JWT token
+    
+    # A replay must not bookmark whatever is playing now
+    key = _idempotency_key(idempotency_key)
+    fingerprint = request_fingerprint("from-spotify", bookmark_data.dict())
+    replayed = await _replayed_bookmark(db, user_id, key, fingerprint)
+    if replayed is not None:
+        return json_response(replayed)
     
     # Get current playback from Spotify
-    playback = spotify_service.get_current_playback(access_token)
+    try:
+        playback = await spotify_service.get_current_playback(access_token)
+    except SpotifyAPIError:
+        raise HTTPException(status_code=401, detail="Spotify rejected the access token")
     if not playback:
         raise HTTPException(
             status_code=400, 
@@ -273,7 +716,7 @@ async def create_bookmark_from_spotify(
     
     # Create bookmark with Spotify data
     db_bookmark = Bookmark(
-        user_id=1,  # TODO: Get from JWT token
+        user_id=user_id,
         podcast_name=playback["podcast_name"],
         episode_name=playback["episode_name"],
         spotify_episode_id=playback["episode_id"],
@@ -282,12 +725,11 @@ async def create_bookmark_from_spotify(
         user_note=bookmark_data.user_note,
         podcast_cover_url=playback["images"][0]["url"] if playback["images"] else None
     )
+    if episode_id_from_uri(playback["episode_uri"]):
+        await _fill_episode_metadata(db, db_bookmark, access_token)
     
-    db.add(db_bookmark)
-    db.commit()
-    db.refresh(db_bookmark)
-    
-    return db_bookmark
+    db_bookmark, _ = await _create_bookmark_once(db, user_id, key, fingerprint, db_bookmark)
+    return json_response(bookmark_dict(db_bookmark))
 
 @router.post("/voice-bookmark", response_model=BookmarkResponse)
 async def create_voice_bookmark(
@@ -300,14 +742,30 @@ async def create_voice_bookmark(
     album_art_uri: str = Form(None),
     timestamp_ms: int = Form(None),
     duration_ms: int = Form(None),
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
-    """Create a bookmark with voice note using MediaSession data from Android."""
+    """Create a bookmark with voice note using MediaSession data from Android.
+    
+    The transcript is produced in the background; poll
+    `GET /bookmarks/{id}/transcription` for progress. Retries carrying the
+    same `Idempotency-Key` return the original bookmark without saving or
+    transcribing the audio again.
+    """
     # Validate audio file
     if not audio.content_type or not audio.content_type.startswith("audio/"):
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
+    key = _idempotency_key(idempotency_key)
+    fingerprint = request_fingerprint(
+        "voice", media_title, media_artist, media_id, source_app_package,
+        album_art_uri, timestamp_ms, duration_ms
+    )
+    replayed = await _replayed_bookmark(db, current_user_id, key, fingerprint)
+    if replayed is not None:
+        return json_response(replayed)
+    
     # Check if we have MediaSession data
     media_session_available = bool(media_title and media_artist and timestamp_ms)
     
@@ -325,8 +783,16 @@ async def create_voice_bookmark(
     else:
         print("DEBUG: No MediaSession data available, creating generic bookmark")
     
+    # Refuse early when the transcription backlog is full
+    if transcription_pool.is_full():
+        raise HTTPException(
+            status_code=503,
+            detail="Transcription queue is full, please retry later",
+            headers={"Retry-After": "30"}
+        )
+    
     # Create uploads directory if it doesn't exist
-    upload_dir = "uploads/audio"
+    upload_dir = settings.UPLOAD_DIR
     os.makedirs(upload_dir, exist_ok=True)
     
     # Generate unique filename
@@ -334,24 +800,14 @@ async def create_voice_bookmark(
     unique_filename = f"{uuid.uuid4()}{file_extension}"
     file_path = os.path.join(upload_dir, unique_filename)
     
-    # Save audio file temporarily for transcription
+    # Stream the audio to disk; it is kept until the background worker has transcribed it
     try:
-        with open(file_path, "wb") as buffer:
-            content = await audio.read()
-            buffer.write(content)
+        stored_audio = await save_upload(audio, file_path)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save audio file: {str(e)}")
     
-    # Transcribe audio to text using OpenAI Whisper
-    transcript_text = await openai_service.transcribe_audio(file_path)
-    
-    # Delete the audio file after transcription (save storage)
-    try:
-        os.remove(file_path)
-        print(f"Audio file deleted: {file_path}")
-    except Exception as e:
-        print(f"Warning: Could not delete audio file {file_path}: {e}")
-    
     # Create bookmark with MediaSession data or fallback to generic recording
     if media_session_available:
         # Create bookmark with MediaSession data from Android
@@ -362,8 +818,9 @@ async def create_voice_bookmark(
             spotify_episode_id=None,   # Legacy field, not used with MediaSession
             timestamp_ms=timestamp_ms,
             duration_ms=duration_ms,
-            transcript_text=transcript_text,
-            audio_file_path=None,      # No longer store audio files
+            transcript_text=None,      # Filled in by the transcription worker
+            transcription_status=TRANSCRIPTION_PENDING,
+            audio_file_path=file_path, # Removed once transcribed
             podcast_cover_url=None,    # Legacy field, use album_art_uri instead
             # New MediaSession fields
             media_id=media_id,
@@ -380,8 +837,9 @@ async def create_voice_bookmark(
             spotify_episode_id=None,
             timestamp_ms=current_time,
             duration_ms=None,
-            transcript_text=transcript_text,
-            audio_file_path=None,
+            transcript_text=None,
+            transcription_status=TRANSCRIPTION_PENDING,
+            audio_file_path=file_path,
             podcast_cover_url=None,
             # New MediaSession fields
             media_id=None,
@@ -391,12 +849,133 @@ async def create_voice_bookmark(
     
     try:
         print(f"DEBUG: Adding bookmark to database with timestamp {db_bookmark.timestamp_ms}ms")
-        db.add(db_bookmark)
-        db.commit()
-        db.refresh(db_bookmark)
+        db_bookmark, created = await _create_bookmark_once(db, current_user_id, key, fingerprint, db_bookmark)
         print(f"DEBUG: Bookmark successfully created with ID: {db_bookmark.id}")
-        return db_bookmark
+    except HTTPException:
+        _remove_file(file_path)
+        raise
     except Exception as db_error:
         print(f"ERROR: Database commit failed: {db_error}")
-        db.rollback()
+        await db.rollback()
+        _remove_file(file_path)
         raise HTTPException(status_code=500, detail=f"Database error: {str(db_error)}")
+    
+    if not created:
+        # A concurrent retry with the same key already queued this audio
+        _remove_file(file_path)
+        return json_response(bookmark_dict(db_bookmark))
+    
+    # Hand the slow ffmpeg + Whisper work to the background workers
+    try:
+        transcription_pool.submit(
+            db_bookmark.id,
+            TranscriptionJob(
+                bookmark_id=db_bookmark.id,
+                audio_file_path=file_path,
+                content_hash=stored_audio.sha256
+            )
+        )
+    except QueueFullError:
+        if key:
+            await idempotency_service.forget(db, current_user_id, key)
+        await db.delete(db_bookmark)
+        await db.commit()
+        _remove_file(file_path)
+        raise HTTPException(
+            status_code=503,
+            detail="Transcription queue is full, please retry later",
+            headers={"Retry-After": "30"}
+        )
+    
+    return json_response(bookmark_dict(db_bookmark))
+
+@router.get("/{bookmark_id}/transcription", response_model=TranscriptionStatusResponse)
+async def get_transcription_status(
+    bookmark_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Get background transcription progress of a voice bookmark."""
+    bookmark = await _user_bookmark(db, bookmark_id, current_user_id)
+    if not bookmark:
+        raise HTTPException(status_code=404, detail="Bookmark not found")
+    
+    return TranscriptionStatusResponse(
+        bookmark_id=bookmark.id,
+        status=bookmark.transcription_status,
+        queue_position=transcription_pool.position(bookmark.id),
+        transcript_text=bookmark.transcript_text,
+        error=bookmark.transcription_error
+    )
+
+def _idempotency_key(header_value: Optional[str]) -> Optional[str]:
+    try:
+        return validate_idempotency_key(header_value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _user_bookmark(db: AsyncSession, bookmark_id: int, user_id: int) -> Optional[Bookmark]:
+    result = await db.execute(select(Bookmark).where(
+        Bookmark.id == bookmark_id,
+        Bookmark.user_id == user_id
+    ))
+    return result.scalars().first()
+
+async def _replayed_bookmark(db: AsyncSession, user_id: int, key: Optional[str], fingerprint: str):
+    """Return the original response if this request was already handled."""
+    if not key:
+        return None
+    try:
+        cached = idempotency_service.cached_response(user_id, key, fingerprint)
+        if cached is not None:
+            return cached
+        bookmark = await idempotency_service.find_bookmark(db, user_id, key, fingerprint)
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if bookmark is None:
+        return None
+    _remember_response(user_id, key, fingerprint, bookmark)
+    return bookmark_dict(bookmark)
+
+async def _create_bookmark_once(db: AsyncSession, user_id: int, key: Optional[str], fingerprint: str, bookmark: Bookmark):
+    """Insert a bookmark unless a concurrent request with the same key won."""
+    try:
+        bookmark, created = await idempotency_service.create_once(db, user_id, key, fingerprint, bookmark)
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if key:
+        _remember_response(user_id, key, fingerprint, bookmark)
+    if created:
+        context_queued = queue_context_capture(
+            bookmark.id, bookmark.spotify_episode_id, bookmark.media_id, bookmark.source_app_package
+        )
+        _summarize_note(bookmark.id, bookmark.user_note, bookmark.transcription_status, context_queued)
+    return bookmark, created
+
+def _summarize_note(
+    bookmark_id: int,
+    user_note: Optional[str],
+    transcription_status: Optional[str],
+    context_queued: bool
+) -> None:
+    """Summarize a new bookmark's note now, unless a transcription or context capture will submit it."""
+    if user_note and transcription_status is None and not context_queued:
+        summarizer.submit(bookmark_id)
+
+async def _fill_episode_metadata(db: AsyncSession, bookmark: Bookmark, access_token: Optional[str]) -> None:
+    """Fill the cover and duration from the shared episode metadata store."""
+    details = await episode_metadata.get_episode(db, bookmark.spotify_episode_id, access_token)
+    if details is None:
+        return
+    bookmark.podcast_cover_url = bookmark.podcast_cover_url or cover_url(details)
+    bookmark.duration_ms = bookmark.duration_ms or details["duration_ms"]
+
+def _remember_response(user_id: int, key: str, fingerprint: str, bookmark: Bookmark) -> None:
+    response = bookmark_dict(bookmark)
+    idempotency_service.remember_response(user_id, key, fingerprint, response)
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError as e:
+        print(f"Warning: Could not delete audio file {path}: {e}")
@@ -0,0 +1,41 @@
+"""Weekly review report endpoints for Poma."""
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import get_current_user_id
+from app.core.database import get_async_db
+from app.core.etag import etag_matches, make_etag, not_modified
+from app.models.weekly_report import week_start
+from app.services.bookmark_serializer import json_response
+from app.services.bookmark_sync import bookmark_sync_service
+from app.services.weekly_reports import weekly_reports
+
+router = APIRouter()
+
+CACHE_CONTROL = "private, no-cache"
+
+
+@router.get("/weekly")
+async def get_weekly_report(
+    week: Optional[date] = Query(None, description="Any day of the week; defaults to last week"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Bookmark counts, listening positions, top shows and summaries for one week.
+    
+    Weeks run Monday to Sunday (UTC). The report is built from per-week
+    aggregates, so it costs the same for any library size. The `ETag`
+    changes whenever any of the user's bookmarks does.
+    """
+    start = week_start(None) - timedelta(days=7) if week is None else week - timedelta(days=week.weekday())
+    version = await bookmark_sync_service.collection_version(db, current_user_id)
+    etag = make_etag("w", current_user_id, start.isoformat(), version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    report = await weekly_reports.report(db, current_user_id, start, version)
+    return json_response(report, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -7,12 +7,16 @@ from fastapi import APIRouter, HTTPException, Header, Depends, Query
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.auth import get_current_user_id
+from app.services.episode_metadata import episode_metadata
+from app.services.playback_cache import playback_cache
+from app.services.spotify_client import SpotifyAPIError
 from app.services.spotify_service import spotify_service
+from app.services.spotify_tokens import spotify_tokens
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -68,25 +72,25 @@ async def get_spotify_auth_url():
 @router.post("/callback", response_model=SpotifyCallback)
 async def spotify_callback(
     request: SpotifyCallbackRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Handle Spotify OAuth callback and store token."""
     try:
-        access_token = spotify_service.get_access_token(request.code)
-        if not access_token:
+        token_info = await spotify_service.exchange_code(request.code)
+        if not token_info:
             raise HTTPException(status_code=400, detail="Invalid authorization code")
         
-        # Store token in user record
-        user = db.query(User).filter(User.id == current_user_id).first()
+        # Store token, refresh token and expiry in user record
+        user = await db.get(User, current_user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user.spotify_access_token = access_token
-        db.commit()
+        token = await spotify_tokens.store(db, user, token_info)
+        playback_cache.invalidate(current_user_id)
         
         return SpotifyCallback(
-            access_token=access_token,
+            access_token=token.access_token,
             message="Spotify authorization successful"
         )
     except Exception as e:
@@ -96,17 +100,22 @@ async def spotify_callback(
 
 @router.get("/current-playback", response_model=Optional[PodcastPlayback])
 async def get_current_playback(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
-    """Get current podcast playback status."""
+    """Get current podcast playback status.
+    
+    Served from a short-lived per-user snapshot; concurrent polls share one
+    Spotify call and `progress_ms` is advanced locally between refreshes.
+    A token Spotify rejects is renewed and the call retried once; if that
+    fails too the answer is 401 and nothing is cached.
+    """
+    async def fetch_playback():
+        # The user's Spotify token, refreshed if it is about to expire or was rejected
+        return await spotify_tokens.call_with_token(db, current_user_id, spotify_service.get_current_playback)
+    
     try:
-        # Get user's stored Spotify token
-        user = db.query(User).filter(User.id == current_user_id).first()
-        if not user or not user.spotify_access_token:
-            return None  # No Spotify token available
-        
-        playback = spotify_service.get_current_playback(user.spotify_access_token)
+        playback = await playback_cache.get(current_user_id, fetch_playback)
         
         if not playback:
             return None
@@ -125,20 +134,32 @@ async def get_current_playback(
         
     except HTTPException:
         raise
+    except SpotifyAPIError as e:
+        if e.status_code != 401:
+            raise HTTPException(status_code=502, detail="Failed to get playback status")
+        raise HTTPException(status_code=401, detail="Spotify authorization expired, please reconnect Spotify")
     except Exception as e:
         logger.error(f"Error getting current playback: {e}")
         raise HTTPException(status_code=500, detail="Failed to get playback status")
 
 
 @router.get("/episode/{episode_id}", response_model=EpisodeDetails)
-async def get_episode_details(episode_id: str, authorization: str = Header(...)):
-    """Get detailed episode information."""
+async def get_episode_details(
+    episode_id: str,
+    authorization: str = Header(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get detailed episode information.
+    
+    Served from the shared episode metadata store; Spotify is only asked
+    for episodes nobody has looked up before.
+    """
     try:
         if not authorization.startswith("Bearer "):
             raise HTTPException(status_code=401, detail="Invalid authorization header")
         
         access_token = authorization.split(" ")[1]
-        episode = spotify_service.get_episode_details(access_token, episode_id)
+        episode = await episode_metadata.get_episode(db, episode_id, access_token)
         
         if not episode:
             raise HTTPException(status_code=404, detail="Episode not found")
@@ -146,9 +167,9 @@ async def get_episode_details(episode_id: str, authorization: str = Header(...))
         return EpisodeDetails(
             id=episode['id'],
             name=episode['name'],
-            description=episode['description'],
-            duration_ms=episode['duration_ms'],
-            podcast_name=episode['podcast']['name'],
+            description=episode['description'] or "",
+            duration_ms=episode['duration_ms'] or 0,
+            podcast_name=episode['podcast']['name'] or "",
             podcast_publisher=episode['podcast'].get('publisher'),
             release_date=episode.get('release_date')
         )
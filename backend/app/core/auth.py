@@ -1,22 +1,136 @@
-from datetime import datetime
-from typing import Optional
+import time
+from typing import Any, Dict, Optional
 
 from fastapi import HTTPException, Header, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 import jwt as pyjwt
 
+from app.core.cache import LRUCache
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.user import User
 
 
-def get_current_user_id(authorization: str = Header(..., alias="Authorization")) -> int:
+class PrincipalCache:
+    """Verified token claims and loaded user records, per worker process.
+
+    Claims stay cached until the token's `exp` (capped by a maximum TTL), so
+    repeated requests skip HMAC verification. User records are cached more
+    briefly: changes made by other workers show up within the user TTL, and
+    changes made here invalidate the entry immediately (see the User hooks
+    below).
+    """
+
+    def __init__(self, max_entries: int, claims_ttl_seconds: int, user_ttl_seconds: int):
+        self.claims_ttl_seconds = claims_ttl_seconds
+        # token -> (user_id, generation, claims)
+        self._claims = LRUCache(max_entries=max_entries)
+        # user_id -> (generation, column values)
+        self._users = LRUCache(max_entries=max_entries, ttl_seconds=user_ttl_seconds)
+        # Bumped on invalidation; entries from older generations are stale
+        self._generations: Dict[int, int] = {}
+        # Counted here rather than by the LRUs, which see stale entries as hits
+        self.claims_hits = 0
+        self.claims_misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+        self.invalidations = 0
+
+    def get_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        entry = self._claims.get(token)
+        if entry is not None:
+            user_id, generation, claims = entry
+            if generation == self._generations.get(user_id, 0):
+                self.claims_hits += 1
+                return claims
+            self._claims.delete(token)
+        self.claims_misses += 1
+        return None
+
+    def set_claims(self, token: str, user_id: int, claims: Dict[str, Any]) -> None:
+        ttl = self.claims_ttl_seconds
+        if "exp" in claims:
+            ttl = min(ttl, claims["exp"] - time.time())
+        self._claims.set(token, (user_id, self._generations.get(user_id, 0), claims), ttl_seconds=ttl)
+
+    def get_user(self, user_id: int) -> Optional[User]:
+        """A detached User built from the cached record; each caller gets its own instance."""
+        entry = self._users.get(user_id)
+        if entry is not None:
+            generation, values = entry
+            if generation == self._generations.get(user_id, 0):
+                self.user_hits += 1
+                user = User(**values)
+                make_transient_to_detached(user)
+                return user
+            self._users.delete(user_id)
+        self.user_misses += 1
+        return None
+
+    def set_user(self, user: User) -> None:
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        self._users.set(user.id, (self._generations.get(user.id, 0), values))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Forget a user's record and every cached token of theirs, e.g. on deactivation."""
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        self._users.delete(user_id)
+        self.invalidations += 1
+
+    def invalidate_token(self, token: str) -> None:
+        self._claims.delete(token)
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop everything, e.g. after rotating SECRET_KEY."""
+        self._claims.clear()
+        self._users.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        claims_lookups = self.claims_hits + self.claims_misses
+        user_lookups = self.user_hits + self.user_misses
+        return {
+            "claims_entries": len(self._claims),
+            "claims_hits": self.claims_hits,
+            "claims_misses": self.claims_misses,
+            "claims_hit_rate": round(self.claims_hits / claims_lookups, 3) if claims_lookups else 0.0,
+            "user_entries": len(self._users),
+            "user_hits": self.user_hits,
+            "user_misses": self.user_misses,
+            "user_hit_rate": round(self.user_hits / user_lookups, 3) if user_lookups else 0.0,
+            "evictions": self._claims.evictions + self._users.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Global cache instance
+principal_cache = PrincipalCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    claims_ttl_seconds=settings.AUTH_CLAIMS_CACHE_TTL_SECONDS,
+    user_ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
+
+
+async def get_current_user_id(authorization: str = Header(..., alias="Authorization")) -> int:
     """Extract user_id from JWT token in Authorization header."""
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Invalid authorization header format")
-    
+
     token = authorization.replace("Bearer ", "")
-    
+
+    payload = principal_cache.get_claims(token)
+    if payload is not None:
+        return int(payload["sub"])
+
     try:
         payload = pyjwt.decode(
             token,
@@ -26,19 +140,26 @@ def get_current_user_id(authorization: str = Header(..., alias="Authorization"))
         user_id = int(payload.get("sub"))
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token: no user ID")
-        return user_id
     except pyjwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    principal_cache.set_claims(token, user_id, payload)
+    return user_id
+
 
-def get_current_user(
+async def get_current_user(
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current user from database."""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
\ No newline at end of file
+    user = principal_cache.get_user(user_id)
+    if user is None:
+        user = await db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal_cache.set_user(user)
+    if user.is_active is False:
+        raise HTTPException(status_code=401, detail="User is inactive")
+    return user
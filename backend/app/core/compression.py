@@ -0,0 +1,310 @@
+"""Response compression for Poma API.
+
+Bookmark lists are mostly transcript and summary text, which shrinks
+several times over under gzip or brotli. The middleware negotiates the
+encoding from Accept-Encoding (brotli first), leaves small and
+non-text responses alone, compresses streamed responses chunk by chunk,
+and keeps the compressed bytes of responses that carry an ETag, since the
+same tag means the same body.
+"""
+import gzip
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+GZIP = "gzip"
+BROTLI = "br"
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+# Bodies larger than this are compressed off the event loop
+THREAD_THRESHOLD_BYTES = 64 * 1024
+
+
+def choose_encoding(accept_encoding: Optional[str], brotli_available: bool = True) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q-values; None for identity."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    candidates = [BROTLI, GZIP] if brotli_available else [GZIP]
+    default = weights.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = weights.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class ResponseCompressor:
+    """Compression settings, the cache of pre-compressed bodies, and counters."""
+
+    def __init__(
+        self,
+        minimum_size: int,
+        gzip_level: int,
+        brotli_quality: int,
+        cache_max_bytes: int
+    ):
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli_available = brotli is not None
+        # (etag, encoding) -> compressed body
+        self._cache = LRUCache(max_bytes=cache_max_bytes)
+        self.responses = 0
+        self.streamed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cache_hits = 0
+        self.total_ms = 0.0
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        started_at = time.perf_counter()
+        if encoding == BROTLI:
+            compressed = brotli.compress(body, quality=self.brotli_quality, mode=brotli.MODE_TEXT)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        self._record(len(body), len(compressed), time.perf_counter() - started_at)
+        return compressed
+
+    async def compress_body(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        """Compress a complete body, reusing the stored result for a known ETag."""
+        key = (etag, encoding)
+        if etag:
+            compressed = self._cache.get(key)
+            if compressed is not None:
+                self.cache_hits += 1
+                self.responses += 1
+                self.bytes_in += len(body)
+                self.bytes_out += len(compressed)
+                return compressed
+
+        if len(body) > THREAD_THRESHOLD_BYTES:
+            compressed = await run_in_threadpool(self.compress, body, encoding)
+        else:
+            compressed = self.compress(body, encoding)
+        if etag:
+            self._cache.set(key, compressed)
+        return compressed
+
+    def stream(self, encoding: str) -> "StreamCompressor":
+        self.streamed += 1
+        return StreamCompressor(self, encoding)
+
+    def _record(self, size_in: int, size_out: int, seconds: float) -> None:
+        self.responses += 1
+        self.bytes_in += size_in
+        self.bytes_out += size_out
+        self.total_ms += seconds * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        cache = self._cache.stats()
+        return {
+            "responses": self.responses,
+            "streamed": self.streamed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else 0.0,
+            "compress_ms": round(self.total_ms, 1),
+            "cache_entries": cache["entries"],
+            "cache_bytes": cache["bytes"],
+            "cache_hits": self.cache_hits,
+            "brotli": self.brotli_available,
+        }
+
+
+class StreamCompressor:
+    """Incremental compression of a streamed body; each chunk is flushed as it goes."""
+
+    def __init__(self, owner: ResponseCompressor, encoding: str):
+        self.owner = owner
+        self.size_in = 0
+        self.size_out = 0
+        self.seconds = 0.0
+        if encoding == BROTLI:
+            self._brotli = brotli.Compressor(quality=owner.brotli_quality, mode=brotli.MODE_TEXT)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(owner.gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, chunk: bytes) -> bytes:
+        started_at = time.perf_counter()
+        if self._brotli is not None:
+            output = self._brotli.process(chunk) + self._brotli.flush()
+        else:
+            output = self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+        self._count(len(chunk), len(output), started_at)
+        return output
+
+    def finish(self) -> bytes:
+        started_at = time.perf_counter()
+        output = self._brotli.finish() if self._brotli is not None else self._zlib.flush(zlib.Z_FINISH)
+        self._count(0, len(output), started_at)
+        self.owner._record(self.size_in, self.size_out, self.seconds)
+        return output
+
+    def _count(self, size_in: int, size_out: int, started_at: float) -> None:
+        self.size_in += size_in
+        self.size_out += size_out
+        self.seconds += time.perf_counter() - started_at
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing text responses with brotli or gzip."""
+
+    def __init__(self, app: ASGIApp, compressor: "ResponseCompressor" = None):
+        self.app = app
+        self.compressor = compressor or response_compressor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(
+            Headers(scope=scope).get("accept-encoding"), self.compressor.brotli_available
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponse(self.compressor, encoding, send).run(self.app, scope, receive)
+
+
+class _CompressedResponse:
+    """State of one response passing through the middleware."""
+
+    def __init__(self, compressor: ResponseCompressor, encoding: str, send: Send):
+        self.compressor = compressor
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.buffered: List[bytes] = []
+        self.buffered_size = 0
+        self.passthrough = False
+        self.stream: Optional[StreamCompressor] = None
+
+    async def run(self, app: ASGIApp, scope: Scope, receive: Receive) -> None:
+        await app(scope, receive, self.on_message)
+
+    async def on_message(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.passthrough = not self._compressible(Headers(raw=message["headers"]))
+            if self.passthrough:
+                if message["status"] == 304:
+                    # Answers for the encoded representation the client holds
+                    _weaken_etag(MutableHeaders(scope=message))
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream is not None:
+            await self._send_stream_chunk(body, more_body)
+            return
+
+        # Hold small beginnings back until the size threshold is reached or the body ends
+        self.buffered.append(body)
+        self.buffered_size += len(body)
+        if more_body and self.buffered_size < self.compressor.minimum_size:
+            return
+
+        body = b"".join(self.buffered)
+        self.buffered = []
+        if not more_body:
+            await self._send_complete(body)
+        else:
+            self.stream = self.compressor.stream(self.encoding)
+            headers = self._encoded_headers()
+            del headers["content-length"]
+            await self.send(self.start)
+            await self._send_stream_chunk(body, more_body)
+
+    def _compressible(self, headers: Headers) -> bool:
+        if self.start["status"] < 200 or self.start["status"] in (204, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        length = headers.get("content-length")
+        return length is None or int(length) >= self.compressor.minimum_size
+
+    async def _send_complete(self, body: bytes) -> None:
+        if len(body) < self.compressor.minimum_size:
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body})
+            return
+        etag = Headers(raw=self.start["headers"]).get("etag")
+        compressed = await self.compressor.compress_body(body, self.encoding, etag)
+        headers = self._encoded_headers()
+        headers["content-length"] = str(len(compressed))
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    async def _send_stream_chunk(self, body: bytes, more_body: bool) -> None:
+        output = self.stream.compress(body) if body else b""
+        if not more_body:
+            output += self.stream.finish()
+        if output or not more_body:
+            await self.send({"type": "http.response.body", "body": output, "more_body": more_body})
+
+    def _encoded_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(scope=self.start)
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        _weaken_etag(headers)
+        return headers
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    """Mark the ETag weak: a strong tag promises identical bytes, and each encoding has its own.
+
+    etag_matches compares weakly, so If-None-Match still matches the tag.
+    """
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["etag"] = "W/" + etag
+
+
+# Global service instance
+response_compressor = ResponseCompressor(
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    cache_max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES
+)
@@ -19,15 +19,97 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "dev-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CLAIMS_CACHE_TTL_SECONDS: int = 3600  # Also capped by each token's exp
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60  # How long other workers may serve a stale user
     
     # External services
     GOOGLE_CLIENT_ID: Optional[str] = None
     SPOTIFY_CLIENT_ID: Optional[str] = None
     SPOTIFY_CLIENT_SECRET: Optional[str] = None
     OPENAI_API_KEY: Optional[str] = None
+    REDIS_URL: Optional[str] = None  # Shared cache across workers when set
+    SPOTIFY_API_TIMEOUT_SECONDS: float = 5.0
+    SPOTIFY_HTTP_MAX_CONNECTIONS: int = 20
+    SPOTIFY_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    SPOTIFY_MAX_RETRIES: int = 2  # On 429 with a short Retry-After
+    SPOTIFY_MAX_RETRY_AFTER_SECONDS: float = 5.0  # Longer waits fail fast instead
+    SPOTIFY_PLAYBACK_CACHE_TTL_SECONDS: float = 3.0  # Progress is extrapolated in between
+    SPOTIFY_PLAYBACK_CACHE_MAX_ENTRIES: int = 10000
+    SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS: int = 300  # Refresh this long before expiry
+    SPOTIFY_TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    SPOTIFY_METADATA_CACHE_MAX_ENTRIES: int = 5000  # Episodes held in memory in front of the database
+    SPOTIFY_METADATA_CACHE_TTL_SECONDS: int = 3600
+    SPOTIFY_METADATA_MAX_AGE_DAYS: int = 30  # Stored rows older than this are refetched when a token is at hand
     
     # Database (future)
     DATABASE_URL: str = "sqlite:///./poma.db"  # Simple default
+    DB_POOL_SIZE: int = 5  # Per worker process, for both sync and async engines
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Below typical server/proxy idle timeouts
+    DB_POOL_PRE_PING: bool = True
+    
+    # Response compression (brotli when the package is installed, gzip otherwise)
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Smaller bodies are sent as they are
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 4-5 beats gzip -6 on size at similar CPU; 11 is for static assets
+    COMPRESSION_CACHE_MAX_BYTES: int = 16 * 1024 * 1024  # Compressed bodies of responses with an ETag
+    
+    # Idempotency-Key handling for bookmark creation
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_CACHE_TTL_SECONDS: int = 300
+    IDEMPOTENCY_CACHE_MAX_ENTRIES: int = 10000
+    BOOKMARK_BATCH_MAX_ITEMS: int = 500  # Per POST /bookmarks/batch
+    
+    # Voice bookmark processing
+    UPLOAD_DIR: str = "uploads/audio"
+    AUDIO_UPLOAD_MAX_BYTES: int = 25 * 1024 * 1024  # Whisper API file limit
+    AUDIO_UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    TRANSCRIPTION_WORKERS: int = 2
+    TRANSCRIPTION_QUEUE_MAX_SIZE: int = 100  # Uploads beyond this get 503
+    TRANSCRIPTION_STALE_SECONDS: int = 900  # A job processing longer than this is taken as interrupted
+    TRANSCRIPTION_ENGINE: str = "openai"  # "openai" or "local" (needs faster-whisper)
+    LOCAL_WHISPER_MODEL: str = "base"
+    LOCAL_WHISPER_COMPUTE_TYPE: str = "int8"
+    TRANSCRIPTION_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    TRANSCRIPTION_CACHE_TTL_SECONDS: int = 30 * 24 * 3600  # Redis only
+    FFMPEG_MAX_PROCESSES: int = 2
+    FFMPEG_TIMEOUT_SECONDS: int = 30
+    
+    # Transcript context around bookmarks, from episode audio
+    EPISODE_AUDIO_DIR: str = ""  # Episode files named <episode id>.<ext>
+    EPISODE_AUDIO_URL_TEMPLATE: str = ""  # e.g. https://media.example.com/{episode_id}.mp3, Spotify ids only
+    EPISODE_AUDIO_CACHE_DIR: str = "cache/episodes"
+    EPISODE_AUDIO_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    EPISODE_AUDIO_MAX_BYTES: int = 500 * 1024 * 1024
+    CONTEXT_WINDOW_SECONDS: int = 30  # Before and after the bookmark
+    CONTEXT_CHUNK_SECONDS: int = 30  # Episodes are transcribed in chunks of this grid
+    CONTEXT_WORKERS: int = 1
+    CONTEXT_QUEUE_MAX_SIZE: int = 200
+    
+    # AI summaries of bookmarks
+    SUMMARY_BACKEND: str = "openai"  # "openai" or "stub" (deterministic, offline)
+    SUMMARY_MODEL: str = "gpt-4o-mini"
+    SUMMARY_BATCH_WINDOW_MS: int = 2000  # Bookmarks submitted within this window are batched
+    SUMMARY_BATCH_TOKEN_BUDGET: int = 6000  # Input tokens per request
+    SUMMARY_MAX_BOOKMARKS_PER_REQUEST: int = 20
+    SUMMARY_MAX_TOKENS_PER_SUMMARY: int = 80
+    SUMMARY_CONCURRENCY: int = 2
+    SUMMARY_REQUESTS_PER_MINUTE: int = 60
+    SUMMARY_TOKENS_PER_MINUTE: int = 150000
+    SUMMARY_CACHE_MAX_ENTRIES: int = 10000
+    SUMMARY_INPUT_PRICE_PER_1K_TOKENS: float = 0.00015  # For the cost estimate in /debug/metrics
+    SUMMARY_OUTPUT_PRICE_PER_1K_TOKENS: float = 0.0006
+    
+    # Weekly review reports
+    REPORTS_TOP_PODCASTS: int = 5
+    REPORTS_HIGHLIGHTS: int = 5  # Summarized bookmarks shown per report
+    REPORTS_PRERENDER_INTERVAL_SECONDS: int = 3600  # 0 disables pre-rendering last week's reports
+    
+    # Bulk export
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched from the cursor at a time
+    EXPORT_CHUNK_BYTES: int = 64 * 1024
     
     class Config:
         env_file = ".env"
@@ -1,18 +1,71 @@
 """Database configuration for Poma API.
 
 SQLAlchemy setup with SQLite for development, PostgreSQL for production.
+Request handlers use the async engine (asyncpg / aiosqlite) so queries do
+not block the event loop; scripts and the remaining sync endpoints use
+the sync engine.
 """
+from typing import Any, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """Pool settings for an engine; SQLite keeps SQLAlchemy's defaults."""
+    if make_url(database_url).get_backend_name() == "sqlite":
+        # Sessions are created in the threadpool and used on other threads
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def async_database_url(database_url: str) -> str:
+    """The same database addressed through an async driver."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    url = url.set(drivername=_ASYNC_DRIVERS[backend])
+    if "sslmode" in url.query:
+        # libpq spelling (Render, Heroku URLs); asyncpg calls it ssl
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return str(url)
+
+
 # Create engine - PostgreSQL configuration
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    **engine_options(settings.DATABASE_URL)
+)
+
+# Objects stay readable after commit; lazy loads are not possible on AsyncSession
+AsyncSessionLocal = sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -22,4 +75,20 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Async database dependency for FastAPI."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def dialect_name(db) -> str:
+    """Name of the SQL dialect behind a session, e.g. "postgresql" or "sqlite"."""
+    return db.bind.dialect.name
+
+
+def side_session(db: AsyncSession) -> AsyncSession:
+    """A new session on the engine of `db`, for writes that must not commit or roll back its work."""
+    return AsyncSession(db.bind, autoflush=False, expire_on_commit=False)
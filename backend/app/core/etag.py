@@ -0,0 +1,41 @@
+"""Entity tags and conditional GET helpers.
+
+Tags are built from change sequence numbers rather than from response
+bodies, so whether a client's copy is current can be decided before any
+row is loaded or serialized.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+
+def make_etag(*parts) -> str:
+    """A strong entity tag from version parts, e.g. make_etag("b", 42, 1017)."""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def query_digest(query_string: str) -> str:
+    """Short, order-independent digest of a query string, for per-representation tags."""
+    normalized = "&".join(sorted(part for part in query_string.split("&") if part))
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
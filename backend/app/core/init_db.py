@@ -3,12 +3,19 @@
 Creates all tables defined in models.
 """
 from app.core.database import engine
-from app.models import Base
+from app.models import Base, ensure_bookmark_columns, ensure_bookmark_indexes, ensure_search_index
 
 
 def create_tables():
     """Create all database tables."""
+    # Before create_all: new tables backfill from bookmarks and read the new columns
+    with engine.begin() as connection:
+        ensure_bookmark_columns(connection)
     Base.metadata.create_all(bind=engine)
+    # Tables that already existed do not fire after_create
+    with engine.begin() as connection:
+        ensure_bookmark_indexes(connection)
+        ensure_search_index(connection)
     print("Database tables created successfully!")
 
 
@@ -0,0 +1,59 @@
+"""Keyset (cursor) pagination helpers.
+
+Cursors are opaque to clients: a URL-safe base64 encoding of the sort key
+of the last row on a page. The next page starts strictly after that key, so
+deep pages cost the same as the first one and rows never shift between pages.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Sequence
+
+from sqlalchemy import DateTime, String, tuple_, type_coerce
+
+_DATETIME_TAG = "$dt"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor token cannot be decoded."""
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode a row's sort key as an opaque cursor token."""
+    payload = [{_DATETIME_TAG: v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """Decode a cursor token produced by `encode_cursor` with `size` values."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != size:
+            raise ValueError("wrong cursor size")
+        return [
+            datetime.fromisoformat(v[_DATETIME_TAG]) if isinstance(v, dict) else v
+            for v in payload
+        ]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def cursor_column(dialect_name: str, column):
+    """The column as the database compares it, for building cursors.
+
+    SQLite stores timestamps as text and compares them as text; a value read
+    back as a datetime may not format to the same text (CURRENT_TIMESTAMP
+    omits the fraction), so cursors carry the stored text there.
+    """
+    if dialect_name == "sqlite" and isinstance(column.type, DateTime):
+        return type_coerce(column, String)
+    return column
+
+
+def keyset_after(dialect_name: str, columns: Sequence, values: Sequence, descending: bool = True):
+    """WHERE clause selecting rows that sort after `values` on `columns`."""
+    left = tuple_(*[cursor_column(dialect_name, column) for column in columns])
+    right = tuple_(*values)
+    return left < right if descending else left > right
@@ -5,9 +5,30 @@ Simple is better than complex.
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.api_v1.api import api_router
+from app.core.auth import principal_cache
+from app.core.compression import CompressionMiddleware, response_compressor
 from app.core.config import settings
+from app.core.database import async_engine
+from app.services.bookmark_batch import bookmark_batch_service
+from app.services.bookmark_export import bookmark_export
+from app.services.bookmark_sync import bookmark_sync_service
+from app.services.context_capture import context_capture, context_pool
+from app.services.episode_audio import episode_audio
+from app.services.episode_metadata import episode_metadata
+from app.services.idempotency import idempotency_service
+from app.services.openai_service import openai_service
+from app.services.playback_cache import playback_cache
+from app.services.search_service import search_service
+from app.services.spotify_client import spotify_client
+from app.services.summarization import summarizer
+from app.services.spotify_tokens import spotify_tokens
+from app.services.transcoder import transcoder
+from app.services.transcription_cache import transcription_cache
+from app.services.transcription_service import recover_transcriptions, transcription_pool
+from app.services.weekly_reports import weekly_reports
 
 
 def create_app() -> FastAPI:
@@ -16,15 +37,23 @@ def create_app() -> FastAPI:
         title="Poma API",
         description="Simple podcast bookmarking service",
         version="1.0.0",
-        debug=settings.DEBUG
+        debug=settings.DEBUG,
+        default_response_class=ORJSONResponse
     )
     
+    _configure_compression(app)
     _configure_cors(app)
     _configure_routes(app)
+    _configure_events(app)
     
     return app
 
 
+def _configure_compression(app: FastAPI) -> None:
+    """Compress JSON and text responses for clients that accept br or gzip."""
+    app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+
+
 def _configure_cors(app: FastAPI) -> None:
     """Configure CORS middleware for development."""
     app.add_middleware(
@@ -33,9 +62,33 @@ def _configure_cors(app: FastAPI) -> None:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],
     )
 
 
+def _configure_events(app: FastAPI) -> None:
+    """Start and stop background workers with the application."""
+    
+    @app.on_event("startup")
+    async def start_workers():
+        transcription_pool.start()
+        await recover_transcriptions()
+        context_pool.start()
+        summarizer.start()
+        summarizer.start_recovery()
+        weekly_reports.start()
+    
+    @app.on_event("shutdown")
+    async def stop_workers():
+        await transcription_pool.stop()
+        await context_pool.stop()
+        await summarizer.stop()
+        await weekly_reports.stop()
+        await episode_audio.close()
+        await spotify_client.close()
+        await async_engine.dispose()
+
+
 def _configure_routes(app: FastAPI) -> None:
     """Configure all application routes."""
     app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -48,6 +101,31 @@ def _configure_routes(app: FastAPI) -> None:
     async def health():
         return {"status": "ok"}
     
+    @app.get("/debug/metrics")
+    async def debug_metrics():
+        """Debug endpoint to inspect background worker state."""
+        return {
+            "auth": principal_cache.stats(),
+            "compression": response_compressor.stats(),
+            "transcription_queue": transcription_pool.stats(),
+            "transcoder": transcoder.stats(),
+            "transcription_engine": openai_service.engine.stats(),
+            "transcription_cache": transcription_cache.stats(),
+            "context_capture": context_capture.stats(),
+            "summarization": summarizer.stats(),
+            "weekly_reports": weekly_reports.stats(),
+            "idempotency": idempotency_service.stats(),
+            "bookmark_batch": bookmark_batch_service.stats(),
+            "bookmark_export": bookmark_export.stats(),
+            "bookmark_sync": bookmark_sync_service.stats(),
+            "search": search_service.stats(),
+            "spotify": spotify_client.stats(),
+            "spotify_tokens": spotify_tokens.stats(),
+            "spotify_playback_cache": playback_cache.stats(),
+            "episode_metadata": episode_metadata.stats(),
+            "database_pool": async_engine.sync_engine.pool.status()
+        }
+    
     @app.get("/debug/config")
     async def debug_config():
         """Debug endpoint to check configuration."""
@@ -65,7 +143,7 @@ def _configure_routes(app: FastAPI) -> None:
         from sqlalchemy import create_engine, text
         from app.core.database import Base
         from app.models.user import User
-        from app.models.bookmark import Bookmark
+        from app.models.bookmark import Bookmark, ensure_bookmark_columns, ensure_bookmark_indexes
         import os
         
         try:
@@ -80,8 +158,12 @@ def _configure_routes(app: FastAPI) -> None:
                 result = conn.execute(text("SELECT version()"))
                 db_version = result.fetchone()[0]
             
-            # Create all tables
+            # Create all tables, adding columns that older bookmarks tables lack
+            with engine.begin() as conn:
+                ensure_bookmark_columns(conn)
             Base.metadata.create_all(bind=engine)
+            with engine.begin() as conn:
+                ensure_bookmark_indexes(conn)
             
             # Verify tables were created
             with engine.connect() as conn:
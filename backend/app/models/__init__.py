@@ -6,6 +6,12 @@ from app.core.database import Base
 
 # Import all models to ensure they are registered with SQLAlchemy
 from .user import User
-from .bookmark import Bookmark
+from .bookmark import Bookmark, ensure_bookmark_columns, ensure_bookmark_indexes
+from .bookmark_change import BookmarkChange
+from .idempotency_key import IdempotencyKey
+from .podcast import PodcastShow, PodcastEpisode
+from .episode_transcript import EpisodeTranscriptSegment, EpisodeTranscriptChunk
+from .weekly_report import WeeklyStats, WeeklyPodcastStats, WeeklyReport
+from .bookmark_search import ensure_search_index
 
-__all__ = ["Base", "User", "Bookmark"]
\ No newline at end of file
+__all__ = ["Base", "User", "Bookmark", "BookmarkChange", "IdempotencyKey", "PodcastShow", "PodcastEpisode", "EpisodeTranscriptSegment", "EpisodeTranscriptChunk", "WeeklyStats", "WeeklyPodcastStats", "WeeklyReport", "ensure_bookmark_columns", "ensure_bookmark_indexes", "ensure_search_index"]
\ No newline at end of file
@@ -1,11 +1,27 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, BigInteger, Index, inspect, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
 
+# Transcription states for voice bookmarks
+TRANSCRIPTION_PENDING = "pending"
+TRANSCRIPTION_PROCESSING = "processing"
+TRANSCRIPTION_COMPLETED = "completed"
+TRANSCRIPTION_FAILED = "failed"
+
 class Bookmark(Base):
     __tablename__ = "bookmarks"
+    __table_args__ = (
+        # 书签列表按 (created_at, id) 倒序做 keyset 分页
+        Index("ix_bookmarks_user_created_id", "user_id", "created_at", "id"),
+        # 周报精选只取有 AI 总结的书签, 部分索引让 LIMIT 直接生效
+        Index(
+            "ix_bookmarks_user_summarized", "user_id", "created_at", "id",
+            postgresql_where=text("ai_summary IS NOT NULL"),
+            sqlite_where=text("ai_summary IS NOT NULL")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -28,6 +44,9 @@ class Bookmark(Base):
     # 笔记内容
     audio_file_path = Column(String, nullable=True)  # 语音文件路径
     transcript_text = Column(Text, nullable=True)    # 转录文本
+    transcription_status = Column(String, nullable=True)  # 后台转录状态, 无语音时为空
+    transcription_error = Column(String, nullable=True)
+    transcription_started_at = Column(DateTime(timezone=True), nullable=True)  # 转录开始时间, 判断任务是否已中断
     user_note = Column(Text, nullable=True)          # 用户手动笔记
     
     # AI 增强内容
@@ -40,4 +59,35 @@ class Bookmark(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # 关系
-    user = relationship("User", back_populates="bookmarks")
\ No newline at end of file
+    user = relationship("User", back_populates="bookmarks")
+
+
+# Columns added after the first release; create_all never alters existing tables
+ADDED_COLUMNS = {
+    "transcription_status": "VARCHAR",
+    "transcription_error": "VARCHAR",
+    "transcription_started_at": "TIMESTAMP WITH TIME ZONE",
+}
+
+
+def ensure_bookmark_columns(connection) -> None:
+    """Add columns missing from a bookmarks table created by an older release."""
+    inspector = inspect(connection)
+    if not inspector.has_table(Bookmark.__tablename__):
+        return
+    existing = {column["name"] for column in inspector.get_columns(Bookmark.__tablename__)}
+    for name, sql_type in ADDED_COLUMNS.items():
+        if name not in existing:
+            connection.execute(text(f"ALTER TABLE {Bookmark.__tablename__} ADD COLUMN {name} {sql_type}"))
+
+
+def ensure_bookmark_indexes(connection) -> None:
+    """Create the keyset pagination and report highlight indexes on a bookmarks table that predates them."""
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_bookmarks_user_created_id "
+        f"ON {Bookmark.__tablename__} (user_id, created_at, id)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_bookmarks_user_summarized "
+        f"ON {Bookmark.__tablename__} (user_id, created_at, id) WHERE ai_summary IS NOT NULL"
+    ))
@@ -0,0 +1,87 @@
+"""Per-user change log of bookmarks, for incremental sync.
+
+Every flush that inserts, updates or deletes bookmarks appends one row per
+bookmark to `bookmark_changes` in the same transaction. The row id is a
+monotonically increasing sequence number; a client that remembers the
+highest one it has seen only needs the rows after it. Deleted bookmarks
+leave their change rows behind as tombstones.
+
+Bulk Core statements bypass the ORM, so code that writes bookmarks with
+`insert()`/`update()` adds its change rows with `record_changes`.
+"""
+from sqlalchemy import (
+    BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, event, insert, inspect, literal, select, text
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.database import Base, dialect_name
+from app.models.bookmark import Bookmark
+
+CHANGE_UPSERT = "upsert"
+CHANGE_DELETE = "delete"
+
+class BookmarkChange(Base):
+    __tablename__ = "bookmark_changes"
+    __table_args__ = (
+        # 增量同步按 (user_id, id) 顺序读取某个序号之后的变更
+        Index("ix_bookmark_changes_user_id_id", "user_id", "id"),
+        # 单个书签的版本号 (ETag) 取其最新变更序号
+        Index("ix_bookmark_changes_bookmark_id_id", "bookmark_id", "id"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)  # 变更序号, 单调递增
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    bookmark_id = Column(Integer, nullable=False)  # 不设外键: 书签删除后墓碑仍保留
+    op = Column(String(10), nullable=False)        # upsert 或 delete
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Sequence numbers are taken at insert time but become visible at commit. On
+# PostgreSQL a per-user lock held until commit makes one user's changes commit
+# in sequence order, so a reader never skips a number that is still in flight.
+_LOCK_NAMESPACE = 0x504F4D41
+_LOCK_SQL = text("SELECT pg_advisory_xact_lock(:namespace, :user_id)")
+
+
+async def record_changes(db, where, op: str = CHANGE_UPSERT) -> None:
+    """Log `op` for the bookmarks matching `where`; for Core statements the ORM does not see."""
+    if dialect_name(db) == "postgresql":
+        user_ids = (await db.execute(select(Bookmark.user_id).where(where).distinct())).scalars().all()
+        for user_id in sorted(user_ids):
+            await db.execute(_LOCK_SQL, {"namespace": _LOCK_NAMESPACE, "user_id": user_id})
+    await db.execute(insert(BookmarkChange).from_select(
+        ["user_id", "bookmark_id", "op"],
+        select(Bookmark.user_id, Bookmark.id, literal(op)).where(where)
+    ))
+
+
+@event.listens_for(Session, "after_flush")
+def _log_bookmark_changes(session, flush_context):
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, Bookmark):
+            rows.append({"user_id": obj.user_id, "bookmark_id": obj.id, "op": CHANGE_UPSERT})
+    for obj in session.dirty:
+        if isinstance(obj, Bookmark) and session.is_modified(obj, include_collections=False):
+            rows.append({"user_id": obj.user_id, "bookmark_id": obj.id, "op": CHANGE_UPSERT})
+    for obj in session.deleted:
+        if isinstance(obj, Bookmark):
+            rows.append({"user_id": obj.user_id, "bookmark_id": obj.id, "op": CHANGE_DELETE})
+    if not rows:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        for user_id in sorted({row["user_id"] for row in rows}):
+            connection.execute(_LOCK_SQL, {"namespace": _LOCK_NAMESPACE, "user_id": user_id})
+    connection.execute(insert(BookmarkChange.__table__).values(rows))
+
+
+@event.listens_for(BookmarkChange.__table__, "after_create")
+def _backfill_changes(target, connection, **kw):
+    # Databases that had bookmarks before the change log start with one entry per bookmark
+    if inspect(connection).has_table(Bookmark.__tablename__):
+        connection.execute(text(
+            f"INSERT INTO {target.name} (user_id, bookmark_id, op) "
+            f"SELECT user_id, id, '{CHANGE_UPSERT}' FROM {Bookmark.__tablename__} ORDER BY id"
+        ))
@@ -0,0 +1,88 @@
+"""Full-text index over bookmark text.
+
+PostgreSQL gets a GIN index on a weighted tsvector expression; SQLite gets
+an FTS5 external-content table kept in sync by triggers. Both are created
+together with the bookmarks table, and `ensure_search_index` adds them to
+databases created before search existed.
+"""
+from sqlalchemy import event, text
+
+from app.models.bookmark import Bookmark
+
+SEARCH_CONFIG = "english"
+
+# Searched columns, most important first. Weights: A titles, B notes, C transcript.
+SEARCH_WEIGHTS = {
+    "podcast_name": "A",
+    "episode_name": "A",
+    "user_note": "B",
+    "ai_summary": "B",
+    "transcript_text": "C",
+}
+
+# The query must repeat this expression verbatim for PostgreSQL to use the index
+SEARCH_DOCUMENT_SQL = " || ".join(
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({name}, '')), '{weight}')"
+    for name, weight in SEARCH_WEIGHTS.items()
+)
+
+# Text that highlighted snippets are cut from
+SNIPPET_SOURCE_SQL = "concat_ws(' … ', transcript_text, user_note, ai_summary)"
+
+POSTGRES_INDEX_NAME = "ix_bookmarks_search"
+SQLITE_FTS_TABLE = "bookmarks_fts"
+
+_SQLITE_COLUMNS = ", ".join(SEARCH_WEIGHTS)
+_SQLITE_NEW_VALUES = ", ".join(f"new.{name}" for name in SEARCH_WEIGHTS)
+_SQLITE_OLD_VALUES = ", ".join(f"old.{name}" for name in SEARCH_WEIGHTS)
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        {_SQLITE_COLUMNS},
+        content='bookmarks', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS bookmarks_fts_insert AFTER INSERT ON bookmarks BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, {_SQLITE_COLUMNS}) VALUES (new.id, {_SQLITE_NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS bookmarks_fts_delete AFTER DELETE ON bookmarks BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {_SQLITE_COLUMNS})
+        VALUES ('delete', old.id, {_SQLITE_OLD_VALUES});
+    END""",
+    # Only text changes touch the index; status and path updates are free
+    f"""CREATE TRIGGER IF NOT EXISTS bookmarks_fts_update AFTER UPDATE OF {_SQLITE_COLUMNS} ON bookmarks BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {_SQLITE_COLUMNS})
+        VALUES ('delete', old.id, {_SQLITE_OLD_VALUES});
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, {_SQLITE_COLUMNS}) VALUES (new.id, {_SQLITE_NEW_VALUES});
+    END""",
+]
+
+
+def ensure_search_index(connection) -> None:
+    """Create the full-text index for the connection's dialect if it is missing."""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX_NAME} "
+            f"ON bookmarks USING gin (({SEARCH_DOCUMENT_SQL}))"
+        ))
+    elif dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": SQLITE_FTS_TABLE}
+        ).first()
+        for statement in _SQLITE_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            # Index rows written before the FTS table existed
+            connection.execute(text(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')"))
+
+
+@event.listens_for(Bookmark.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    ensure_search_index(connection)
+
+
+@event.listens_for(Bookmark.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}"))
@@ -0,0 +1,34 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class EpisodeTranscriptSegment(Base):
+    """A timed stretch of an episode's transcript, shared by every user's bookmarks.
+
+    No segment is longer than the chunk it was transcribed from, so the
+    segments overlapping [lo, hi) all start in (lo - longest chunk, hi): one
+    short range scan of the (episode_key, model, start_ms) index.
+    """
+    __tablename__ = "episode_transcript_segments"
+    __table_args__ = (
+        Index("ix_episode_transcript_segments_key_start", "episode_key", "model", "start_ms"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    episode_key = Column(String(255), nullable=False)  # Spotify episode id, 否则 "应用包名:media_id"
+    model = Column(String(64), nullable=False)         # 转录模型, 不同模型的结果不混用
+    start_ms = Column(BigInteger, nullable=False)      # 距节目开头的毫秒数
+    end_ms = Column(BigInteger, nullable=False)
+    text = Column(Text, nullable=False)
+
+class EpisodeTranscriptChunk(Base):
+    """Which fixed-length chunks of an episode have been transcribed (silent ones included)."""
+    __tablename__ = "episode_transcript_chunks"
+
+    episode_key = Column(String(255), primary_key=True)
+    model = Column(String(64), primary_key=True)
+    start_ms = Column(BigInteger, primary_key=True)
+    end_ms = Column(BigInteger, nullable=False)
+    segment_count = Column(Integer, nullable=False)
+    transcribed_at = Column(DateTime(timezone=True), server_default=func.now())
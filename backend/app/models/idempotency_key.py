@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class IdempotencyKey(Base):
+    """Client-supplied Idempotency-Key and the bookmark it created."""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # 多个 worker 并发重放同一个 key 时由唯一索引保证只创建一次
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # 请求内容指纹, 防止同一 key 用于不同请求
+    bookmark_id = Column(Integer, nullable=True)       # 书签删除后保留记录
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
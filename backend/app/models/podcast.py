@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, BigInteger, JSON
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class PodcastShow(Base):
+    """Spotify show metadata shared by every user's bookmarks."""
+    __tablename__ = "podcast_shows"
+    
+    id = Column(String, primary_key=True)  # Spotify show id
+    name = Column(String, nullable=False)
+    publisher = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    images = Column(JSON, nullable=True)   # Spotify images 列表, 最大的在前
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now())  # 上次从 Spotify 拉取的时间
+
+class PodcastEpisode(Base):
+    """Spotify episode metadata, filled in batches from the /episodes endpoint."""
+    __tablename__ = "podcast_episodes"
+    
+    id = Column(String, primary_key=True)  # Spotify episode id
+    show_id = Column(String, ForeignKey("podcast_shows.id"), nullable=True, index=True)
+    name = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    duration_ms = Column(BigInteger, nullable=True)
+    release_date = Column(String, nullable=True)  # Spotify 的精度不固定: 年/月/日
+    uri = Column(String, nullable=True)
+    external_urls = Column(JSON, nullable=True)
+    images = Column(JSON, nullable=True)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,261 @@
+"""Per-user weekly bookmark aggregates and pre-rendered weekly reports.
+
+Every flush that inserts, deletes or moves bookmarks adjusts the counters
+of the (user, week) and (user, week, podcast) rows they fall in, in the
+same transaction (before the flush, while the old rows can still be read), so a weekly report reads a handful of rows instead of
+scanning the user's bookmarks. Weeks start on Monday (UTC) and a bookmark
+belongs to the week it was created in.
+
+Bulk Core inserts bypass the ORM, so code that inserts bookmarks with
+`insert()` adds them with `record_weekly_stats`.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import (
+    BigInteger, Column, Date, DateTime, ForeignKey, Integer, JSON, String, event, inspect, select
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.core.database import Base, dialect_name
+from app.models.bookmark import Bookmark
+
+POSITION_EARLY = "early"
+POSITION_MIDDLE = "middle"
+POSITION_LATE = "late"
+
+
+class WeeklyStats(Base):
+    """One user's bookmark counters for one week."""
+    __tablename__ = "weekly_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    week_start = Column(Date, primary_key=True)          # 周一 (UTC)
+    bookmark_count = Column(Integer, nullable=False, default=0)
+    voice_count = Column(Integer, nullable=False, default=0)   # 带语音笔记的书签
+    noted_count = Column(Integer, nullable=False, default=0)   # 带文字笔记的书签
+    position_total_ms = Column(BigInteger, nullable=False, default=0)  # timestamp_ms 之和, 用于平均收听位置
+    early_count = Column(Integer, nullable=False, default=0)   # 位于节目前三分之一
+    middle_count = Column(Integer, nullable=False, default=0)
+    late_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class WeeklyPodcastStats(Base):
+    """One user's bookmark counters for one podcast in one week, for the top shows."""
+    __tablename__ = "weekly_podcast_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    podcast_name = Column(String, primary_key=True)
+    bookmark_count = Column(Integer, nullable=False, default=0)
+    position_total_ms = Column(BigInteger, nullable=False, default=0)
+    cover_url = Column(String, nullable=True)  # 最近一个书签的封面
+
+
+class WeeklyReport(Base):
+    """A rendered weekly report, valid while the user's change sequence is `version`."""
+    __tablename__ = "weekly_reports"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    version = Column(BigInteger, nullable=False)  # 渲染时用户的最新变更序号
+    payload = Column(JSON, nullable=False)
+    rendered_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class _Counted(NamedTuple):
+    """The fields of a bookmark the aggregates depend on."""
+    user_id: int
+    podcast_name: str
+    timestamp_ms: int
+    duration_ms: Optional[int]
+    created_at: Optional[datetime]
+    has_voice: bool
+    has_note: bool
+    cover_url: Optional[str]
+
+
+_COUNTED_ATTRIBUTES = (
+    "user_id", "podcast_name", "timestamp_ms", "duration_ms", "created_at",
+    "transcription_status", "user_note", "podcast_cover_url",
+)
+
+
+def week_start(moment: Optional[datetime]) -> date:
+    """The Monday (UTC) of the week `moment` falls in; now when unknown."""
+    if moment is None:
+        moment = datetime.now(timezone.utc)
+    elif moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    day = moment.date()
+    return day - timedelta(days=day.weekday())
+
+
+def position_bucket(timestamp_ms: int, duration_ms: Optional[int]) -> Optional[str]:
+    """Which third of the episode a bookmark is in, if the duration is known."""
+    if not duration_ms or duration_ms <= 0:
+        return None
+    fraction = timestamp_ms / duration_ms
+    if fraction < 1 / 3:
+        return POSITION_EARLY
+    if fraction < 2 / 3:
+        return POSITION_MIDDLE
+    return POSITION_LATE
+
+
+def _counted(user_id, podcast_name, timestamp_ms, duration_ms, created_at, transcription_status,
+             user_note, podcast_cover_url) -> _Counted:
+    return _Counted(
+        user_id, podcast_name, timestamp_ms or 0, duration_ms, created_at,
+        transcription_status is not None, bool(user_note), podcast_cover_url
+    )
+
+
+def _deltas(changes: Iterable[Any]) -> List[Any]:
+    """Sum (bookmark, +1/-1) pairs into per-week and per-podcast counter deltas."""
+    weeks: Dict[Any, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    podcasts: Dict[Any, Dict[str, Any]] = defaultdict(lambda: defaultdict(int))
+    for bookmark, sign in changes:
+        week = week_start(bookmark.created_at)
+        counters = weeks[(bookmark.user_id, week)]
+        counters["bookmark_count"] += sign
+        counters["voice_count"] += sign if bookmark.has_voice else 0
+        counters["noted_count"] += sign if bookmark.has_note else 0
+        counters["position_total_ms"] += sign * bookmark.timestamp_ms
+        bucket = position_bucket(bookmark.timestamp_ms, bookmark.duration_ms)
+        if bucket is not None:
+            counters[f"{bucket}_count"] += sign
+
+        podcast = podcasts[(bookmark.user_id, week, bookmark.podcast_name)]
+        podcast["bookmark_count"] += sign
+        podcast["position_total_ms"] += sign * bookmark.timestamp_ms
+        if sign > 0 and bookmark.cover_url:
+            podcast["cover_url"] = bookmark.cover_url
+
+    week_rows = [
+        {"user_id": user_id, "week_start": week, **{name: counters.get(name, 0) for name in _WEEK_COUNTERS}}
+        for (user_id, week), counters in weeks.items()
+        if any(counters.values())
+    ]
+    podcast_rows = [
+        {
+            "user_id": user_id, "week_start": week, "podcast_name": podcast_name,
+            "bookmark_count": counters["bookmark_count"],
+            "position_total_ms": counters["position_total_ms"],
+            "cover_url": counters.get("cover_url"),
+        }
+        for (user_id, week, podcast_name), counters in podcasts.items()
+        if counters["bookmark_count"] or counters["position_total_ms"] or counters.get("cover_url")
+    ]
+    return week_rows, podcast_rows
+
+
+_WEEK_COUNTERS = (
+    "bookmark_count", "voice_count", "noted_count", "position_total_ms",
+    "early_count", "middle_count", "late_count",
+)
+
+
+def _statements(dialect: str, week_rows, podcast_rows):
+    """INSERT ... ON CONFLICT DO UPDATE adding the deltas to the stored counters."""
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statements = []
+    if week_rows:
+        table = WeeklyStats.__table__
+        statement = insert(table)
+        statements.append((statement.on_conflict_do_update(
+            index_elements=["user_id", "week_start"],
+            set_={
+                **{name: table.c[name] + statement.excluded[name] for name in _WEEK_COUNTERS},
+                "updated_at": func.now(),
+            }
+        ), week_rows))
+    if podcast_rows:
+        table = WeeklyPodcastStats.__table__
+        statement = insert(table)
+        statements.append((statement.on_conflict_do_update(
+            index_elements=["user_id", "week_start", "podcast_name"],
+            set_={
+                "bookmark_count": table.c.bookmark_count + statement.excluded.bookmark_count,
+                "position_total_ms": table.c.position_total_ms + statement.excluded.position_total_ms,
+                "cover_url": func.coalesce(statement.excluded.cover_url, table.c.cover_url),
+            }
+        ), podcast_rows))
+    return statements
+
+
+async def record_weekly_stats(db, where) -> None:
+    """Count the bookmarks matching `where` as inserted; for Core statements the ORM does not see."""
+    rows = (await db.execute(select(*[getattr(Bookmark, name) for name in _COUNTED_ATTRIBUTES]).where(where))).all()
+    week_rows, podcast_rows = _deltas((_counted(*row), 1) for row in rows)
+    for statement, params in _statements(dialect_name(db), week_rows, podcast_rows):
+        await db.execute(statement, params)
+
+
+def _inserted(obj: Bookmark) -> _Counted:
+    # created_at is a server default and not loaded yet; it is about now
+    values = inspect(obj).dict
+    return _counted(*[values.get(name) for name in _COUNTED_ATTRIBUTES])
+
+
+@event.listens_for(Session, "before_flush")
+def _count_bookmarks(session, flush_context, instances):
+    # Runs before the flush so the stored rows of changed and deleted bookmarks
+    # can still be read; attributes may be expired or set without their old value.
+    inserted = [obj for obj in session.new if isinstance(obj, Bookmark)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Bookmark)]
+    changed = [
+        obj for obj in session.dirty
+        if isinstance(obj, Bookmark) and obj not in session.deleted and any(
+            inspect(obj).attrs[name].history.added for name in _COUNTED_ATTRIBUTES
+        )
+    ]
+    if not (inserted or deleted or changed):
+        return
+
+    connection = session.connection()
+    stored: Dict[int, Any] = {}
+    ids = [inspect(obj).identity[0] for obj in deleted + changed]
+    if ids:
+        columns = [Bookmark.__table__.c[name] for name in _COUNTED_ATTRIBUTES]
+        stored = {
+            row[0]: row[1:]
+            for row in connection.execute(select(Bookmark.__table__.c.id, *columns).where(Bookmark.__table__.c.id.in_(ids)))
+        }
+
+    changes = [(_inserted(obj), 1) for obj in inserted]
+    for obj in deleted:
+        row = stored.get(inspect(obj).identity[0])
+        if row is not None:
+            changes.append((_counted(*row), -1))
+    for obj in changed:
+        row = stored.get(inspect(obj).identity[0])
+        if row is None:
+            continue
+        values = inspect(obj).dict
+        previous = _counted(*row)
+        current = _counted(*[
+            values.get(name, stored_value) for name, stored_value in zip(_COUNTED_ATTRIBUTES, row)
+        ])
+        if previous != current:  # e.g. transcription moving from pending to completed
+            changes.extend(((previous, -1), (current, 1)))
+
+    for statement, params in _statements(connection.dialect.name, *_deltas(changes)):
+        connection.execute(statement, params)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _backfill_weekly_stats(target, connection, tables=(), **kw):
+    # Databases that had bookmarks before the aggregates start with their counts.
+    # Runs once all tables exist, and only when the aggregate tables were just created.
+    if WeeklyStats.__table__ not in tables:
+        return
+    columns = [Bookmark.__table__.c[name] for name in _COUNTED_ATTRIBUTES]
+    rows = connection.execution_options(stream_results=True).execute(select(*columns))
+    deltas = _deltas((_counted(*row), 1) for row in rows)
+    for statement, params in _statements(connection.dialect.name, *deltas):
+        connection.execute(statement, params)
@@ -0,0 +1,211 @@
+"""Streaming audio uploads.
+
+Uploads are copied to disk in fixed-size chunks and hashed on the way, so a
+burst of concurrent uploads never holds whole files in memory.
+"""
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.types import Message, Receive
+
+from app.core.config import settings
+
+# Room for multipart boundaries and form fields around the audio part
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload grows past the configured maximum size."""
+
+
+@dataclass
+class StoredAudio:
+    path: str
+    size: int
+    sha256: str
+
+
+def is_audio_content_type(content_type: Optional[str]) -> bool:
+    """Whether a Content-Type header names an audio payload."""
+    return bool(content_type) and content_type.split(";")[0].strip().lower().startswith("audio/")
+
+
+def parse_content_range(header: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    """Parse `bytes start-end/total` into a (start, end, total) tuple."""
+    if not header:
+        return None
+    try:
+        unit, spec = header.strip().split(" ", 1)
+        span, total = spec.split("/", 1)
+        start, end = span.split("-", 1)
+        start, end, total = int(start), int(end), int(total)
+    except ValueError:
+        raise ValueError(f"Invalid Content-Range header: {header}")
+    if unit != "bytes" or start < 0 or end < start or end >= total:
+        raise ValueError(f"Invalid Content-Range header: {header}")
+    return start, end, total
+
+
+class AudioUploadRoute(APIRoute):
+    """Route that rejects oversized uploads before the body is read.
+
+    FastAPI parses the request body before any dependency runs, so the size
+    check has to happen here: on the declared Content-Length, and for
+    multipart forms also on the bytes actually received, since Starlette
+    spools the whole form before the endpoint sees the audio part.
+    """
+
+    def get_route_handler(self) -> Callable:
+        original_handler = super().get_route_handler()
+
+        async def upload_limit_handler(request: Request):
+            content_type = request.headers.get("content-type", "")
+            limit = _upload_limit(content_type)
+            if limit is not None:
+                _check_declared_size(request, limit)
+                # Raw audio bodies are capped by stream_to_file, which keeps resumable progress
+                if content_type.startswith("multipart/form-data"):
+                    request = Request(request.scope, _limited_receive(request.receive, limit))
+            return await original_handler(request)
+
+        return upload_limit_handler
+
+
+def _upload_limit(content_type: str) -> Optional[int]:
+    if content_type.startswith("multipart/form-data"):
+        return settings.AUDIO_UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+    if is_audio_content_type(content_type):
+        return settings.AUDIO_UPLOAD_MAX_BYTES
+    return None
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Audio upload exceeds {settings.AUDIO_UPLOAD_MAX_BYTES} bytes"
+    )
+
+
+def _check_declared_size(request: Request, limit: int) -> None:
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise _too_large()
+
+
+def _limited_receive(receive: Receive, limit: int) -> Receive:
+    """Count body bytes as they arrive and stop reading once past `limit`.
+
+    Covers chunked bodies and a Content-Length that understates the body.
+    """
+    received = 0
+
+    async def limited_receive() -> Message:
+        nonlocal received
+        message = await receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > limit:
+                raise _too_large()
+        return message
+
+    return limited_receive
+
+
+async def iter_upload_file(upload: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
+    """Read an UploadFile in fixed-size chunks."""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def stream_to_file(
+    chunks: AsyncIterator[bytes],
+    path: str,
+    max_bytes: int,
+    offset: int = 0,
+    hasher=None
+) -> int:
+    """Append chunks to `path` starting at `offset` and return the new size.
+
+    Incoming chunks are coalesced into writes of AUDIO_UPLOAD_CHUNK_BYTES.
+    Raises UploadTooLargeError as soon as the file would exceed `max_bytes`;
+    the bytes written so far are kept so a resumable upload can continue.
+    """
+    chunk_size = settings.AUDIO_UPLOAD_CHUNK_BYTES
+    size = offset
+    buffer = bytearray()
+
+    with open(path, "r+b" if offset else "wb") as f:
+        f.seek(offset)
+        f.truncate()
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                if buffer:
+                    await run_in_threadpool(f.write, bytes(buffer))
+                raise UploadTooLargeError(f"Audio upload exceeds {max_bytes} bytes")
+            if hasher is not None:
+                hasher.update(chunk)
+            buffer.extend(chunk)
+            if len(buffer) >= chunk_size:
+                await run_in_threadpool(f.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(f.write, bytes(buffer))
+
+    return size
+
+
+async def save_upload(upload: UploadFile, path: str, max_bytes: Optional[int] = None) -> StoredAudio:
+    """Stream an UploadFile to `path`, hashing it on the way."""
+    max_bytes = max_bytes or settings.AUDIO_UPLOAD_MAX_BYTES
+    hasher = hashlib.sha256()
+    try:
+        size = await stream_to_file(
+            iter_upload_file(upload, settings.AUDIO_UPLOAD_CHUNK_BYTES),
+            path,
+            max_bytes,
+            hasher=hasher
+        )
+    except BaseException:
+        _discard(path)
+        raise
+    return StoredAudio(path=path, size=size, sha256=hasher.hexdigest())
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file on disk, read in chunks."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(settings.AUDIO_UPLOAD_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def partial_upload_path(bookmark_id: int) -> str:
+    """Where the bytes of an unfinished resumable upload are kept."""
+    partial_dir = os.path.join(settings.UPLOAD_DIR, "partial")
+    os.makedirs(partial_dir, exist_ok=True)
+    return os.path.join(partial_dir, f"{bookmark_id}.part")
+
+
+def uploaded_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
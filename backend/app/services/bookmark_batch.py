@@ -0,0 +1,207 @@
+"""Bulk bookmark creation for offline sync.
+
+Bookmarks made offline are replayed in one request instead of one POST
+each. All new rows of a batch are written in a single transaction with
+multi-row INSERTs; per-item idempotency keys share the namespace of
+`POST /bookmarks/`, so a batch that is replayed (or that overlaps single
+creates that did get through) returns the existing bookmarks instead of
+inserting them again.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_name
+from app.models.bookmark import Bookmark
+from app.models.bookmark_change import record_changes
+from app.models.weekly_report import record_weekly_stats
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+EXISTING = "existing"
+CONFLICT = "conflict"
+
+# Columns a batch item may set; every row carries all of them so one
+# multi-row VALUES statement fits the whole batch
+BATCH_COLUMNS = [
+    "podcast_name",
+    "episode_name",
+    "spotify_episode_id",
+    "podcast_cover_url",
+    "timestamp_ms",
+    "duration_ms",
+    "user_note",
+]
+
+
+@dataclass
+class BatchItem:
+    """One validated bookmark of a batch."""
+    index: int
+    values: Dict[str, Any]
+    key: Optional[str]
+    fingerprint: str
+
+
+class BookmarkBatchService:
+    """Writes validated batch items in one transaction and reports per-item outcomes."""
+
+    def __init__(self, max_items: int, key_ttl_seconds: int):
+        self.max_items = max_items
+        self.key_ttl_seconds = key_ttl_seconds
+        self.batches = 0
+        self.created = 0
+        self.replayed = 0
+        self.conflicts = 0
+        self.retries = 0
+        self.total_ms = 0.0
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        items: List[BatchItem]
+    ) -> Dict[int, Tuple[str, Any]]:
+        """Map each item's index to (status, bookmark id) or (CONFLICT, message).
+
+        Either every new bookmark of the batch is committed or none is.
+        """
+        started_at = time.perf_counter()
+        try:
+            return await self._create_many(db, user_id, items)
+        except IntegrityError:
+            # A concurrent request committed some of the same keys first;
+            # a second pass sees them and returns those bookmarks instead
+            await db.rollback()
+            self.retries += 1
+            logger.info(f"Batch of {len(items)} bookmarks raced on idempotency keys; retrying")
+            return await self._create_many(db, user_id, items)
+        finally:
+            self.batches += 1
+            self.total_ms += (time.perf_counter() - started_at) * 1000
+
+    async def _create_many(self, db: AsyncSession, user_id: int, items: List[BatchItem]) -> Dict[int, Tuple[str, Any]]:
+        results: Dict[int, Tuple[str, Any]] = {}
+        records = await self._live_keys(db, user_id, {item.key for item in items if item.key})
+
+        new_items: List[BatchItem] = []
+        first_by_key: Dict[str, BatchItem] = {}
+        duplicates: List[Tuple[BatchItem, BatchItem]] = []
+        for item in items:
+            if item.key:
+                record = records.get(item.key)
+                first = first_by_key.get(item.key)
+                stored_hash = record.request_hash if record else first.fingerprint if first else None
+                if stored_hash is not None and stored_hash != item.fingerprint:
+                    self.conflicts += 1
+                    results[item.index] = (
+                        CONFLICT, f"Idempotency-Key {item.key!r} was already used for a different request"
+                    )
+                    continue
+                if record is not None:
+                    self.replayed += 1
+                    results[item.index] = (EXISTING, record.bookmark_id)
+                    continue
+                if first is not None:
+                    duplicates.append((item, first))  # Same key twice within this batch
+                    continue
+                first_by_key[item.key] = item
+            new_items.append(item)
+
+        if new_items:
+            ids = await self._insert_bookmarks(db, user_id, new_items)
+            key_rows = [
+                {"user_id": user_id, "key": item.key, "request_hash": item.fingerprint, "bookmark_id": bookmark_id}
+                for item, bookmark_id in zip(new_items, ids) if item.key
+            ]
+            if key_rows:
+                await db.execute(insert(IdempotencyKey).values(key_rows))
+            for item, bookmark_id in zip(new_items, ids):
+                results[item.index] = (CREATED, bookmark_id)
+        await db.commit()
+        self.created += len(new_items)
+
+        for item, first in duplicates:
+            self.replayed += 1
+            results[item.index] = (EXISTING, results[first.index][1])
+        return results
+
+    async def _live_keys(self, db: AsyncSession, user_id: int, keys: set) -> Dict[str, IdempotencyKey]:
+        """Unexpired keys whose bookmark still exists; the others are released."""
+        if not keys:
+            return {}
+        records = (await db.execute(select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key.in_(keys)
+        ))).scalars().all()
+        if not records:
+            return {}
+
+        bookmark_ids = {record.bookmark_id for record in records if record.bookmark_id is not None}
+        existing_ids = set((await db.execute(select(Bookmark.id).where(
+            Bookmark.id.in_(bookmark_ids)
+        ))).scalars().all()) if bookmark_ids else set()
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.key_ttl_seconds)
+        live, dead = {}, []
+        for record in records:
+            created_at = record.created_at
+            if created_at is not None and created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC
+            if record.bookmark_id in existing_ids and (created_at is None or created_at >= cutoff):
+                live[record.key] = record
+            else:
+                dead.append(record.id)
+        if dead:
+            await db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(dead)))
+        return live
+
+    async def _insert_bookmarks(self, db: AsyncSession, user_id: int, items: List[BatchItem]) -> List[int]:
+        """Insert the rows and return their ids, in item order."""
+        rows = [
+            {"user_id": user_id, **{name: item.values.get(name) for name in BATCH_COLUMNS}}
+            for item in items
+        ]
+        if dialect_name(db) == "postgresql":
+            # Reserve the ids up front so one multi-row INSERT needs no RETURNING order
+            ids = (await db.execute(
+                text("SELECT nextval(pg_get_serial_sequence('bookmarks', 'id')) FROM generate_series(1, :n)"),
+                {"n": len(rows)}
+            )).scalars().all()
+            await db.execute(insert(Bookmark).values([{**row, "id": id_} for row, id_ in zip(rows, ids)]))
+        else:
+            # SQLAlchemy 1.4 cannot compile RETURNING for SQLite. The transaction holds
+            # the write lock and a rowid key takes max(rowid) + 1, so one multi-row
+            # INSERT gets consecutive ids in VALUES order, ending at last_insert_rowid().
+            await db.execute(insert(Bookmark).values(rows))
+            last_id = (await db.execute(text("SELECT last_insert_rowid()"))).scalar()
+            ids = list(range(last_id - len(rows) + 1, last_id + 1))
+        await record_changes(db, Bookmark.id.in_(ids))
+        await record_weekly_stats(db, Bookmark.id.in_(ids))
+        return list(ids)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "created": self.created,
+            "replayed": self.replayed,
+            "conflicts": self.conflicts,
+            "retries": self.retries,
+            "avg_ms": round(self.total_ms / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+# Global service instance
+bookmark_batch_service = BookmarkBatchService(
+    max_items=settings.BOOKMARK_BATCH_MAX_ITEMS,
+    key_ttl_seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS
+)
@@ -0,0 +1,217 @@
+"""Streaming export of a user's whole bookmark library.
+
+Rows are read from a server-side cursor in batches and written out as
+they arrive, so memory stays flat however many bookmarks there are:
+
+- ndjson: one JSON object per line, with the same fields as the list API
+- csv: a header row, then one row per bookmark
+- markdown: a notes document, grouped by podcast and episode
+
+The output is handed on in chunks of about EXPORT_CHUNK_BYTES, optionally
+gzipped as it goes.
+"""
+import csv
+import io
+import logging
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import orjson
+from sqlalchemy import select
+
+from app.core.compression import GZIP, response_compressor
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.bookmark import Bookmark
+from app.services.bookmark_serializer import columns_for, row_to_dict
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "ndjson"
+CSV = "csv"
+MARKDOWN = "markdown"
+
+# Media type (Starlette adds the utf-8 charset to text types) and file extension per format
+FORMATS = {
+    NDJSON: ("application/x-ndjson", "ndjson"),
+    CSV: ("text/csv", "csv"),
+    MARKDOWN: ("text/markdown", "md"),
+}
+
+MARKDOWN_FIELDS = [
+    "id", "podcast_name", "episode_name", "timestamp_ms", "user_note", "transcript_text", "ai_summary",
+]
+
+
+def format_timestamp(timestamp_ms: Optional[int]) -> str:
+    """Playback position as h:mm:ss, or m:ss under an hour."""
+    seconds = (timestamp_ms or 0) // 1000
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _indented(text: str) -> str:
+    # Keeps multi-line notes inside their list item
+    return "\n    ".join(line.rstrip() for line in text.strip().splitlines())
+
+
+class _NdjsonWriter:
+    def __init__(self, field_names: List[str]):
+        self.field_names = field_names
+
+    def header(self) -> bytes:
+        return b""
+
+    def rows(self, rows: Iterable[Any]) -> bytes:
+        return b"".join(orjson.dumps(row_to_dict(row, self.field_names)) + b"\n" for row in rows)
+
+
+class _CsvWriter:
+    def __init__(self, field_names: List[str]):
+        self.field_names = field_names
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text.encode("utf-8")
+
+    def header(self) -> bytes:
+        self._writer.writerow(self.field_names)
+        return self._drain()
+
+    def rows(self, rows: Iterable[Any]) -> bytes:
+        self._writer.writerows([_csv_value(getattr(row, name)) for name in self.field_names] for row in rows)
+        return self._drain()
+
+
+class _MarkdownWriter:
+    """Headings per podcast and episode; rows arrive sorted by both."""
+
+    def __init__(self, field_names: List[str]):
+        self._podcast: Optional[str] = None
+        self._episode: Optional[str] = None
+
+    def header(self) -> bytes:
+        return b"# Poma bookmarks\n"
+
+    def rows(self, rows: Iterable[Any]) -> bytes:
+        lines: List[str] = []
+        for row in rows:
+            if row.podcast_name != self._podcast:
+                self._podcast, self._episode = row.podcast_name, None
+                lines.append(f"\n## {row.podcast_name}\n")
+            if row.episode_name != self._episode:
+                self._episode = row.episode_name
+                lines.append(f"\n### {row.episode_name}\n\n")
+            lines.append(f"- **{format_timestamp(row.timestamp_ms)}**")
+            lines.append(f" {_indented(row.user_note)}\n" if row.user_note else "\n")
+            if row.transcript_text:
+                lines.append(f"  - Voice note: {_indented(row.transcript_text)}\n")
+            if row.ai_summary:
+                lines.append(f"  - Summary: {_indented(row.ai_summary)}\n")
+        return "".join(lines).encode("utf-8")
+
+
+WRITERS = {NDJSON: _NdjsonWriter, CSV: _CsvWriter, MARKDOWN: _MarkdownWriter}
+
+
+class BookmarkExportService:
+    """Streams exports and keeps throughput counters."""
+
+    def __init__(self, batch_size: int, chunk_bytes: int):
+        self.batch_size = batch_size
+        self.chunk_bytes = chunk_bytes
+        self.exports = 0
+        self.failed = 0
+        self.rows = 0
+        self.bytes_out = 0
+        self.total_seconds = 0.0
+
+    def fields_for(self, export_format: str, field_names: List[str]) -> List[str]:
+        return MARKDOWN_FIELDS if export_format == MARKDOWN else field_names
+
+    def query(self, user_id: int, export_format: str, field_names: List[str]):
+        """Oldest first along the (user_id, created_at, id) index; markdown sorted for grouping."""
+        query = select(*columns_for(self.fields_for(export_format, field_names))).where(Bookmark.user_id == user_id)
+        if export_format == MARKDOWN:
+            return query.order_by(Bookmark.podcast_name, Bookmark.episode_name, Bookmark.timestamp_ms, Bookmark.id)
+        return query.order_by(Bookmark.created_at, Bookmark.id)
+
+    async def stream(
+        self,
+        user_id: int,
+        export_format: str,
+        field_names: List[str],
+        gzip: bool = False,
+        session_factory=AsyncSessionLocal
+    ) -> AsyncIterator[bytes]:
+        """Yield the export of every bookmark of `user_id`, in chunks."""
+        started_at = time.perf_counter()
+        writer = WRITERS[export_format](self.fields_for(export_format, field_names))
+        compressor = response_compressor.stream(GZIP) if gzip else None
+        pending: List[bytes] = [writer.header()]
+        pending_size = len(pending[0])
+        try:
+            async with session_factory() as db:
+                result = await db.stream(
+                    self.query(user_id, export_format, field_names).execution_options(max_row_buffer=self.batch_size)
+                )
+                async for rows in result.partitions(self.batch_size):
+                    data = writer.rows(rows)
+                    self.rows += len(rows)
+                    pending.append(data)
+                    pending_size += len(data)
+                    if pending_size >= self.chunk_bytes:
+                        yield self._output(pending, compressor)
+                        pending, pending_size = [], 0
+            tail = self._output(pending, compressor)
+            if compressor is not None:
+                trailer = compressor.finish()
+                self.bytes_out += len(trailer)
+                tail += trailer
+            if tail:
+                yield tail
+            self.exports += 1
+        except Exception as e:
+            # Headers are already sent; a truncated body is all that can signal the failure
+            self.failed += 1
+            logger.error(f"Export for user {user_id} failed: {e}")
+            raise
+        finally:
+            self.total_seconds += time.perf_counter() - started_at
+
+    def _output(self, pending: List[bytes], compressor) -> bytes:
+        data = b"".join(pending)
+        if compressor is not None and data:
+            data = compressor.compress(data)
+        self.bytes_out += len(data)
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exports": self.exports,
+            "failed": self.failed,
+            "rows": self.rows,
+            "bytes_out": self.bytes_out,
+            "rows_per_second": round(self.rows / self.total_seconds) if self.total_seconds else 0,
+        }
+
+
+# Global service instance
+bookmark_export = BookmarkExportService(
+    batch_size=settings.EXPORT_BATCH_SIZE,
+    chunk_bytes=settings.EXPORT_CHUNK_BYTES
+)
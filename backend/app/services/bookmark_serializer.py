@@ -0,0 +1,101 @@
+"""Bookmark field selection and serialization.
+
+List screens only need titles and timestamps, while transcripts and AI
+summaries are large Text columns. Clients pick what they need with
+`fields=`, and only those columns are selected from the database.
+
+Responses are built straight from SQLAlchemy rows and encoded with orjson;
+data read from the database is not validated a second time by pydantic.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from fastapi.responses import ORJSONResponse
+
+from app.models.bookmark import Bookmark
+
+# Fields of the default list response, in response order
+FULL_FIELDS = [
+    "id",
+    "podcast_name",
+    "episode_name",
+    "timestamp_ms",
+    "duration_ms",
+    "spotify_episode_id",
+    "podcast_cover_url",
+    "audio_file_path",
+    "transcript_text",
+    "transcription_status",
+    "user_note",
+    "ai_summary",
+    "created_at",
+    "media_id",
+    "source_app_package",
+    "album_art_uri",
+]
+
+# Only returned when asked for by name
+EXTRA_FIELDS = ["updated_at", "context_before", "context_after"]
+
+FIELD_PRESETS = {
+    "summary": [
+        "id", "podcast_name", "episode_name", "timestamp_ms", "duration_ms",
+        "created_at", "podcast_cover_url", "album_art_uri",
+    ],
+    "playback": [
+        "id", "podcast_name", "episode_name", "timestamp_ms", "duration_ms",
+        "created_at", "spotify_episode_id", "media_id", "source_app_package", "album_art_uri",
+    ],
+    "full": FULL_FIELDS,
+}
+
+SELECTABLE_FIELDS = set(FULL_FIELDS) | set(EXTRA_FIELDS)
+
+
+def resolve_fields(fields: Optional[str]) -> List[str]:
+    """Turn a `fields=` value into an ordered list of field names.
+
+    Accepts preset names and field names, comma separated; `id` is always
+    included. Raises ValueError for unknown names.
+    """
+    if not fields:
+        return list(FULL_FIELDS)
+
+    resolved: List[str] = ["id"]
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        if name in FIELD_PRESETS:
+            names = FIELD_PRESETS[name]
+        elif name in SELECTABLE_FIELDS:
+            names = [name]
+        else:
+            raise ValueError(f"Unknown field: {name}")
+        resolved.extend(n for n in names if n not in resolved)
+    return resolved
+
+
+def columns_for(fields: Iterable[str]) -> list:
+    """The Bookmark columns backing the given fields."""
+    return [getattr(Bookmark, name) for name in fields]
+
+
+def row_to_dict(row: Any, fields: List[str]) -> Dict[str, Any]:
+    """Serialize a selected row (or a Bookmark) to a response dict.
+
+    Datetimes are left as is; orjson encodes them as ISO 8601.
+    """
+    return {name: getattr(row, name) for name in fields}
+
+
+def bookmark_dict(bookmark: Any) -> Dict[str, Any]:
+    """The single-bookmark response body (BookmarkResponse fields)."""
+    return row_to_dict(bookmark, FULL_FIELDS)
+
+
+def json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None
+) -> ORJSONResponse:
+    """Encode already-serialized content with orjson, skipping response_model validation."""
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,244 @@
+"""Transcript context around a bookmark: what was said 30 s before and after.
+
+Instead of transcribing a whole episode, the capture decodes only the
+audio around `timestamp_ms`. Episodes are cut on a fixed grid of
+CONTEXT_CHUNK_SECONDS chunks; each chunk is transcribed into timed
+segments once and kept in the per-episode transcript store, so later
+bookmarks in the same episode, by any user, read the segments back with a
+single range query. Segments are assigned to the before or after window by
+their midpoint.
+
+Capture runs on its own worker pool after a bookmark is created, so it
+never delays the response.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.bookmark import Bookmark
+from app.services.episode_audio import episode_audio
+from app.services.episode_metadata import episode_key
+from app.services.episode_transcripts import episode_transcripts
+from app.services.job_queue import QueueFullError, WorkerPool
+from app.services.openai_service import openai_service
+from app.services.summarization import summarizer
+from app.services.transcoder import TranscodeError, transcoder
+from app.services.transcription_engines import TranscriptSegment
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_indexes(timestamp_ms: int, window_ms: int, chunk_ms: int) -> range:
+    """Grid chunks covering [timestamp - window, timestamp + window)."""
+    first = max(0, timestamp_ms - window_ms) // chunk_ms
+    last = (timestamp_ms + window_ms - 1) // chunk_ms
+    return range(first, last + 1)
+
+
+def split_context(
+    segments: List[TranscriptSegment],
+    timestamp_ms: int,
+    window_ms: int
+) -> Tuple[Optional[str], Optional[str]]:
+    """Join the segments whose midpoint falls in the window before / after the timestamp."""
+    before, after = [], []
+    for segment in sorted(segments):
+        middle = (segment.start_ms + segment.end_ms) // 2
+        if timestamp_ms - window_ms <= middle < timestamp_ms:
+            before.append(segment.text)
+        elif timestamp_ms <= middle < timestamp_ms + window_ms:
+            after.append(segment.text)
+    return " ".join(before) or None, " ".join(after) or None
+
+
+@dataclass
+class ContextJob:
+    bookmark_id: int
+
+
+class ContextCaptureService:
+    """Fills `context_before` / `context_after` from the episode transcript store."""
+
+    def __init__(self, window_seconds: int, chunk_seconds: int):
+        self.window_ms = window_seconds * 1000
+        self.chunk_ms = chunk_seconds * 1000
+        # Chunks being transcribed, so concurrent captures share the work
+        self._in_flight: Dict[Tuple[str, str, int], asyncio.Future] = {}
+        self.captured = 0
+        self.no_audio = 0
+        self.chunks_transcribed = 0
+        self.chunks_reused = 0
+        self.chunk_errors = 0
+        self.total_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return episode_audio.enabled
+
+    async def capture(self, job: ContextJob) -> None:
+        """Worker pool handler: capture and store one bookmark's context."""
+        started_at = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            bookmark = await db.get(Bookmark, job.bookmark_id)
+            if bookmark is None:
+                return  # Deleted while queued
+            key = episode_key(bookmark.spotify_episode_id, bookmark.media_id, bookmark.source_app_package)
+            if key is None:
+                return
+
+            before, after = await self.context_for(db, key, bookmark.timestamp_ms)
+            if before is None and after is None:
+                if bookmark.user_note:
+                    summarizer.submit(job.bookmark_id)  # The note alone
+                return
+            bookmark.context_before = before
+            bookmark.context_after = after
+            await db.commit()
+        summarizer.submit(job.bookmark_id)
+        self.captured += 1
+        self.total_ms += (time.perf_counter() - started_at) * 1000
+
+    async def context_for(self, db: AsyncSession, key: str, timestamp_ms: int) -> Tuple[Optional[str], Optional[str]]:
+        """The (before, after) context of a position in an episode."""
+        model = openai_service.engine.model_version
+        starts = [
+            index * self.chunk_ms
+            for index in chunk_indexes(timestamp_ms, self.window_ms, self.chunk_ms)
+        ]
+        missing = await episode_transcripts.missing_chunks(db, key, model, starts)
+        self.chunks_reused += len(starts) - len(missing)
+        if missing:
+            await self._transcribe_missing(db, key, model, missing)
+
+        segments = await episode_transcripts.segments_overlapping(
+            db, key, model, timestamp_ms - self.window_ms, timestamp_ms + self.window_ms
+        )
+        return split_context(segments, timestamp_ms, self.window_ms)
+
+    async def _transcribe_missing(self, db: AsyncSession, key: str, model: str, starts: List[int]) -> None:
+        """Transcribe and store the chunks at `starts`, waiting for ones already underway."""
+        owned: Dict[int, asyncio.Future] = {}
+        waiting: List[asyncio.Future] = []
+        for start in starts:
+            in_flight = self._in_flight.get((key, model, start))
+            if in_flight is not None:
+                waiting.append(in_flight)
+            else:
+                owned[start] = asyncio.get_running_loop().create_future()
+                self._in_flight[(key, model, start)] = owned[start]
+
+        try:
+            if owned:
+                await db.commit()  # Hand the connection back while transcribing
+                audio_path = await episode_audio.locate(key)
+                if audio_path is None:
+                    self.no_audio += 1
+                else:
+                    results = await asyncio.gather(*[
+                        self._transcribe_chunk(audio_path, start) for start in owned
+                    ])
+                    done = {start: segments for start, segments in zip(owned, results) if segments is not None}
+                    self.chunks_transcribed += len(done)
+                    self.chunk_errors += len(owned) - len(done)
+                    if done:
+                        await episode_transcripts.save_chunks(db, key, model, done)
+                        await db.commit()
+        finally:
+            # Waiters read the stored chunks once they are committed
+            for start, future in owned.items():
+                self._in_flight.pop((key, model, start), None)
+                if not future.done():
+                    future.set_result(None)
+
+        if waiting:
+            self.chunks_reused += len(waiting)
+            await asyncio.gather(*[asyncio.shield(future) for future in waiting])
+
+    async def _transcribe_chunk(self, audio_path: str, start_ms: int) -> Optional[List[TranscriptSegment]]:
+        """Decode and transcribe one chunk; None when it could not be done (not stored)."""
+        try:
+            audio = await transcoder.extract_mp3(audio_path, start_ms, self.chunk_ms)
+        except TranscodeError as e:
+            logger.warning(f"Could not decode {audio_path} at {start_ms} ms: {e}")
+            return None
+        if not audio:
+            return []  # Past the end of the episode
+
+        path = await run_in_threadpool(_write_temp_file, audio, ".mp3")
+        try:
+            segments = await openai_service.engine.transcribe_segments(path)
+        finally:
+            os.remove(path)
+        if segments is None:
+            return None
+        return [
+            TranscriptSegment(segment.start_ms + start_ms, segment.end_ms + start_ms, segment.text)
+            for segment in segments
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        chunks = self.chunks_transcribed + self.chunks_reused
+        return {
+            "enabled": self.enabled,
+            "captured": self.captured,
+            "no_audio": self.no_audio,
+            "chunks_transcribed": self.chunks_transcribed,
+            "chunks_reused": self.chunks_reused,
+            "chunk_reuse_rate": round(self.chunks_reused / chunks, 3) if chunks else 0.0,
+            "chunk_errors": self.chunk_errors,
+            "avg_ms": round(self.total_ms / self.captured, 1) if self.captured else 0.0,
+            "queue": context_pool.stats(),
+            "audio": episode_audio.stats(),
+            "transcripts": episode_transcripts.stats(),
+        }
+
+
+def queue_context_capture(
+    bookmark_id: int,
+    spotify_episode_id: Optional[str],
+    media_id: Optional[str],
+    source_app_package: Optional[str] = None
+) -> bool:
+    """Schedule context capture for a new bookmark; False when it will not run.
+
+    A no-op without episode audio. A queued capture submits the bookmark
+    for summarizing when it finishes.
+    """
+    if not context_capture.enabled or episode_key(spotify_episode_id, media_id, source_app_package) is None:
+        return False
+    try:
+        context_pool.submit(bookmark_id, ContextJob(bookmark_id))
+    except QueueFullError:
+        logger.warning(f"Context capture queue full, skipping bookmark {bookmark_id}")
+        return False
+    return True
+
+
+def _write_temp_file(data: bytes, suffix: str) -> str:
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        f.write(data)
+        return f.name
+
+
+# Global service instance
+context_capture = ContextCaptureService(
+    window_seconds=settings.CONTEXT_WINDOW_SECONDS,
+    chunk_seconds=settings.CONTEXT_CHUNK_SECONDS
+)
+
+# Global worker pool
+context_pool = WorkerPool(
+    name="context",
+    handler=context_capture.capture,
+    workers=settings.CONTEXT_WORKERS,
+    max_queue_size=settings.CONTEXT_QUEUE_MAX_SIZE
+)
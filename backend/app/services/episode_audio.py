@@ -0,0 +1,175 @@
+"""Where the audio of a podcast episode can be read from.
+
+Spotify's Web API does not serve episode audio, so episodes are found in
+EPISODE_AUDIO_DIR (files named after the episode id) or downloaded once
+from EPISODE_AUDIO_URL_TEMPLATE into a size-bounded disk cache. Only
+well-formed Spotify episode ids are downloaded: other keys come from
+clients and name episodes of other apps. Context
+capture only ever decodes short windows of these files.
+"""
+import asyncio
+import glob
+import hashlib
+import logging
+import os
+import re
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+import httpx
+
+from app.core.config import settings
+from app.services.audio_upload import UploadTooLargeError, stream_to_file
+from app.services.episode_metadata import is_spotify_id
+
+logger = logging.getLogger(__name__)
+
+_SAFE_STEM = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def file_stem(episode_key: str) -> str:
+    """A file name for an episode: the id itself when it is safe, else its hash."""
+    if _SAFE_STEM.fullmatch(episode_key):
+        return episode_key
+    return hashlib.sha1(episode_key.encode("utf-8")).hexdigest()
+
+
+class EpisodeAudioStore:
+    """Local episode files first, then cached downloads."""
+
+    def __init__(
+        self,
+        audio_dir: str,
+        url_template: str,
+        cache_dir: str,
+        cache_max_bytes: int,
+        max_file_bytes: int
+    ):
+        self.audio_dir = audio_dir
+        self.url_template = url_template
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.max_file_bytes = max_file_bytes
+        self._client: Optional[httpx.AsyncClient] = None
+        # Downloads in progress, so bookmarks of one episode wait for the same one
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.local_hits = 0
+        self.cache_hits = 0
+        self.downloads = 0
+        self.download_errors = 0
+        self.downloaded_bytes = 0
+        self.evicted_files = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.audio_dir or self.url_template)
+
+    async def locate(self, episode_key: str) -> Optional[str]:
+        """Path of the episode's audio, downloading it if needed; None if unavailable."""
+        stem = file_stem(episode_key)
+        if self.audio_dir:
+            matches = glob.glob(os.path.join(glob.escape(self.audio_dir), glob.escape(stem) + ".*"))
+            if matches:
+                self.local_hits += 1
+                return matches[0]
+        if not self.url_template or not is_spotify_id(episode_key):
+            return None
+
+        path = os.path.join(self.cache_dir, f"{stem}.audio")
+        if os.path.exists(path):
+            self.cache_hits += 1
+            os.utime(path)  # Recently used files are evicted last
+            return path
+
+        in_flight = self._in_flight.get(path)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[path] = future
+        try:
+            result = await self._download(episode_key, path)
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(path, None)
+            if not future.done():
+                future.set_result(None)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _download(self, episode_key: str, path: str) -> Optional[str]:
+        url = self.url_template.format(episode_id=quote(episode_key, safe=""))
+        partial_path = path + ".part"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(30.0), follow_redirects=True)
+        try:
+            async with self._client.stream("GET", url) as response:
+                response.raise_for_status()
+                size = await stream_to_file(response.aiter_bytes(), partial_path, self.max_file_bytes)
+            os.replace(partial_path, path)
+        except (httpx.HTTPError, UploadTooLargeError, OSError) as e:
+            self.download_errors += 1
+            logger.warning(f"Could not download episode audio {episode_key}: {e}")
+            _discard(partial_path)
+            return None
+
+        self.downloads += 1
+        self.downloaded_bytes += size
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used downloads until the cache fits its budget."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".audio"):
+                continue
+            file_path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file_path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, file_path in sorted(files):
+            if total <= self.cache_max_bytes:
+                break
+            if file_path == keep:
+                continue
+            _discard(file_path)
+            total -= size
+            self.evicted_files += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "local_hits": self.local_hits,
+            "cache_hits": self.cache_hits,
+            "downloads": self.downloads,
+            "download_errors": self.download_errors,
+            "downloaded_bytes": self.downloaded_bytes,
+            "evicted_files": self.evicted_files,
+        }
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Global service instance
+episode_audio = EpisodeAudioStore(
+    audio_dir=settings.EPISODE_AUDIO_DIR,
+    url_template=settings.EPISODE_AUDIO_URL_TEMPLATE,
+    cache_dir=settings.EPISODE_AUDIO_CACHE_DIR,
+    cache_max_bytes=settings.EPISODE_AUDIO_CACHE_MAX_BYTES,
+    max_file_bytes=settings.EPISODE_AUDIO_MAX_BYTES
+)
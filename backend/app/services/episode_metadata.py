@@ -0,0 +1,303 @@
+"""Episode and show metadata shared by Spotify lookups and bookmark creation.
+
+Lookups go memory, then database, then Spotify. Episodes missing from both
+are fetched through the batch endpoint, up to 50 per call, and written back
+so every worker (and every user) benefits from the first lookup. Spotify
+rejects a whole batch over one malformed id, so ids are checked first and a
+rejected batch is split until the bad id is isolated.
+"""
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import dialect_name, side_session
+from app.models.podcast import PodcastEpisode, PodcastShow
+from app.services.spotify_client import SpotifyAPIError, spotify_client
+
+logger = logging.getLogger(__name__)
+
+# Spotify's limit for GET /episodes?ids=
+BATCH_SIZE = 50
+
+EPISODE_URI_PREFIX = "spotify:episode:"
+
+# Spotify ids are 22 base62 characters
+_SPOTIFY_ID = re.compile(r"[0-9A-Za-z]{22}")
+
+
+def episode_id_from_uri(uri: Optional[str]) -> Optional[str]:
+    """The episode id of a `spotify:episode:<id>` URI, else None."""
+    if uri and uri.startswith(EPISODE_URI_PREFIX):
+        return uri[len(EPISODE_URI_PREFIX):] or None
+    return None
+
+
+def is_spotify_id(value: Optional[str]) -> bool:
+    return bool(value) and _SPOTIFY_ID.fullmatch(value) is not None
+
+
+def episode_key(
+    spotify_episode_id: Optional[str],
+    media_id: Optional[str],
+    source_app_package: Optional[str] = None
+) -> Optional[str]:
+    """What identifies a bookmark's episode: the Spotify id, else the MediaSession media id.
+
+    Media ids are only unique within the app that reported them, so they are
+    prefixed with its package name; Spotify ids are kept bare.
+    """
+    spotify_id = spotify_episode_id or episode_id_from_uri(media_id)
+    if spotify_id:
+        return spotify_id
+    if media_id:
+        return f"{source_app_package or 'unknown'}:{media_id}"
+    return None
+
+
+class EpisodeMetadataService:
+    """Read-through store of episode details, as served by `/spotify/episode/{id}`."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int, max_age_days: int):
+        self.max_age = timedelta(days=max_age_days)
+        self._episodes = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+        self.upstream_episodes = 0
+        self.upstream_errors = 0
+
+    async def get_episode(
+        self,
+        db: AsyncSession,
+        episode_id: str,
+        access_token: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        return (await self.get_episodes(db, [episode_id], access_token)).get(episode_id)
+
+    async def get_episodes(
+        self,
+        db: AsyncSession,
+        episode_ids: Iterable[str],
+        access_token: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Details by episode id; unknown ids are left out.
+
+        Without an access token only memory and the database are consulted.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        for episode_id in dict.fromkeys(episode_ids):
+            details = self._episodes.get(episode_id)
+            if details is not None:
+                self.memory_hits += 1
+                found[episode_id] = details
+            else:
+                missing.append(episode_id)
+        if not missing:
+            return found
+
+        stale: Dict[str, Dict[str, Any]] = {}
+        cutoff = datetime.now(timezone.utc) - self.max_age
+        for episode_id, (details, fetched_at) in (await self._load(db, missing)).items():
+            if fetched_at is not None and fetched_at < cutoff:
+                stale[episode_id] = details
+                continue
+            self.db_hits += 1
+            self._episodes.set(episode_id, details)
+            found[episode_id] = details
+        missing = [episode_id for episode_id in missing if episode_id not in found]
+
+        fetchable = [episode_id for episode_id in missing if is_spotify_id(episode_id)]
+        if fetchable and access_token:
+            fetched = await self._fetch(access_token, fetchable)
+            if fetched:
+                await self._store(db, fetched)
+            for episode in fetched:
+                details = format_episode(episode)
+                self._episodes.set(episode["id"], details)
+                found[episode["id"]] = details
+
+        # A stale row still beats nothing when Spotify could not be asked
+        for episode_id, details in stale.items():
+            if episode_id not in found:
+                self.db_hits += 1
+                found[episode_id] = details
+        self.misses += sum(1 for episode_id in missing if episode_id not in found)
+        return found
+
+    def invalidate(self, episode_id: str) -> None:
+        self._episodes.delete(episode_id)
+
+    async def _load(self, db: AsyncSession, episode_ids: List[str]) -> Dict[str, tuple]:
+        statement = select(PodcastEpisode, PodcastShow).outerjoin(
+            PodcastShow, PodcastShow.id == PodcastEpisode.show_id
+        ).where(PodcastEpisode.id.in_(episode_ids))
+        loaded = {}
+        for episode, show in (await db.execute(statement)).all():
+            fetched_at = episode.fetched_at
+            if fetched_at is not None and fetched_at.tzinfo is None:
+                fetched_at = fetched_at.replace(tzinfo=timezone.utc)  # SQLite drops the zone
+            loaded[episode.id] = (_row_details(episode, show), fetched_at)
+        return loaded
+
+    async def _fetch(self, access_token: str, episode_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch episodes in batches of 50; failed batches are logged and skipped."""
+        batches = [episode_ids[i:i + BATCH_SIZE] for i in range(0, len(episode_ids), BATCH_SIZE)]
+        results = await asyncio.gather(*(self._fetch_batch(access_token, batch) for batch in batches))
+        episodes = [episode for result in results for episode in result]
+        self.upstream_episodes += len(episodes)
+        return episodes
+
+    async def _fetch_batch(self, access_token: str, episode_ids: List[str]) -> List[Dict[str, Any]]:
+        """One batch call; on a 400 the halves are retried so the valid ids still resolve."""
+        self.upstream_calls += 1
+        try:
+            response = await spotify_client.get("/episodes", access_token, params={"ids": ",".join(episode_ids)})
+        except SpotifyAPIError as e:
+            self.upstream_errors += 1
+            if e.status_code != 400 or len(episode_ids) == 1:
+                logger.warning(f"Spotify episode batch lookup failed for {len(episode_ids)} ids: {e}")
+                return []
+            middle = len(episode_ids) // 2
+            halves = await asyncio.gather(
+                self._fetch_batch(access_token, episode_ids[:middle]),
+                self._fetch_batch(access_token, episode_ids[middle:])
+            )
+            return halves[0] + halves[1]
+        except Exception as e:
+            self.upstream_errors += 1
+            logger.warning(f"Spotify episode batch lookup failed: {e}")
+            return []
+        # Unknown ids come back as null entries
+        return [episode for episode in (response or {}).get("episodes", []) if episode]
+
+    async def _store(self, db: AsyncSession, episodes: List[Dict[str, Any]]) -> None:
+        now = datetime.now(timezone.utc)
+        shows = {}
+        for episode in episodes:
+            show = episode.get("show") or {}
+            if show.get("id"):
+                shows[show["id"]] = {
+                    "id": show["id"],
+                    "name": show.get("name") or "",
+                    "publisher": show.get("publisher"),
+                    "description": show.get("description"),
+                    "images": show.get("images", []),
+                    "fetched_at": now,
+                }
+        rows = [
+            {
+                "id": episode["id"],
+                "show_id": (episode.get("show") or {}).get("id"),
+                "name": episode.get("name") or "",
+                "description": episode.get("description"),
+                "duration_ms": episode.get("duration_ms"),
+                "release_date": episode.get("release_date"),
+                "uri": episode.get("uri"),
+                "external_urls": episode.get("external_urls", {}),
+                "images": episode.get("images", []),
+                "fetched_at": now,
+            }
+            for episode in episodes
+        ]
+
+        # In a session of its own: the caller's transaction is not ours to commit or roll back
+        dialect = dialect_name(db)
+        async with side_session(db) as store_db:
+            try:
+                if shows:
+                    await store_db.execute(_upsert(dialect, PodcastShow, list(shows.values())))
+                await store_db.execute(_upsert(dialect, PodcastEpisode, rows))
+                await store_db.commit()
+            except Exception as e:
+                # Not fatal: the details are still served from memory
+                await store_db.rollback()
+                logger.warning(f"Could not store episode metadata: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.db_hits + self.misses + self.upstream_episodes
+        return {
+            "entries": len(self._episodes),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 3) if lookups else 0.0,
+            "upstream_calls": self.upstream_calls,
+            "upstream_episodes": self.upstream_episodes,
+            "upstream_errors": self.upstream_errors,
+        }
+
+
+def format_episode(episode: Dict[str, Any]) -> Dict[str, Any]:
+    """Episode details from a Spotify episode object."""
+    show = episode.get("show") or {}
+    return {
+        "id": episode.get("id"),
+        "name": episode.get("name"),
+        "description": episode.get("description"),
+        "duration_ms": episode.get("duration_ms"),
+        "release_date": episode.get("release_date"),
+        "uri": episode.get("uri"),
+        "external_urls": episode.get("external_urls", {}),
+        "images": episode.get("images", []),
+        "podcast": {
+            "id": show.get("id"),
+            "name": show.get("name"),
+            "publisher": show.get("publisher"),
+            "description": show.get("description"),
+            "images": show.get("images", []),
+        },
+    }
+
+
+def cover_url(details: Dict[str, Any]) -> Optional[str]:
+    """The largest episode image, falling back to the show's."""
+    images = details.get("images") or details["podcast"].get("images") or []
+    return images[0].get("url") if images else None
+
+
+def _row_details(episode: PodcastEpisode, show: Optional[PodcastShow]) -> Dict[str, Any]:
+    return {
+        "id": episode.id,
+        "name": episode.name,
+        "description": episode.description,
+        "duration_ms": episode.duration_ms,
+        "release_date": episode.release_date,
+        "uri": episode.uri,
+        "external_urls": episode.external_urls or {},
+        "images": episode.images or [],
+        "podcast": {
+            "id": episode.show_id,
+            "name": show.name if show else None,
+            "publisher": show.publisher if show else None,
+            "description": show.description if show else None,
+            "images": (show.images if show else None) or [],
+        },
+    }
+
+
+def _upsert(dialect: str, model, rows: List[Dict[str, Any]]):
+    """INSERT ... ON CONFLICT (id) DO UPDATE, so concurrent workers cannot collide."""
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = insert(model.__table__).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["id"],
+        set_={name: statement.excluded[name] for name in rows[0] if name != "id"}
+    )
+
+
+# Global service instance
+episode_metadata = EpisodeMetadataService(
+    max_entries=settings.SPOTIFY_METADATA_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SPOTIFY_METADATA_CACHE_TTL_SECONDS,
+    max_age_days=settings.SPOTIFY_METADATA_MAX_AGE_DAYS
+)
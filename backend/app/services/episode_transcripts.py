@@ -0,0 +1,124 @@
+"""Per-episode transcript store.
+
+Episodes are transcribed chunk by chunk, on demand, and each chunk is kept
+once for everyone: the next bookmark in the same episode, by any user,
+reads the segments back instead of transcribing again. A chunk row records
+that a stretch is done (even when nobody spoke), so a partly transcribed
+episode answers for what it covers and only the gaps are computed.
+"""
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import dialect_name
+from app.models.episode_transcript import EpisodeTranscriptChunk, EpisodeTranscriptSegment
+from app.services.transcription_engines import TranscriptSegment
+
+
+class EpisodeTranscriptStore:
+    """Reads and writes transcript segments on a fixed chunk grid."""
+
+    def __init__(self, chunk_ms: int):
+        self.chunk_ms = chunk_ms
+        # Longest stored chunk; older rows may come from a larger CONTEXT_CHUNK_SECONDS
+        self._max_chunk_ms: Optional[int] = None
+        self.range_queries = 0
+        self.segments_read = 0
+        self.chunks_saved = 0
+        self.total_query_ms = 0.0
+
+    async def missing_chunks(self, db: AsyncSession, key: str, model: str, starts: Iterable[int]) -> List[int]:
+        """The chunk start offsets among `starts` that have not been transcribed yet."""
+        starts = sorted(set(starts))
+        covered: Set[int] = set((await db.execute(
+            select(EpisodeTranscriptChunk.start_ms).where(
+                EpisodeTranscriptChunk.episode_key == key,
+                EpisodeTranscriptChunk.model == model,
+                EpisodeTranscriptChunk.start_ms.in_(starts)
+            )
+        )).scalars().all())
+        return [start for start in starts if start not in covered]
+
+    async def segments_overlapping(
+        self,
+        db: AsyncSession,
+        key: str,
+        model: str,
+        start_ms: int,
+        end_ms: int
+    ) -> List[TranscriptSegment]:
+        """Stored segments overlapping [start_ms, end_ms), in time order."""
+        started_at = time.perf_counter()
+        max_chunk_ms = await self._longest_chunk(db)
+        rows = (await db.execute(
+            select(
+                EpisodeTranscriptSegment.start_ms,
+                EpisodeTranscriptSegment.end_ms,
+                EpisodeTranscriptSegment.text
+            ).where(
+                EpisodeTranscriptSegment.episode_key == key,
+                EpisodeTranscriptSegment.model == model,
+                # Segments are clamped to their chunk, so the overlap test is a short range on start_ms
+                EpisodeTranscriptSegment.start_ms > start_ms - max_chunk_ms,
+                EpisodeTranscriptSegment.start_ms < end_ms,
+                EpisodeTranscriptSegment.end_ms > start_ms
+            ).order_by(EpisodeTranscriptSegment.start_ms)
+        )).all()
+        self.range_queries += 1
+        self.segments_read += len(rows)
+        self.total_query_ms += (time.perf_counter() - started_at) * 1000
+        return [TranscriptSegment(row.start_ms, row.end_ms, row.text) for row in rows]
+
+    async def _longest_chunk(self, db: AsyncSession) -> int:
+        if self._max_chunk_ms is None:
+            stored = (await db.execute(
+                select(func.max(EpisodeTranscriptChunk.end_ms - EpisodeTranscriptChunk.start_ms))
+            )).scalar()
+            self._max_chunk_ms = max(stored or 0, self.chunk_ms)
+        return self._max_chunk_ms
+
+    async def save_chunks(
+        self,
+        db: AsyncSession,
+        key: str,
+        model: str,
+        chunks: Dict[int, List[TranscriptSegment]]
+    ) -> None:
+        """Store transcribed chunks, keyed by start offset; chunks another worker saved first are skipped."""
+        insert_chunk = postgresql.insert if dialect_name(db) == "postgresql" else sqlite.insert
+        for start, segments in sorted(chunks.items()):
+            end = start + self.chunk_ms
+            claimed = await db.execute(insert_chunk(EpisodeTranscriptChunk.__table__).values(
+                episode_key=key, model=model, start_ms=start, end_ms=end, segment_count=len(segments)
+            ).on_conflict_do_nothing())
+            if claimed.rowcount == 0:
+                continue
+            self.chunks_saved += 1
+            if not segments:
+                continue
+            await db.execute(insert(EpisodeTranscriptSegment.__table__).values([
+                {
+                    "episode_key": key,
+                    "model": model,
+                    "start_ms": max(segment.start_ms, start),
+                    "end_ms": min(max(segment.end_ms, segment.start_ms), end),
+                    "text": segment.text,
+                }
+                for segment in segments
+            ]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "range_queries": self.range_queries,
+            "segments_read": self.segments_read,
+            "avg_query_ms": round(self.total_query_ms / self.range_queries, 2) if self.range_queries else 0.0,
+            "chunks_saved": self.chunks_saved,
+        }
+
+
+# Global service instance
+episode_transcripts = EpisodeTranscriptStore(chunk_ms=settings.CONTEXT_CHUNK_SECONDS * 1000)
@@ -0,0 +1,178 @@
+"""Idempotent bookmark creation.
+
+Mobile clients retry on flaky networks. A request carrying an
+`Idempotency-Key` header creates its bookmark at most once: the key is
+stored next to the bookmark in the same transaction, and a unique index on
+(user_id, key) makes concurrent replays on other workers fail and return
+the winner's row instead of inserting a duplicate.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.bookmark import Bookmark
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyReusedError(Exception):
+    """Raised when a key is replayed with a different request body."""
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """Stable hash of the parts of a request that define its effect."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IdempotencyService:
+    """Looks up and records idempotency keys, with a short-lived response cache."""
+
+    def __init__(self, key_ttl_seconds: int, cache_ttl_seconds: int, cache_max_entries: int):
+        self.key_ttl_seconds = key_ttl_seconds
+        # (user_id, key) -> (fingerprint, serialized response)
+        self._responses = LRUCache(max_entries=cache_max_entries, ttl_seconds=cache_ttl_seconds)
+        self.replays = 0
+
+    def cached_response(self, user_id: int, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Return the original response of a replay served by this worker."""
+        entry = self._responses.get((user_id, key))
+        if entry is None:
+            return None
+        cached_fingerprint, response = entry
+        self._check_fingerprint(key, cached_fingerprint, fingerprint)
+        self.replays += 1
+        return response
+
+    def remember_response(self, user_id: int, key: str, fingerprint: str, response: Dict[str, Any]) -> None:
+        self._responses.set((user_id, key), (fingerprint, response))
+
+    async def find_bookmark(self, db: AsyncSession, user_id: int, key: str, fingerprint: str) -> Optional[Bookmark]:
+        """Return the bookmark an earlier request with this key created.
+
+        Expired keys, and keys whose bookmark has since been deleted, are
+        removed so the key can be used again.
+        """
+        result = await db.execute(select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ))
+        record = result.scalars().first()
+        if record is None:
+            return None
+
+        if record.created_at is not None and _as_utc(record.created_at) < self._cutoff():
+            await db.delete(record)
+            await db.flush()
+            return None
+
+        self._check_fingerprint(key, record.request_hash, fingerprint)
+        bookmark = None
+        if record.bookmark_id is not None:
+            bookmark = await db.get(Bookmark, record.bookmark_id)
+        if bookmark is None:
+            await db.delete(record)
+            await db.flush()
+            return None
+
+        self.replays += 1
+        return bookmark
+
+    async def forget(self, db: AsyncSession, user_id: int, key: str) -> None:
+        """Release a key whose bookmark was rolled back. Does not commit."""
+        self._responses.delete((user_id, key))
+        await db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ))
+
+    async def create_once(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        key: Optional[str],
+        fingerprint: str,
+        bookmark: Bookmark
+    ) -> Tuple[Bookmark, bool]:
+        """Insert `bookmark` and its key in one transaction.
+
+        Returns (bookmark, created). When another worker won the race for the
+        same key, its bookmark is returned with created=False.
+        """
+        db.add(bookmark)
+        try:
+            if key:
+                await db.flush()
+                db.add(IdempotencyKey(
+                    user_id=user_id,
+                    key=key,
+                    request_hash=fingerprint,
+                    bookmark_id=bookmark.id
+                ))
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            if not key:
+                raise
+            existing = await self.find_bookmark(db, user_id, key, fingerprint)
+            if existing is None:
+                raise
+            logger.info(f"Idempotency key {key!r} was used concurrently; returning bookmark {existing.id}")
+            return existing, False
+
+        await db.refresh(bookmark)
+        return bookmark, True
+
+    def stats(self) -> Dict[str, Any]:
+        cache = self._responses.stats()
+        return {
+            "replays": self.replays,
+            "cached_responses": cache["entries"],
+            "cache_hits": cache["hits"],
+        }
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.key_ttl_seconds)
+
+    @staticmethod
+    def _check_fingerprint(key: str, stored: str, given: str) -> None:
+        if stored != given:
+            raise IdempotencyKeyReusedError(
+                f"Idempotency-Key {key!r} was already used for a different request"
+            )
+
+
+def validate_idempotency_key(key: Optional[str]) -> Optional[str]:
+    """Normalise the header value; empty keys are treated as absent."""
+    if key is None:
+        return None
+    key = key.strip()
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+    return key
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive UTC timestamps
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+# Global service instance
+idempotency_service = IdempotencyService(
+    key_ttl_seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+    cache_ttl_seconds=settings.IDEMPOTENCY_CACHE_TTL_SECONDS,
+    cache_max_entries=settings.IDEMPOTENCY_CACHE_MAX_ENTRIES
+)
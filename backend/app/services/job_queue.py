@@ -0,0 +1,116 @@
+"""Bounded background worker pool for slow bookmark work.
+
+Simple is better than complex.
+Errors should never pass silently.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a worker pool cannot accept more jobs."""
+
+
+class WorkerPool:
+    """A fixed number of asyncio workers pulling jobs from a bounded queue.
+
+    The queue size is the backpressure: once it is full, `submit` refuses new
+    jobs instead of letting a burst of uploads pile up in memory.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[None]],
+        workers: int,
+        max_queue_size: int
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_queue_size = max(1, max_queue_size)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._positions: Dict[Hashable, int] = {}
+        self._submitted = 0
+        self._started = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Start the workers on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} {self.name} workers")
+
+    async def stop(self) -> None:
+        """Cancel the workers. Jobs still queued are dropped; keep their state in the database to resume them."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._positions.clear()
+
+    def is_full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    def submit(self, key: Hashable, job: Any) -> int:
+        """Queue a job and return its 1-based position in the queue."""
+        if not self.running:
+            self.start()
+        try:
+            self._queue.put_nowait((key, job))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise QueueFullError(f"{self.name} queue is full")
+
+        self._submitted += 1
+        self._positions[key] = self._submitted
+        return self._submitted - self._started
+
+    def position(self, key: Hashable) -> Optional[int]:
+        """Return the queue position of a job that has not started yet."""
+        seq = self._positions.get(key)
+        return seq - self._started if seq is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers if self.running else 0,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            key, job = await self._queue.get()
+            self._started += 1
+            self._positions.pop(key, None)
+            try:
+                await self.handler(job)
+                self._completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"{self.name} job {key} failed: {e}")
+            finally:
+                self._queue.task_done()
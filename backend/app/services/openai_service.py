@@ -1,90 +1,57 @@
 """OpenAI Whisper service for speech-to-text conversion."""
 
-import os
-import tempfile
-import subprocess
-from typing import Optional
+import asyncio
+from typing import Dict, Optional
 import openai
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.services.audio_upload import hash_file
+from app.services.transcription_cache import transcription_cache
+from app.services.transcription_engines import TranscriptionEngine, create_transcription_engine
 
 class OpenAIService:
     def __init__(self):
         if settings.OPENAI_API_KEY:
             openai.api_key = settings.OPENAI_API_KEY
-    
-    def _convert_to_supported_format(self, input_path: str) -> str:
-        """Convert audio file to mp3 format if needed."""
-        # Check if file is already in supported format
-        supported_extensions = ['.mp3', '.wav', '.ogg', '.webm', '.m4a', '.flac', '.mpeg', '.mpga', '.mp4', '.oga']
-        file_ext = os.path.splitext(input_path)[1].lower()
-        
-        # If it's m4a, convert to mp3 for better Whisper compatibility
-        if file_ext == '.m4a':
-            output_path = input_path.replace('.m4a', '.mp3')
-            try:
-                # Use ffmpeg to convert m4a to mp3
-                result = subprocess.run([
-                    'ffmpeg', '-i', input_path, '-acodec', 'mp3', '-ab', '128k', 
-                    output_path, '-y'
-                ], capture_output=True, text=True, timeout=30)
-                
-                if result.returncode == 0:
-                    print(f"Converted {input_path} to {output_path}")
-                    return output_path
-                else:
-                    print(f"FFmpeg conversion failed: {result.stderr}")
-                    return input_path
-            except subprocess.TimeoutExpired:
-                print("Audio conversion timed out")
-                return input_path
-            except Exception as e:
-                print(f"Error converting audio: {e}")
-                return input_path
-        
-        return input_path
+        self.engine: TranscriptionEngine = create_transcription_engine(settings.TRANSCRIPTION_ENGINE)
+        # Transcriptions in progress, so concurrent retries of one upload share the work
+        self._in_flight: Dict[str, asyncio.Future] = {}
 
-    async def transcribe_audio(self, audio_file_path: str) -> Optional[str]:
+    async def transcribe_audio(self, audio_file_path: str, content_hash: Optional[str] = None) -> Optional[str]:
         """
-        Convert audio file to text using OpenAI Whisper.
+        Convert audio file to text with the configured transcription engine.
         
         Args:
             audio_file_path: Path to the audio file
+            content_hash: SHA-256 of the file, computed here when not given
             
         Returns:
             Transcribed text or None if transcription fails
         """
-        if not openai.api_key:
-            print("OpenAI API key not configured, skipping transcription")
-            return None
-            
-        converted_path = None
+        if content_hash is None:
+            content_hash = await run_in_threadpool(hash_file, audio_file_path)
+        key = transcription_cache.make_key(content_hash, self.engine.name, self.engine.model_version)
+        
+        cached = await transcription_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
         try:
-            # Convert to supported format if needed
-            converted_path = self._convert_to_supported_format(audio_file_path)
-            
-            # Open the audio file
-            with open(converted_path, "rb") as audio_file:
-                # Call Whisper API
-                transcript = openai.Audio.transcribe(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
-                )
-                
-            # Return the transcribed text
-            return transcript.strip() if transcript else None
-            
-        except Exception as e:
-            print(f"Error transcribing audio: {e}")
-            return None
+            transcript = await self.engine.transcribe(audio_file_path)
+            if transcript:
+                await transcription_cache.set(key, transcript)
+            future.set_result(transcript)
+            return transcript
         finally:
-            # Clean up converted file if it was created
-            if converted_path and converted_path != audio_file_path and os.path.exists(converted_path):
-                try:
-                    os.remove(converted_path)
-                    print(f"Cleaned up converted file: {converted_path}")
-                except Exception as e:
-                    print(f"Warning: Could not delete converted file: {e}")
+            self._in_flight.pop(key, None)
+            if not future.done():
+                future.set_result(None)  # Cancelled; waiters see a failed transcription
 
 # Global service instance
-openai_service = OpenAIService()
\ No newline at end of file
+openai_service = OpenAIService()
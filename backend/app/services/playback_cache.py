@@ -0,0 +1,86 @@
+"""Per-user cache of the current Spotify playback.
+
+The Android client polls playback every few seconds. Snapshots are kept
+for a short TTL, concurrent polls of one user share a single upstream call,
+and cached reads move `progress_ms` forward by the time elapsed since the
+snapshot was taken, so positions stay accurate between refreshes.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+Playback = Optional[Dict[str, Any]]
+
+
+class PlaybackCache:
+    """Short-lived playback snapshots with single-flight refreshes."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        # user_id -> (snapshot or None, monotonic time it was fetched)
+        self._snapshots = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._in_flight: Dict[int, asyncio.Future] = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    async def get(self, user_id: int, fetch: Callable[[], Awaitable[Playback]]) -> Playback:
+        """Return the user's playback, calling `fetch` only when no fresh snapshot exists.
+
+        "Nothing playing" (None) is cached as well.
+        """
+        entry = self._snapshots.get(user_id)
+        if entry is not None:
+            return estimate_progress(*entry)
+
+        in_flight = self._in_flight.get(user_id)
+        if in_flight is not None:
+            self.coalesced += 1
+            return estimate_progress(*await asyncio.shield(in_flight))
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[user_id] = future
+        try:
+            self.upstream_calls += 1
+            entry = (await fetch(), time.monotonic())
+            self._snapshots.set(user_id, entry)
+            future.set_result(entry)
+            return entry[0]
+        finally:
+            self._in_flight.pop(user_id, None)
+            if not future.done():
+                future.set_result((None, time.monotonic()))  # Cancelled or failed; waiters see nothing playing
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop a user's snapshot, e.g. after their Spotify token changed."""
+        self._snapshots.delete(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        cache = self._snapshots.stats()
+        return {
+            "entries": cache["entries"],
+            "hits": cache["hits"],
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+
+def estimate_progress(snapshot: Playback, fetched_at: float) -> Playback:
+    """A copy of the snapshot with progress advanced to now while playing."""
+    if not snapshot or not snapshot.get("is_playing"):
+        return snapshot
+
+    progress_ms = (snapshot.get("progress_ms") or 0) + int((time.monotonic() - fetched_at) * 1000)
+    duration_ms = snapshot.get("duration_ms")
+    if duration_ms:
+        progress_ms = min(progress_ms, duration_ms)
+    return {**snapshot, "progress_ms": progress_ms}
+
+
+# Global cache instance
+playback_cache = PlaybackCache(
+    ttl_seconds=settings.SPOTIFY_PLAYBACK_CACHE_TTL_SECONDS,
+    max_entries=settings.SPOTIFY_PLAYBACK_CACHE_MAX_ENTRIES
+)
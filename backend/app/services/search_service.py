@@ -0,0 +1,188 @@
+"""Full-text search over a user's bookmarks.
+
+Both backends accept the same web-search style syntax: words are ANDed,
+"quoted phrases" match in order, `or` between terms means either, and a
+leading `-` excludes a term. Results are ranked (higher is better), carry a
+highlighted snippet and are paged with a (rank, id) cursor.
+"""
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, cast, column, func, literal_column, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import dialect_name
+from app.core.pagination import decode_cursor, encode_cursor, keyset_after
+from app.models.bookmark import Bookmark
+from app.models.bookmark_search import (
+    SEARCH_CONFIG,
+    SEARCH_DOCUMENT_SQL,
+    SEARCH_WEIGHTS,
+    SNIPPET_SOURCE_SQL,
+    SQLITE_FTS_TABLE,
+)
+from app.services.bookmark_serializer import columns_for, row_to_dict
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHT_START = "<b>"
+HIGHLIGHT_STOP = "</b>"
+SNIPPET_WORDS = 16
+
+# bm25 column weights for SQLite, matching the tsvector weights on PostgreSQL
+_BM25_WEIGHTS = {"A": 4.0, "B": 2.0, "C": 1.0}
+
+_TOKEN_RE = re.compile(r'(-?)"([^"]*)"?|(\S+)')
+
+_fts_table = table(SQLITE_FTS_TABLE, column("rowid"))
+
+
+class InvalidSearchQueryError(ValueError):
+    """Raised for queries with nothing to search for."""
+
+
+def fts5_query(query: str) -> str:
+    """Translate web-search syntax into an FTS5 MATCH expression.
+
+    Every term is quoted, so FTS5 operators and punctuation typed by users
+    are searched for literally instead of causing syntax errors.
+    """
+    groups: List[List[str]] = [[]]
+    excluded: List[str] = []
+    for negated, phrase, word in _TOKEN_RE.findall(query):
+        if word:
+            if word.lower() == "or":
+                if groups[-1]:
+                    groups.append([])
+                continue
+            negated, phrase = ("-", word[1:]) if word.startswith("-") else ("", word)
+        if not phrase.strip():
+            continue
+        term = '"' + phrase.replace('"', '""') + '"'
+        (excluded if negated else groups[-1]).append(term)
+
+    alternatives = [" ".join(group) for group in groups if group]
+    if not alternatives:
+        raise InvalidSearchQueryError("Search query needs at least one term")
+    expression = " OR ".join(alternatives)
+    if excluded:
+        expression = f"({expression}) NOT " + " NOT ".join(excluded)
+    return expression
+
+
+class SearchService:
+    """Ranked full-text search with highlighted snippets and cursor paging."""
+
+    def __init__(self):
+        self.searches = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+
+    async def search(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        query: str,
+        field_names: List[str],
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return one page of matches and the cursor of the next page, if any.
+
+        Each result holds the requested fields plus `rank` and `snippet`.
+        Raises InvalidSearchQueryError or InvalidCursorError.
+        """
+        match_expression = fts5_query(query)
+        after = decode_cursor(cursor, 2) if cursor else None
+
+        started_at = time.perf_counter()
+        if dialect_name(db) == "postgresql":
+            statement = self._postgresql_statement(user_id, query, field_names, limit + 1, after)
+        else:
+            statement = self._sqlite_statement(user_id, match_expression, field_names, limit + 1, after)
+        rows = (await db.execute(statement)).all()
+        self._record(time.perf_counter() - started_at)
+
+        # One extra row tells whether another page exists
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].rank, rows[-1].id)
+
+        results = []
+        for row in rows:
+            result = row_to_dict(row, field_names)
+            result["rank"] = row.rank
+            result["snippet"] = row.snippet
+            results.append(result)
+        return results, next_cursor
+
+    def _postgresql_statement(self, user_id, query, field_names, limit, after):
+        document = literal_column(f"({SEARCH_DOCUMENT_SQL})")
+        config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        ts_query = func.websearch_to_tsquery(config, query)
+        # Cast so the cursor round-trips exactly; ts_rank_cd returns real
+        rank = cast(func.ts_rank_cd(document, ts_query), Float)
+
+        # Rank and page on ids first; headlines are costly and only built for the page
+        matches = select(Bookmark.id.label("id"), rank.label("rank")).where(
+            Bookmark.user_id == user_id,
+            document.op("@@")(ts_query)
+        )
+        if after:
+            matches = matches.where(keyset_after("postgresql", (rank, Bookmark.id), after))
+        matches = matches.order_by(rank.desc(), Bookmark.id.desc()).limit(limit).subquery()
+
+        snippet = func.ts_headline(
+            config,
+            literal_column(SNIPPET_SOURCE_SQL),
+            ts_query,
+            f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+            f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 3}, MaxFragments=2"
+        )
+        return select(
+            *columns_for(field_names),
+            matches.c.rank,
+            snippet.label("snippet")
+        ).join(matches, Bookmark.id == matches.c.id).order_by(
+            matches.c.rank.desc(), Bookmark.id.desc()
+        )
+
+    def _sqlite_statement(self, user_id, match_expression, field_names, limit, after):
+        fts = literal_column(SQLITE_FTS_TABLE)
+        weights = [_BM25_WEIGHTS[weight] for weight in SEARCH_WEIGHTS.values()]
+        # bm25() is lower-is-better; negate it so both backends sort rank descending
+        rank = -func.bm25(fts, *weights)
+        snippet = func.snippet(fts, -1, HIGHLIGHT_START, HIGHLIGHT_STOP, "…", SNIPPET_WORDS)
+
+        statement = select(
+            *columns_for(field_names),
+            rank.label("rank"),
+            snippet.label("snippet")
+        ).select_from(Bookmark).join(_fts_table, _fts_table.c.rowid == Bookmark.id).where(
+            fts.op("MATCH")(match_expression),
+            Bookmark.user_id == user_id
+        )
+        if after:
+            statement = statement.where(keyset_after("sqlite", (rank, Bookmark.id), after))
+        return statement.order_by(rank.desc(), Bookmark.id.desc()).limit(limit)
+
+    def _record(self, seconds: float) -> None:
+        elapsed_ms = seconds * 1000
+        self.searches += 1
+        self.total_ms += elapsed_ms
+        self.slowest_ms = max(self.slowest_ms, elapsed_ms)
+        logger.debug(f"Bookmark search took {elapsed_ms:.1f} ms")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "searches": self.searches,
+            "avg_ms": round(self.total_ms / self.searches, 2) if self.searches else 0.0,
+            "slowest_ms": round(self.slowest_ms, 2),
+        }
+
+
+# Global service instance
+search_service = SearchService()
@@ -0,0 +1,186 @@
+"""Shared async HTTP client for the Spotify Web API.
+
+One pooled, keep-alive httpx client per worker instead of a new spotipy
+object (and TLS handshake) per call. Every call has a timeout; 429
+responses are retried after the advertised Retry-After when that is short,
+and fail fast for everyone while a long rate limit window is open.
+"""
+import asyncio
+import base64
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+API_BASE_URL = "https://api.spotify.com/v1"
+TOKEN_URL = "https://accounts.spotify.com/api/token"
+
+
+class SpotifyAPIError(Exception):
+    """Raised when Spotify answers with an error status."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Spotify API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class SpotifyRateLimitedError(SpotifyAPIError):
+    """Raised when Spotify asks us to back off for longer than we wait inline."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(429, f"rate limited, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class SpotifyClient:
+    """Pooled async client with per-call timeouts and Retry-After handling."""
+
+    def __init__(
+        self,
+        timeout_seconds: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        max_retries: int,
+        max_retry_after_seconds: float
+    ):
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_retries = max_retries
+        self.max_retry_after_seconds = max_retry_after_seconds
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._rate_limited_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.total_ms = 0.0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=API_BASE_URL,
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections
+                )
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(
+        self,
+        path: str,
+        access_token: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """GET a Web API path; returns None for 204 No Content."""
+        response = await self._request(
+            "GET",
+            path,
+            headers={"Authorization": f"Bearer {access_token}"},
+            params=params,
+            timeout=timeout
+        )
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    async def request_token(self, data: Dict[str, str], client_id: str, client_secret: str) -> Dict[str, Any]:
+        """POST to the accounts token endpoint (code exchange or refresh)."""
+        credentials = f"{client_id}:{client_secret}"
+        response = await self._request(
+            "POST",
+            TOKEN_URL,
+            headers={"Authorization": "Basic " + base64.b64encode(credentials.encode()).decode()},
+            data=data
+        )
+        return response.json()
+
+    async def _request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            wait = self._rate_limited_until - time.monotonic()
+            if wait > 0:
+                raise SpotifyRateLimitedError(wait)
+
+            started_at = time.perf_counter()
+            self.requests += 1
+            try:
+                response = await self.client.request(
+                    method, url, timeout=timeout or self.timeout_seconds, **kwargs
+                )
+            except httpx.TimeoutException:
+                self.timeouts += 1
+                raise
+            finally:
+                self.total_ms += (time.perf_counter() - started_at) * 1000
+
+            if response.status_code != 429:
+                if response.status_code >= 400:
+                    self.errors += 1
+                    raise SpotifyAPIError(response.status_code, _error_message(response))
+                return response
+
+            self.rate_limited += 1
+            retry_after = _retry_after(response)
+            if retry_after > self.max_retry_after_seconds or attempt == self.max_retries:
+                # Spotify limits per app, so every request would get the same answer
+                self._rate_limited_until = time.monotonic() + retry_after
+                raise SpotifyRateLimitedError(retry_after)
+            self.retries += 1
+            logger.info(f"Spotify rate limited {method} {url}, retrying in {retry_after}s")
+            await asyncio.sleep(retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "avg_latency_ms": round(self.total_ms / self.requests, 1) if self.requests else 0.0,
+            "rate_limited_for_s": round(max(0.0, self._rate_limited_until - time.monotonic()), 1),
+        }
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "1")))
+    except ValueError:
+        return 1.0
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        body = response.json()
+    except ValueError:
+        return response.text[:200]
+    error = body.get("error") if isinstance(body, dict) else body
+    if isinstance(error, dict):
+        return error.get("message", "")
+    return str(error)
+
+
+# Global client instance
+spotify_client = SpotifyClient(
+    timeout_seconds=settings.SPOTIFY_API_TIMEOUT_SECONDS,
+    max_connections=settings.SPOTIFY_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.SPOTIFY_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    max_retries=settings.SPOTIFY_MAX_RETRIES,
+    max_retry_after_seconds=settings.SPOTIFY_MAX_RETRY_AFTER_SECONDS
+)
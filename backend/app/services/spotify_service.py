@@ -3,12 +3,13 @@
 Simple is better than complex.
 Explicit is better than implicit.
 """
-import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 from typing import Optional, Dict, Any
+import asyncio
 import logging
 
 from app.core.config import settings
+from app.services.spotify_client import SpotifyAPIError, spotify_client
 
 logger = logging.getLogger(__name__)
 
@@ -36,84 +37,46 @@ class SpotifyService:
         auth_manager = self.get_auth_manager()
         return auth_manager.get_authorize_url()
     
-    def get_access_token(self, code: str) -> Optional[str]:
-        """Exchange authorization code for access token."""
+    async def exchange_code(self, code: str) -> Optional[Dict[str, Any]]:
+        """Exchange authorization code for access token, refresh token and expiry."""
         try:
-            auth_manager = self.get_auth_manager()
-            token_info = auth_manager.get_access_token(code)
-            return token_info.get('access_token') if token_info else None
+            token_info = await spotify_client.request_token(
+                {"grant_type": "authorization_code", "code": code, "redirect_uri": self.redirect_uri},
+                self.client_id,
+                self.client_secret
+            )
+            return token_info if token_info and token_info.get('access_token') else None
         except Exception as e:
             logger.error(f"Error getting Spotify access token: {e}")
             return None
     
-    def get_current_playback(self, access_token: str) -> Optional[Dict[str, Any]]:
-        """Get current playback status from Spotify."""
+    async def get_current_playback(self, access_token: str) -> Optional[Dict[str, Any]]:
+        """Get current playback status from Spotify.
+
+        A rejected token (401) is raised so the caller can renew it; other
+        errors count as nothing playing.
+        """
         try:
-            sp = spotipy.Spotify(auth=access_token)
-            current = sp.current_playback()
-            
-            # Debug logging
-            print(f"DEBUG: Spotify current playback: {current is not None}")
-            if current:
-                print(f"DEBUG: Is playing: {current.get('is_playing')}")
-                print(f"DEBUG: Current keys: {list(current.keys())}")
-                item = current.get('item')
-                if item:
-                    print(f"DEBUG: Item type: {item.get('type')}")
-                    print(f"DEBUG: Item name: {item.get('name')}")
-                else:
-                    print("DEBUG: No item in current playbook - trying alternative methods...")
-                    print(f"DEBUG: Currently playing type: {current.get('currently_playing_type')}")
-                    print(f"DEBUG: Is private session: {current.get('device', {}).get('is_private_session')}")
-                    # This is a known Spotify API issue - item returns null for podcasts
-                    # Try to get recently played items as fallback to find episode info
-                    try:
-                        sp_alt = spotipy.Spotify(auth=access_token)
-                        
-                        # First try currently_playing endpoint
-                        currently_playing = sp_alt.currently_playing()
-                        if currently_playing and currently_playing.get('item'):
-                            print(f"DEBUG: Found item via currently_playing: {currently_playing['item'].get('name')}")
-                            current['item'] = currently_playing['item']
-                        else:
-                            # Try recent tracks to get the most recent episode
-                            print(f"DEBUG: Trying recently played tracks to find episode...")
-                            recent_tracks = sp_alt.current_user_recently_played(limit=10)
-                            
-                            if recent_tracks and recent_tracks.get('items'):
-                                # Look for the most recent episode that matches the current playing type
-                                for recent_item in recent_tracks['items']:
-                                    track = recent_item.get('track', {})
-                                    if (track.get('type') == 'episode' and 
-                                        currently_playing_type == 'episode'):
-                                        print(f"DEBUG: Found recent episode: {track.get('name')}")
-                                        current['item'] = track
-                                        break
-                                
-                                if not current.get('item'):
-                                    print(f"DEBUG: No matching episode found in recent tracks")
-                            else:
-                                print(f"DEBUG: No recent tracks available")
-                            
-                            print(f"DEBUG: Full current data: {current}")
-                    except Exception as alt_error:
-                        print(f"DEBUG: Alternative method failed: {alt_error}")
-                        print(f"DEBUG: Full current data: {current}")
-            else:
-                print("DEBUG: No current playback data")
-            
+            current = await spotify_client.get(
+                "/me/player", access_token, params={"additional_types": "episode"}
+            )
             if not current:
+                logger.debug("No current playback data")
                 return None
             
             # Handle case where item is None but we know it's playing something
-            item = current.get('item')
             currently_playing_type = current.get('currently_playing_type')
-            progress_ms = current.get('progress_ms', 0)
-            is_playing = current.get('is_playing', False)
+            if not current.get('item'):
+                # This is a known Spotify API issue - item can be null for podcasts
+                logger.debug(f"No item in current playback ({currently_playing_type}), trying fallbacks")
+                current['item'] = await self._find_playing_item(access_token, currently_playing_type)
+            
+            item = current.get('item')
+            progress_ms = current.get('progress_ms') or 0
             
             # If we have progress but no item, create a placeholder response
             if not item and currently_playing_type and progress_ms > 0:
-                print(f"DEBUG: Creating placeholder for {currently_playing_type}")
+                logger.debug(f"Creating placeholder for {currently_playing_type}")
                 return self._format_placeholder_playback(current, currently_playing_type)
             
             if not item:
@@ -130,10 +93,42 @@ class SpotifyService:
                 logger.warning(f"Unknown Spotify item type: {item.get('type')}")
                 return None
                 
+        except SpotifyAPIError as e:
+            if e.status_code == 401:
+                raise
+            logger.error(f"Error getting Spotify playback: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error getting Spotify playback: {e}")
             return None
     
+    async def _find_playing_item(self, access_token: str, currently_playing_type: Optional[str]) -> Optional[Dict]:
+        """Look the playing item up via currently-playing and recently-played, concurrently."""
+        currently_playing, recent_tracks = await asyncio.gather(
+            spotify_client.get(
+                "/me/player/currently-playing", access_token, params={"additional_types": "episode"}
+            ),
+            spotify_client.get("/me/player/recently-played", access_token, params={"limit": 10}),
+            return_exceptions=True
+        )
+        
+        if isinstance(currently_playing, dict) and currently_playing.get('item'):
+            logger.debug(f"Found item via currently_playing: {currently_playing['item'].get('name')}")
+            return currently_playing['item']
+        if isinstance(currently_playing, Exception):
+            logger.debug(f"currently_playing lookup failed: {currently_playing}")
+        
+        # Fall back to the most recent episode when an episode is playing
+        if isinstance(recent_tracks, dict) and currently_playing_type == 'episode':
+            for recent_item in recent_tracks.get('items', []):
+                track = recent_item.get('track') or {}
+                if track.get('type') == 'episode':
+                    logger.debug(f"Found recent episode: {track.get('name')}")
+                    return track
+        if isinstance(recent_tracks, Exception):
+            logger.debug(f"recently_played lookup failed: {recent_tracks}")
+        return None
+    
     def _format_podcast_playback(self, current: Dict, episode: Dict) -> Dict[str, Any]:
         """Format podcast playback information."""
         show = episode.get('show', {})
@@ -198,37 +193,6 @@ class SpotifyService:
             'release_date': None,
             'images': []
         }
-    
-    def get_episode_details(self, access_token: str, episode_id: str) -> Optional[Dict[str, Any]]:
-        """Get detailed episode information."""
-        try:
-            sp = spotipy.Spotify(auth=access_token)
-            episode = sp.episode(episode_id)
-            return self._format_episode_details(episode)
-        except Exception as e:
-            logger.error(f"Error getting episode details: {e}")
-            return None
-    
-    def _format_episode_details(self, episode: Dict) -> Dict[str, Any]:
-        """Format episode details."""
-        show = episode.get('show', {})
-        
-        return {
-            'id': episode.get('id'),
-            'name': episode.get('name'),
-            'description': episode.get('description'),
-            'duration_ms': episode.get('duration_ms'),
-            'release_date': episode.get('release_date'),
-            'uri': episode.get('uri'),
-            'external_urls': episode.get('external_urls', {}),
-            'images': episode.get('images', []),
-            'podcast': {
-                'name': show.get('name'),
-                'publisher': show.get('publisher'),
-                'description': show.get('description'),
-                'images': show.get('images', [])
-            }
-        }
 
 
 # Global service instance
@@ -0,0 +1,236 @@
+"""Per-user Spotify access tokens, refreshed before they expire.
+
+Tokens are persisted on the user row and kept in memory per worker, so
+callers get a usable token without a database read. A token that expires
+within the refresh margin is renewed with the stored refresh token;
+concurrent callers for the same user share one refresh. A token Spotify
+rejects early (revoked, or expired before its stated time) is renewed the
+same way by `call_with_token`.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, TypeVar
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import side_session
+from app.models.user import User
+from app.services.spotify_client import SpotifyAPIError, spotify_client
+from app.services.spotify_service import spotify_service
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SpotifyToken(NamedTuple):
+    access_token: str
+    refresh_token: Optional[str]
+    expires_at: Optional[float]  # Unix time; None when unknown
+
+    def expires_within(self, seconds: float) -> bool:
+        return self.expires_at is not None and self.expires_at - time.time() <= seconds
+
+
+class SpotifyTokenManager:
+    """Cached, proactively refreshed Spotify tokens with single-flight refreshes."""
+
+    def __init__(self, refresh_margin_seconds: int, max_entries: int):
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._tokens = LRUCache(max_entries=max_entries)
+        self._in_flight: Dict[int, asyncio.Future] = {}
+        self.hits = 0
+        self.loads = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    async def store(self, db: AsyncSession, user: User, token_info: Dict[str, Any]) -> SpotifyToken:
+        """Persist a token response (code exchange or refresh) on the user and commit."""
+        token = _token_from_response(token_info, user.spotify_refresh_token)
+        user.spotify_access_token = token.access_token
+        user.spotify_refresh_token = token.refresh_token
+        user.spotify_token_expires_at = _to_datetime(token.expires_at)
+        await db.commit()
+        self._tokens.set(user.id, token)
+        return token
+
+    async def get_access_token(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        rejected: Optional[str] = None
+    ) -> Optional[str]:
+        """A token valid for at least the refresh margin, or None if the user has none.
+
+        `rejected` is a token Spotify refused; it is renewed even if not due.
+        `db` is only used on a cache miss or when a refresh is due.
+        """
+        token = self._tokens.get(user_id)
+        if token is not None and not _stale(token, self.refresh_margin_seconds, rejected):
+            self.hits += 1
+            return token.access_token
+
+        in_flight = self._in_flight.get(user_id)
+        if in_flight is not None:
+            self.coalesced += 1
+            token = await asyncio.shield(in_flight)
+            return token.access_token if token else None
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[user_id] = future
+        try:
+            token = await self._load_or_refresh(db, user_id, token, rejected)
+            future.set_result(token)
+            return token.access_token if token else None
+        finally:
+            self._in_flight.pop(user_id, None)
+            if not future.done():
+                future.set_result(None)  # Failed; waiters get no token
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget the cached token, e.g. after Spotify rejected it."""
+        self._tokens.delete(user_id)
+
+    async def call_with_token(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        call: Callable[[str], Awaitable[T]]
+    ) -> Optional[T]:
+        """Run `call(access_token)`, renewing the token and retrying once if Spotify answers 401.
+
+        Returns None when the user has no token. A second 401 is raised.
+        """
+        access_token = await self.get_access_token(db, user_id)
+        if not access_token:
+            return None
+        try:
+            return await call(access_token)
+        except SpotifyAPIError as e:
+            if e.status_code != 401:
+                raise
+            self.rejected += 1
+            logger.info(f"Spotify rejected the token of user {user_id}, renewing it")
+        self.invalidate(user_id)
+        access_token = await self.get_access_token(db, user_id, rejected=access_token)
+        if not access_token:
+            raise SpotifyAPIError(401, "access token rejected and could not be renewed")
+        return await call(access_token)
+
+    async def _load_or_refresh(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        cached: Optional[SpotifyToken],
+        rejected: Optional[str] = None
+    ) -> Optional[SpotifyToken]:
+        token = cached
+        if token is None:
+            token = await self._load(db, user_id)
+            if token is None:
+                return None
+            # Another worker may already have replaced a rejected token
+            if not _stale(token, self.refresh_margin_seconds, rejected):
+                self._tokens.set(user_id, token)
+                return token
+
+        if not token.refresh_token:
+            # Cannot renew; still usable until it actually expires, unless Spotify refused it
+            return None if token.expires_within(0) or token.access_token == rejected else token
+
+        try:
+            return await self._refresh(db, user_id, token)
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning(f"Spotify token refresh failed for user {user_id}: {e}")
+            if cached is not None:
+                # Another worker may have refreshed (and rotated) it already
+                stored = await self._load(db, user_id)
+                if stored is not None and not stored.expires_within(0) and stored.access_token != rejected:
+                    self._tokens.set(user_id, stored)
+                    return stored
+            self._tokens.delete(user_id)
+            return None if token.expires_within(0) or token.access_token == rejected else token
+
+    async def _load(self, db: AsyncSession, user_id: int) -> Optional[SpotifyToken]:
+        self.loads += 1
+        user = await db.get(User, user_id, populate_existing=True)
+        if not user or not user.spotify_access_token:
+            return None
+        return SpotifyToken(
+            access_token=user.spotify_access_token,
+            refresh_token=user.spotify_refresh_token,
+            expires_at=_to_timestamp(user.spotify_token_expires_at)
+        )
+
+    async def _refresh(self, db: AsyncSession, user_id: int, token: SpotifyToken) -> SpotifyToken:
+        self.refreshes += 1
+        token_info = await spotify_client.request_token(
+            {"grant_type": "refresh_token", "refresh_token": token.refresh_token},
+            spotify_service.client_id,
+            spotify_service.client_secret
+        )
+        refreshed = _token_from_response(token_info, token.refresh_token)
+        # Callers refresh in the middle of their own work; commit only the token
+        async with side_session(db) as token_db:
+            await token_db.execute(update(User).where(User.id == user_id).values(
+                spotify_access_token=refreshed.access_token,
+                spotify_refresh_token=refreshed.refresh_token,
+                spotify_token_expires_at=_to_datetime(refreshed.expires_at)
+            ))
+            await token_db.commit()
+        self._tokens.set(user_id, refreshed)
+        logger.debug(f"Refreshed Spotify token for user {user_id}")
+        return refreshed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._tokens),
+            "hits": self.hits,
+            "loads": self.loads,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "in_flight": len(self._in_flight),
+        }
+
+
+def _stale(token: SpotifyToken, margin_seconds: float, rejected: Optional[str]) -> bool:
+    return token.access_token == rejected or token.expires_within(margin_seconds)
+
+
+def _token_from_response(token_info: Dict[str, Any], previous_refresh_token: Optional[str]) -> SpotifyToken:
+    expires_in = token_info.get("expires_in")
+    return SpotifyToken(
+        access_token=token_info["access_token"],
+        # Refresh responses only carry a refresh token when Spotify rotates it
+        refresh_token=token_info.get("refresh_token") or previous_refresh_token,
+        expires_at=time.time() + float(expires_in) if expires_in else None
+    )
+
+
+def _to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp is not None else None
+
+
+def _to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # SQLite drops the zone
+    return value.timestamp()
+
+
+# Global service instance
+spotify_tokens = SpotifyTokenManager(
+    refresh_margin_seconds=settings.SPOTIFY_TOKEN_REFRESH_MARGIN_SECONDS,
+    max_entries=settings.SPOTIFY_TOKEN_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,431 @@
+"""Batched AI summaries of bookmarks.
+
+Bookmarks are submitted once their transcript or context is ready. After
+SUMMARY_BATCH_WINDOW_MS the pending ones are loaded together, grouped by
+episode and packed into as few LLM requests as the token budget allows,
+with each episode's context (podcast, episode, description) sent once per
+request rather than once per bookmark. Summaries are cached by a hash of
+everything they depend on, so re-submitting an unchanged bookmark is free.
+Calls run under a concurrency cap and a requests/tokens per minute limit.
+
+Pending bookmarks live in process memory. On startup `recover` summarizes
+the bookmarks that have text but no summary, such as those still pending
+when the last process stopped; on PostgreSQL an advisory lock lets one
+worker process do this while the others skip it.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import bindparam, or_, select, text, update
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, dialect_name
+from app.models.bookmark import Bookmark, TRANSCRIPTION_PENDING, TRANSCRIPTION_PROCESSING
+from app.models.bookmark_change import record_changes
+from app.models.podcast import PodcastEpisode
+from app.services.episode_metadata import episode_key
+from app.services.summary_backends import (
+    PROMPT_VERSION, SYSTEM_PROMPT, EpisodeSection, SummaryBackend, SummaryItem, SummaryRequest,
+    create_summary_backend, estimate_tokens
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_FIELD_CHARS = 2000  # Per note, voice note or context window
+MAX_DESCRIPTION_CHARS = 600
+
+RECOVERY_BATCH_SIZE = 200
+
+# Held while one process recovers, released when its transaction ends
+_RECOVERY_LOCK_KEY = 0x504F4D4153554D4D
+_RECOVERY_LOCK_SQL = text("SELECT pg_try_advisory_xact_lock(:key)")
+
+
+def _has_text(column):
+    return (column.isnot(None)) & (column != "")
+
+
+# Bookmarks that have something to summarize and will not be submitted by a running transcription
+NEEDS_SUMMARY = (
+    Bookmark.ai_summary.is_(None)
+    & or_(
+        Bookmark.transcription_status.is_(None),
+        Bookmark.transcription_status.notin_([TRANSCRIPTION_PENDING, TRANSCRIPTION_PROCESSING])
+    )
+    & or_(*[_has_text(column) for column in (
+        Bookmark.user_note, Bookmark.transcript_text, Bookmark.context_before, Bookmark.context_after
+    )])
+)
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute; `acquire` waits for both."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated_at = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    async def acquire(self, tokens: int) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # A request larger than the bucket only has to wait for a full one
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                self._refill()
+                missing_requests = 1 - self._requests
+                missing_tokens = tokens - self._tokens
+                if missing_requests <= 0 and missing_tokens <= 0:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    missing_requests * 60 / self.requests_per_minute,
+                    missing_tokens * 60 / self.tokens_per_minute
+                )
+                self.waits += 1
+                self.wait_seconds += wait
+                await asyncio.sleep(wait)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+
+def bookmark_input(
+    user_note: Optional[str],
+    transcript_text: Optional[str],
+    context_before: Optional[str],
+    context_after: Optional[str]
+) -> str:
+    """The part of a summary request that belongs to one bookmark; empty if there is nothing to summarize."""
+    parts = []
+    for label, value in (
+        ("Note", user_note),
+        ("Voice note", transcript_text),
+        ("Before", context_before),
+        ("After", context_after),
+    ):
+        if value and value.strip():
+            parts.append(f"{label}: {value.strip()[:MAX_FIELD_CHARS]}")
+    return "\n".join(parts)
+
+
+def episode_context(podcast_name: str, episode_name: str, description: Optional[str]) -> str:
+    context = f"Podcast: {podcast_name}\nEpisode: {episode_name}"
+    if description:
+        context += f"\nAbout the episode: {description.strip()[:MAX_DESCRIPTION_CHARS]}"
+    return context
+
+
+def pack_requests(
+    sections: Iterable[EpisodeSection],
+    token_budget: int,
+    max_items: int
+) -> List[SummaryRequest]:
+    """Fill requests with whole episodes where possible, splitting large ones.
+
+    An episode's context is counted (and sent) once per request it appears
+    in; a bookmark larger than the budget still gets a request of its own.
+    """
+    requests: List[SummaryRequest] = []
+    current = SummaryRequest()
+    used = estimate_tokens(SYSTEM_PROMPT)
+    base = used
+    for section in sections:
+        context_tokens = estimate_tokens(section.context)
+        open_section: Optional[EpisodeSection] = None
+        for item in section.items:
+            cost = item.tokens + (context_tokens if open_section is None else 0)
+            if current.items and (used + cost > token_budget or len(current.items) >= max_items):
+                requests.append(current)
+                current, used, open_section = SummaryRequest(), base, None
+                cost = item.tokens + context_tokens
+            if open_section is None:
+                open_section = EpisodeSection(section.context)
+                current.sections.append(open_section)
+            open_section.items.append(item)
+            used += cost
+    if current.items:
+        requests.append(current)
+    return requests
+
+
+class Summarizer:
+    """Collects submitted bookmarks and summarizes them in batches."""
+
+    def __init__(
+        self,
+        backend: SummaryBackend,
+        token_budget: int,
+        max_items_per_request: int,
+        batch_window_ms: int,
+        concurrency: int,
+        limiter: RateLimiter,
+        cache_max_entries: int,
+        input_price_per_1k: float,
+        output_price_per_1k: float
+    ):
+        self.backend = backend
+        self.token_budget = token_budget
+        self.max_items_per_request = max(1, max_items_per_request)
+        self.batch_window = batch_window_ms / 1000
+        self.concurrency = max(1, concurrency)
+        self.limiter = limiter
+        self.input_price_per_1k = input_price_per_1k
+        self.output_price_per_1k = output_price_per_1k
+        self._cache = LRUCache(max_entries=cache_max_entries)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Set[int] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._recovery: Optional[asyncio.Task] = None
+
+        self.submitted = 0
+        self.recovered = 0
+        self.summarized = 0
+        self.cache_hits = 0
+        self.requests = 0
+        self.sent_items = 0
+        self.failed_requests = 0
+        self.missing = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.total_request_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the batching loop on the running event loop."""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="summarizer")
+
+    def start_recovery(self) -> None:
+        """Run `recover` in the background, so startup does not wait for the LLM."""
+        if self._recovery is None or self._recovery.done():
+            self._recovery = asyncio.create_task(self.recover(), name="summary-recovery")
+
+    async def stop(self) -> None:
+        """Stop the batching loop. Bookmarks still pending are left for `recover` on the next start."""
+        for task in (self._task, self._recovery):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._task = None
+        self._recovery = None
+        self._pending.clear()
+
+    async def recover(self) -> int:
+        """Summarize every bookmark that has text but no summary, in id order.
+
+        Returns how many bookmarks were looked at; 0 without a usable backend
+        or when another process holds the recovery lock. Bookmarks the backend
+        fails on keep no summary and are tried again on the next start.
+        """
+        if not self.backend.available:
+            return 0
+        recovered = 0
+        try:
+            async with AsyncSessionLocal() as lock_db:
+                if dialect_name(lock_db) == "postgresql" and not (
+                    await lock_db.execute(_RECOVERY_LOCK_SQL, {"key": _RECOVERY_LOCK_KEY})
+                ).scalar():
+                    return 0
+                last_id = 0
+                while True:
+                    async with AsyncSessionLocal() as db:
+                        bookmark_ids = (await db.execute(
+                            select(Bookmark.id).where(Bookmark.id > last_id, NEEDS_SUMMARY)
+                            .order_by(Bookmark.id).limit(RECOVERY_BATCH_SIZE)
+                        )).scalars().all()
+                    if not bookmark_ids:
+                        break
+                    last_id = bookmark_ids[-1]
+                    await self.summarize_bookmarks(bookmark_ids)
+                    recovered += len(bookmark_ids)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # A database that is not set up yet must not keep the app from starting
+            logger.error(f"Could not recover unsummarized bookmarks: {e}")
+        finally:
+            self.recovered += recovered
+        if recovered:
+            logger.info(f"Recovered summaries for {recovered} bookmarks")
+        return recovered
+
+    def submit(self, bookmark_id: int) -> None:
+        """Queue a bookmark for summarizing in the next batch; a no-op without a usable backend."""
+        if not self.backend.available:
+            return
+        if not self.running:
+            self.start()
+        self.submitted += 1
+        self._pending.add(bookmark_id)
+        self._wakeup.set()
+
+    async def summarize_items(self, sections: List[EpisodeSection]) -> Dict[int, str]:
+        """Summaries for the items of `sections`, from the cache or from batched backend calls."""
+        summaries: Dict[int, str] = {}
+        to_send: List[EpisodeSection] = []
+        for section in sections:
+            misses = []
+            for item in section.items:
+                cached = self._cache.get(item.content_hash)
+                if cached is not None:
+                    self.cache_hits += 1
+                    summaries[item.bookmark_id] = cached
+                else:
+                    misses.append(item)
+            if misses:
+                to_send.append(EpisodeSection(section.context, misses))
+
+        requests = pack_requests(to_send, self.token_budget, self.max_items_per_request)
+        for result in await asyncio.gather(*[self._send(request) for request in requests]):
+            summaries.update(result)
+        return summaries
+
+    def content_hash(self, context: str, text: str) -> str:
+        key = "\x00".join([self.backend.name, self.backend.model_version, PROMPT_VERSION, context, text])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    async def _send(self, request: SummaryRequest) -> Dict[int, str]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        items = request.items
+        async with self._semaphore:
+            await self.limiter.acquire(estimate_tokens(SYSTEM_PROMPT + request.render()))
+            started_at = time.perf_counter()
+            try:
+                result = await self.backend.summarize(request)
+            except Exception as e:
+                self.failed_requests += 1
+                logger.error(f"Summary request for {len(items)} bookmarks failed: {e}")
+                return {}
+            finally:
+                self.requests += 1
+                self.sent_items += len(items)
+                self.total_request_ms += (time.perf_counter() - started_at) * 1000
+
+        self.input_tokens += result.input_tokens
+        self.output_tokens += result.output_tokens
+        self.missing += sum(1 for item in items if item.bookmark_id not in result.summaries)
+        for item in items:
+            summary = result.summaries.get(item.bookmark_id)
+            if summary is not None:
+                self._cache.set(item.content_hash, summary)
+        return result.summaries
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.batch_window)
+            self._wakeup.clear()
+            bookmark_ids, self._pending = sorted(self._pending), set()
+            if not bookmark_ids:
+                continue
+            try:
+                await self.summarize_bookmarks(bookmark_ids)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Summarizing {len(bookmark_ids)} bookmarks failed: {e}")
+
+    async def summarize_bookmarks(self, bookmark_ids: List[int]) -> None:
+        """Load bookmarks, summarize them and store `ai_summary`."""
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(
+                    Bookmark.id, Bookmark.podcast_name, Bookmark.episode_name,
+                    Bookmark.spotify_episode_id, Bookmark.media_id, Bookmark.source_app_package, Bookmark.user_note,
+                    Bookmark.transcript_text, Bookmark.context_before, Bookmark.context_after,
+                    PodcastEpisode.description
+                ).outerjoin(PodcastEpisode, PodcastEpisode.id == Bookmark.spotify_episode_id)
+                .where(Bookmark.id.in_(bookmark_ids))
+            )).all()
+
+        sections: Dict[Any, EpisodeSection] = {}
+        for row in rows:
+            text = bookmark_input(row.user_note, row.transcript_text, row.context_before, row.context_after)
+            if not text:
+                continue
+            context = episode_context(row.podcast_name, row.episode_name, row.description)
+            key = (
+                episode_key(row.spotify_episode_id, row.media_id, row.source_app_package)
+                or (row.podcast_name, row.episode_name)
+            )
+            section = sections.setdefault(key, EpisodeSection(context))
+            section.items.append(SummaryItem(row.id, text, self.content_hash(context, text)))
+        if not sections:
+            return
+
+        summaries = await self.summarize_items(list(sections.values()))
+        if not summaries:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Bookmark).where(Bookmark.id == bindparam("bookmark_id"))
+                .values(ai_summary=bindparam("summary"))
+                .execution_options(synchronize_session=False),
+                [{"bookmark_id": bookmark_id, "summary": summary} for bookmark_id, summary in summaries.items()]
+            )
+            await record_changes(db, Bookmark.id.in_(list(summaries)))
+            await db.commit()
+        self.summarized += len(summaries)
+
+    def stats(self) -> Dict[str, Any]:
+        cost = (self.input_tokens * self.input_price_per_1k + self.output_tokens * self.output_price_per_1k) / 1000
+        return {
+            "backend": self.backend.name,
+            "available": self.backend.available,
+            "model": self.backend.model_version,
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "recovered": self.recovered,
+            "summarized": self.summarized,
+            "cache_hits": self.cache_hits,
+            "requests": self.requests,
+            "failed_requests": self.failed_requests,
+            "missing_summaries": self.missing,
+            "avg_bookmarks_per_request": round(self.sent_items / self.requests, 2) if self.requests else 0.0,
+            "avg_request_ms": round(self.total_request_ms / self.requests, 1) if self.requests else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "estimated_cost_usd": round(cost, 4),
+            "rate_limit_waits": self.limiter.waits,
+            "rate_limit_wait_seconds": round(self.limiter.wait_seconds, 1),
+        }
+
+
+# Global service instance
+summarizer = Summarizer(
+    backend=create_summary_backend(settings.SUMMARY_BACKEND),
+    token_budget=settings.SUMMARY_BATCH_TOKEN_BUDGET,
+    max_items_per_request=settings.SUMMARY_MAX_BOOKMARKS_PER_REQUEST,
+    batch_window_ms=settings.SUMMARY_BATCH_WINDOW_MS,
+    concurrency=settings.SUMMARY_CONCURRENCY,
+    limiter=RateLimiter(
+        requests_per_minute=settings.SUMMARY_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.SUMMARY_TOKENS_PER_MINUTE
+    ),
+    cache_max_entries=settings.SUMMARY_CACHE_MAX_ENTRIES,
+    input_price_per_1k=settings.SUMMARY_INPUT_PRICE_PER_1K_TOKENS,
+    output_price_per_1k=settings.SUMMARY_OUTPUT_PRICE_PER_1K_TOKENS
+)
@@ -0,0 +1,192 @@
+"""LLM backends for bookmark summaries.
+
+Every backend takes a `SummaryRequest` (one or more episodes, each with
+its shared context sent once, followed by its bookmarks) and returns one
+summary per bookmark together with the tokens it used, so throughput and
+cost are accounted the same way for all of them.
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import openai
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Changing the prompt must not serve summaries made with the old one
+PROMPT_VERSION = "1"
+
+SYSTEM_PROMPT = (
+    "You summarize podcast bookmarks. A listener saved each bookmark at a moment of an episode; "
+    "you get the episode once, then each bookmark's note, voice note and the transcript around it. "
+    "For every bookmark write one or two sentences (at most 40 words) on what made that moment worth saving. "
+    "Reply with a JSON object mapping each bookmark id to its summary."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English) for budgeting."""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class SummaryItem:
+    bookmark_id: int
+    text: str          # The bookmark's own input: notes and transcript context
+    content_hash: str  # Of everything the summary depends on, for the cache
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+@dataclass
+class EpisodeSection:
+    context: str  # Podcast, episode and description, shared by the items
+    items: List[SummaryItem] = field(default_factory=list)
+
+
+@dataclass
+class SummaryRequest:
+    sections: List[EpisodeSection] = field(default_factory=list)
+
+    @property
+    def items(self) -> List[SummaryItem]:
+        return [item for section in self.sections for item in section.items]
+
+    def render(self) -> str:
+        parts = []
+        for section in self.sections:
+            parts.append(section.context)
+            parts.extend(f"[Bookmark {item.bookmark_id}]\n{item.text}" for item in section.items)
+        return "\n\n".join(parts)
+
+
+@dataclass
+class SummaryResult:
+    summaries: Dict[int, str]
+    input_tokens: int
+    output_tokens: int
+
+
+class SummaryBackend:
+    """Base class for summary backends."""
+
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        """Whether the backend is configured well enough to be called."""
+        return True
+
+    @property
+    def model_version(self) -> str:
+        raise NotImplementedError
+
+    async def summarize(self, request: SummaryRequest) -> SummaryResult:
+        raise NotImplementedError
+
+
+class OpenAISummaryBackend(SummaryBackend):
+    """Chat completions through the OpenAI API, one call per request."""
+
+    name = "openai"
+
+    def __init__(self, model: str, max_tokens_per_summary: int):
+        self.model = model
+        self.max_tokens_per_summary = max_tokens_per_summary
+
+    @property
+    def available(self) -> bool:
+        return bool(openai.api_key)
+
+    @property
+    def model_version(self) -> str:
+        return self.model
+
+    async def summarize(self, request: SummaryRequest) -> SummaryResult:
+        if not openai.api_key:
+            raise RuntimeError("OpenAI API key not configured")
+
+        response = await openai.ChatCompletion.acreate(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": request.render()},
+            ],
+            temperature=0,
+            max_tokens=self.max_tokens_per_summary * len(request.items) + 20,
+            response_format={"type": "json_object"}
+        )
+        content = response["choices"][0]["message"]["content"]
+        return SummaryResult(
+            summaries=_parse_summaries(content, request),
+            input_tokens=response["usage"]["prompt_tokens"],
+            output_tokens=response["usage"]["completion_tokens"]
+        )
+
+
+class StubSummaryBackend(SummaryBackend):
+    """Deterministic offline backend for tests and benchmarks.
+
+    The "summary" is the first words of the bookmark's input. Latency and
+    token usage are modelled on a hosted model, so batching and rate limits
+    behave as they would against the real API.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms: float = 0.0, ms_per_1k_tokens: float = 0.0, summary_words: int = 30):
+        self.latency_ms = latency_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.summary_words = summary_words
+        self.calls = 0
+
+    @property
+    def model_version(self) -> str:
+        return f"stub-{self.summary_words}"
+
+    async def summarize(self, request: SummaryRequest) -> SummaryResult:
+        self.calls += 1
+        prompt = SYSTEM_PROMPT + request.render()
+        input_tokens = estimate_tokens(prompt)
+        summaries = {
+            item.bookmark_id: " ".join(item.text.split()[:self.summary_words])
+            for item in request.items
+        }
+        output_tokens = estimate_tokens(json.dumps(summaries))
+        delay = self.latency_ms + self.ms_per_1k_tokens * (input_tokens + output_tokens) / 1000
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        return SummaryResult(summaries, input_tokens, output_tokens)
+
+
+def _parse_summaries(content: str, request: SummaryRequest) -> Dict[int, str]:
+    try:
+        data = json.loads(content)
+    except ValueError:
+        logger.warning("Summary response is not JSON")
+        return {}
+    wanted = {str(item.bookmark_id): item.bookmark_id for item in request.items}
+    summaries: Dict[int, str] = {}
+    for key, value in data.items() if isinstance(data, dict) else []:
+        bookmark_id: Optional[int] = wanted.get(str(key).replace("Bookmark", "").strip())
+        if bookmark_id is not None and isinstance(value, str) and value.strip():
+            summaries[bookmark_id] = value.strip()
+    return summaries
+
+
+def create_summary_backend(name: str) -> SummaryBackend:
+    """Build the backend selected by SUMMARY_BACKEND."""
+    if name == "openai":
+        return OpenAISummaryBackend(
+            model=settings.SUMMARY_MODEL,
+            max_tokens_per_summary=settings.SUMMARY_MAX_TOKENS_PER_SUMMARY
+        )
+    if name == "stub":
+        return StubSummaryBackend()
+    raise ValueError(f"Unknown summary backend: {name}")
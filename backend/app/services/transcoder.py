@@ -0,0 +1,143 @@
+"""ffmpeg transcoding off the event loop.
+
+ffmpeg runs as an asyncio subprocess with its output piped back, so a
+conversion neither blocks the event loop nor leaves temporary files behind.
+A semaphore caps how many ffmpeg processes run at once.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TranscodeError(Exception):
+    """Raised when ffmpeg fails, times out or is not installed."""
+
+
+class Transcoder:
+    """Bounded pool of ffmpeg subprocesses."""
+
+    def __init__(self, max_processes: int, timeout_seconds: float):
+        self.max_processes = max(1, max_processes)
+        self.timeout_seconds = timeout_seconds
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self._waiting = 0
+        self._running = 0
+        self._conversions = 0
+        self._failures = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+        self._last_seconds = 0.0
+        self._total_wait_seconds = 0.0
+
+    async def to_mp3(self, input_path: str) -> bytes:
+        """Convert an audio file to mp3 and return the encoded bytes."""
+        return await self.run([
+            "-i", input_path, "-vn", "-acodec", "mp3", "-ab", "128k", "-f", "mp3", "pipe:1"
+        ])
+
+    async def extract_mp3(self, input_path: str, start_ms: int, duration_ms: int) -> bytes:
+        """Decode only [start_ms, start_ms + duration_ms) of a file into 16 kHz mono mp3.
+
+        `-ss` before `-i` seeks in the input instead of decoding up to the
+        start, so the cost follows the window, not the position in the file.
+        Past the end of the input the result is empty.
+        """
+        return await self.run([
+            "-ss", f"{start_ms / 1000:.3f}", "-t", f"{duration_ms / 1000:.3f}", "-i", input_path,
+            "-vn", "-ac", "1", "-ar", "16000", "-acodec", "mp3", "-ab", "32k", "-f", "mp3", "pipe:1"
+        ])
+
+    async def run(self, args: List[str], input_bytes: Optional[bytes] = None) -> bytes:
+        """Run ffmpeg with `args` and return what it wrote to stdout.
+
+        Pass `pipe:0` as an input in `args` to feed `input_bytes` on stdin.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_processes)
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        started_at = time.perf_counter()
+        self._total_wait_seconds += started_at - queued_at
+        self._running += 1
+        try:
+            output = await self._run_ffmpeg(args, input_bytes)
+        except Exception:
+            self._failures += 1
+            raise
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+            self._record(time.perf_counter() - started_at)
+        return output
+
+    async def _run_ffmpeg(self, args: List[str], input_bytes: Optional[bytes]) -> bytes:
+        command = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        if input_bytes is None:
+            command.append("-nostdin")
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                *args,
+                stdin=asyncio.subprocess.PIPE if input_bytes is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except FileNotFoundError:
+            raise TranscodeError("ffmpeg is not installed")
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(input_bytes),
+                timeout=self.timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise TranscodeError(f"ffmpeg timed out after {self.timeout_seconds}s")
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+
+        if process.returncode != 0:
+            raise TranscodeError(f"ffmpeg exited with {process.returncode}: {stderr.decode(errors='replace')[-500:]}")
+        return stdout
+
+    def _record(self, seconds: float) -> None:
+        self._conversions += 1
+        self._total_seconds += seconds
+        self._last_seconds = seconds
+        self._max_seconds = max(self._max_seconds, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        conversions = self._conversions or 1
+        return {
+            "max_processes": self.max_processes,
+            "running": self._running,
+            "queue_depth": self._waiting,
+            "conversions": self._conversions,
+            "failures": self._failures,
+            "avg_latency_ms": round(self._total_seconds / conversions * 1000, 1),
+            "max_latency_ms": round(self._max_seconds * 1000, 1),
+            "last_latency_ms": round(self._last_seconds * 1000, 1),
+            "avg_wait_ms": round(self._total_wait_seconds / conversions * 1000, 1),
+        }
+
+
+# Global transcoder instance
+transcoder = Transcoder(
+    max_processes=settings.FFMPEG_MAX_PROCESSES,
+    timeout_seconds=settings.FFMPEG_TIMEOUT_SECONDS
+)
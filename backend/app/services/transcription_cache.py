@@ -0,0 +1,95 @@
+"""Content-addressed transcript cache.
+
+A transcript is keyed by the SHA-256 of the audio bytes plus the engine and
+model that produced it, so retried uploads of the same voice note skip
+ffmpeg and Whisper entirely. Entries live in an in-process LRU bounded by
+size and, when REDIS_URL is set, in Redis where every worker can see them.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionCache:
+    """Two-level transcript cache: local LRU in front of optional Redis."""
+
+    def __init__(self, max_bytes: int, redis_url: Optional[str], redis_ttl_seconds: int):
+        self.local = LRUCache(max_bytes=max_bytes, sizeof=lambda text: len(text.encode("utf-8")))
+        self.redis_url = redis_url
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._redis = None
+        self.redis_hits = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def make_key(content_hash: str, engine: str, model_version: str) -> str:
+        return f"poma:transcript:{engine}:{model_version}:{content_hash}"
+
+    async def get(self, key: str) -> Optional[str]:
+        text = self.local.get(key)
+        if text is not None:
+            return text
+
+        redis = self._get_redis()
+        if redis is None:
+            return None
+        try:
+            value = await redis.get(key)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Transcript cache read from Redis failed: {e}")
+            return None
+        if value is None:
+            return None
+
+        text = value.decode("utf-8")
+        self.redis_hits += 1
+        self.local.set(key, text)
+        return text
+
+    async def set(self, key: str, text: str) -> None:
+        self.local.set(key, text)
+
+        redis = self._get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(key, text.encode("utf-8"), ex=self.redis_ttl_seconds)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"Transcript cache write to Redis failed: {e}")
+
+    def _get_redis(self):
+        if self._redis is None and self.redis_url:
+            import redis.asyncio
+
+            self._redis = redis.asyncio.from_url(self.redis_url)
+        return self._redis
+
+    def stats(self) -> Dict[str, Any]:
+        local = self.local.stats()
+        misses = local["misses"] - self.redis_hits
+        lookups = local["hits"] + local["misses"]
+        return {
+            "local_entries": local["entries"],
+            "local_bytes": local["bytes"],
+            "local_hits": local["hits"],
+            "redis_hits": self.redis_hits,
+            "misses": misses,
+            "evictions": local["evictions"],
+            "hit_rate": round((lookups - misses) / lookups, 3) if lookups else 0.0,
+            "redis_enabled": bool(self.redis_url),
+            "redis_errors": self.redis_errors,
+        }
+
+
+# Global cache instance
+transcription_cache = TranscriptionCache(
+    max_bytes=settings.TRANSCRIPTION_CACHE_MAX_BYTES,
+    redis_url=settings.REDIS_URL,
+    redis_ttl_seconds=settings.TRANSCRIPTION_CACHE_TTL_SECONDS
+)
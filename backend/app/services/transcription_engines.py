@@ -0,0 +1,208 @@
+"""Speech-to-text engines.
+
+Simple is better than complex.
+There should be one obvious way to do it: every engine implements
+`transcribe(audio_path)` and `transcribe_segments(audio_path)` and reports
+the same statistics.
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, List, NamedTuple, Optional
+
+import openai
+
+from app.core.config import settings
+from app.services.transcoder import TranscodeError, transcoder
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptSegment(NamedTuple):
+    """A stretch of speech, in milliseconds from the start of the transcribed audio."""
+    start_ms: int
+    end_ms: int
+    text: str
+
+
+class TranscriptionEngine:
+    """Base class for speech-to-text backends."""
+
+    name = "base"
+
+    def __init__(self):
+        self._requests = 0
+        self._failures = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+        self._first_started_at: Optional[float] = None
+        self._last_finished_at: Optional[float] = None
+
+    @property
+    def model_version(self) -> str:
+        """Identifies the model, so transcripts of different models never mix."""
+        raise NotImplementedError
+
+    async def transcribe(self, audio_path: str) -> Optional[str]:
+        """Transcribe an audio file, or return None if that is not possible."""
+        return await self._measure(self._transcribe(audio_path))
+
+    async def transcribe_segments(self, audio_path: str) -> Optional[List[TranscriptSegment]]:
+        """Transcribe an audio file into timed segments, or return None if that is not possible."""
+        return await self._measure(self._transcribe_segments(audio_path))
+
+    async def _measure(self, work: Awaitable[Any]) -> Any:
+        started_at = time.perf_counter()
+        if self._first_started_at is None:
+            self._first_started_at = started_at
+        try:
+            result = await work
+        except Exception as e:
+            self._failures += 1
+            logger.error(f"{self.name} transcription failed: {e}")
+            result = None
+        finally:
+            finished_at = time.perf_counter()
+            seconds = finished_at - started_at
+            self._requests += 1
+            self._total_seconds += seconds
+            self._max_seconds = max(self._max_seconds, seconds)
+            self._last_finished_at = finished_at
+        return result
+
+    async def _transcribe(self, audio_path: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def _transcribe_segments(self, audio_path: str) -> Optional[List[TranscriptSegment]]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self._requests or 1
+        elapsed = (self._last_finished_at or 0) - (self._first_started_at or 0)
+        return {
+            "engine": self.name,
+            "model": self.model_version,
+            "requests": self._requests,
+            "failures": self._failures,
+            "avg_latency_ms": round(self._total_seconds / requests * 1000, 1),
+            "max_latency_ms": round(self._max_seconds * 1000, 1),
+            "throughput_per_second": round(self._requests / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class OpenAIWhisperEngine(TranscriptionEngine):
+    """Whisper through the OpenAI API."""
+
+    name = "openai"
+    model = "whisper-1"
+
+    @property
+    def model_version(self) -> str:
+        return self.model
+
+    async def _transcribe(self, audio_path: str) -> Optional[str]:
+        if not openai.api_key:
+            logger.warning("OpenAI API key not configured, skipping transcription")
+            return None
+
+        # m4a converts to mp3 in memory for better Whisper compatibility
+        converted = None
+        if os.path.splitext(audio_path)[1].lower() == ".m4a":
+            try:
+                converted = await transcoder.to_mp3(audio_path)
+            except TranscodeError as e:
+                logger.warning(f"Audio conversion failed, sending original file: {e}")
+
+        if converted is not None:
+            transcript = await openai.Audio.atranscribe_raw(
+                model=self.model,
+                file=converted,
+                filename="audio.mp3",
+                response_format="text"
+            )
+        else:
+            with open(audio_path, "rb") as audio_file:
+                transcript = await openai.Audio.atranscribe(
+                    model=self.model,
+                    file=audio_file,
+                    response_format="text"
+                )
+
+        return transcript.strip() if transcript else None
+
+    async def _transcribe_segments(self, audio_path: str) -> Optional[List[TranscriptSegment]]:
+        if not openai.api_key:
+            return None
+
+        with open(audio_path, "rb") as audio_file:
+            result = await openai.Audio.atranscribe(
+                model=self.model,
+                file=audio_file,
+                response_format="verbose_json"
+            )
+        return [
+            TranscriptSegment(round(segment["start"] * 1000), round(segment["end"] * 1000), segment["text"].strip())
+            for segment in result.get("segments", [])
+            if segment["text"].strip()
+        ]
+
+
+class LocalWhisperEngine(TranscriptionEngine):
+    """Whisper on the local CPU through faster-whisper (CTranslate2).
+
+    The model is loaded once per worker process and runs on one inference
+    thread, one clip at a time; CTranslate2 already spreads each clip over
+    the CPU cores. Requires `pip install faster-whisper`.
+    """
+
+    name = "local"
+
+    def __init__(self, model_size: str, compute_type: str):
+        super().__init__()
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self._model = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-whisper")
+
+    @property
+    def model_version(self) -> str:
+        return f"faster-whisper-{self.model_size}-{self.compute_type}"
+
+    async def _transcribe(self, audio_path: str) -> Optional[str]:
+        segments = await self._transcribe_segments(audio_path)
+        return " ".join(segment.text for segment in segments) or None
+
+    async def _transcribe_segments(self, audio_path: str) -> Optional[List[TranscriptSegment]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._transcribe_file, audio_path)
+
+    def _transcribe_file(self, path: str) -> List[TranscriptSegment]:
+        """Runs on the inference thread."""
+        segments, _ = self._load_model().transcribe(path, beam_size=1)
+        return [
+            TranscriptSegment(round(segment.start * 1000), round(segment.end * 1000), segment.text.strip())
+            for segment in segments
+            if segment.text.strip()
+        ]
+
+    def _load_model(self):
+        if self._model is None:
+            from faster_whisper import WhisperModel
+
+            logger.info(f"Loading local Whisper model {self.model_version}")
+            self._model = WhisperModel(self.model_size, device="cpu", compute_type=self.compute_type)
+        return self._model
+
+
+def create_transcription_engine(name: str) -> TranscriptionEngine:
+    """Build the engine selected by TRANSCRIPTION_ENGINE."""
+    if name == "openai":
+        return OpenAIWhisperEngine()
+    if name == "local":
+        return LocalWhisperEngine(
+            model_size=settings.LOCAL_WHISPER_MODEL,
+            compute_type=settings.LOCAL_WHISPER_COMPUTE_TYPE
+        )
+    raise ValueError(f"Unknown transcription engine: {name}")
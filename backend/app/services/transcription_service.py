@@ -0,0 +1,168 @@
+"""Background transcription of voice bookmarks.
+
+The upload endpoint only stores the audio and a `pending` bookmark; the
+worker pool here runs the slow ffmpeg + Whisper work and writes the result.
+
+The queue lives in process memory, so on startup `recover_transcriptions`
+queues again the bookmarks a previous process left `pending`, and those
+`processing` for longer than TRANSCRIPTION_STALE_SECONDS. Every worker
+process does this; a job only runs once because it starts by moving its
+bookmark from `pending` to `processing`, and a job another live process is
+running is recent enough to be left alone.
+"""
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.bookmark import (
+    Bookmark, TRANSCRIPTION_COMPLETED, TRANSCRIPTION_FAILED, TRANSCRIPTION_PENDING, TRANSCRIPTION_PROCESSING
+)
+from app.models.bookmark_change import record_changes
+from app.services.job_queue import QueueFullError, WorkerPool
+from app.services.openai_service import openai_service
+from app.services.summarization import summarizer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TranscriptionJob:
+    bookmark_id: int
+    audio_file_path: str
+    content_hash: Optional[str] = None  # SHA-256 computed while uploading
+
+
+async def transcribe_bookmark(job: TranscriptionJob) -> None:
+    """Transcribe a bookmark's audio and store the transcript."""
+    if not await _claim(job.bookmark_id):
+        # Taken by another process after a restart, which then owns the file
+        if not await _bookmark_exists(job.bookmark_id):
+            _remove_audio_file(job.audio_file_path)  # Deleted while queued
+        return
+
+    transcript_text: Optional[str] = None
+    error: Optional[str] = None
+    try:
+        transcript_text = await openai_service.transcribe_audio(job.audio_file_path, job.content_hash)
+        if transcript_text is None:
+            error = "Transcription unavailable"
+    except Exception as e:
+        error = str(e)
+    finally:
+        _remove_audio_file(job.audio_file_path)
+
+    async with AsyncSessionLocal() as db:
+        bookmark = await db.get(Bookmark, job.bookmark_id)
+        if not bookmark:
+            return  # Deleted while queued
+        bookmark.transcript_text = transcript_text
+        bookmark.transcription_status = TRANSCRIPTION_FAILED if error else TRANSCRIPTION_COMPLETED
+        bookmark.transcription_error = error
+        bookmark.audio_file_path = None
+        await db.commit()
+    if transcript_text:
+        summarizer.submit(job.bookmark_id)
+
+
+async def _claim(bookmark_id: int) -> bool:
+    """Move a pending bookmark to processing; False if it is not pending."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Bookmark).where(
+                Bookmark.id == bookmark_id,
+                Bookmark.transcription_status == TRANSCRIPTION_PENDING
+            ).values(
+                transcription_status=TRANSCRIPTION_PROCESSING,
+                transcription_started_at=datetime.now(timezone.utc)
+            )
+        )
+        if not result.rowcount:
+            return False
+        await record_changes(db, Bookmark.id == bookmark_id)
+        await db.commit()
+    return True
+
+
+async def _bookmark_exists(bookmark_id: int) -> bool:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(Bookmark.id).where(Bookmark.id == bookmark_id))).first() is not None
+
+
+async def recover_transcriptions(pool: Optional[WorkerPool] = None, session_factory=None) -> Dict[str, int]:
+    """Queue again the transcriptions a stopped process left unfinished.
+
+    Bookmarks `processing` since before the stale cutoff were interrupted and
+    go back to `pending`; newer ones belong to a live process. Those whose
+    audio file is gone are marked `failed`. If the queue fills up, the rest
+    stay `pending` until the next start.
+    """
+    pool = pool or transcription_pool
+    session_factory = session_factory or AsyncSessionLocal
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.TRANSCRIPTION_STALE_SECONDS)
+    stale = (Bookmark.transcription_status == TRANSCRIPTION_PROCESSING) & (
+        Bookmark.transcription_started_at.is_(None) | (Bookmark.transcription_started_at < cutoff)
+    )
+    unfinished = (Bookmark.transcription_status == TRANSCRIPTION_PENDING) | stale
+    try:
+        async with session_factory() as db:
+            rows = (await db.execute(
+                select(Bookmark.id, Bookmark.audio_file_path, Bookmark.transcription_status).where(unfinished)
+            )).all()
+            lost = [row.id for row in rows if not (row.audio_file_path and os.path.exists(row.audio_file_path))]
+            lost_ids = set(lost)
+            waiting = [row for row in rows if row.id not in lost_ids]
+            interrupted = [row.id for row in waiting if row.transcription_status == TRANSCRIPTION_PROCESSING]
+            if lost:
+                await db.execute(update(Bookmark).where(Bookmark.id.in_(lost), unfinished).values(
+                    transcription_status=TRANSCRIPTION_FAILED,
+                    transcription_error="Audio was lost before transcription finished",
+                    audio_file_path=None
+                ))
+            if interrupted:
+                await db.execute(update(Bookmark).where(Bookmark.id.in_(interrupted), stale).values(
+                    transcription_status=TRANSCRIPTION_PENDING,
+                    transcription_started_at=None
+                ))
+            if lost or interrupted:
+                await record_changes(db, Bookmark.id.in_(lost + interrupted))
+            await db.commit()
+    except Exception as e:
+        # A database that is not set up yet must not keep the app from starting
+        logger.error(f"Could not recover unfinished transcriptions: {e}")
+        return {"queued": 0, "failed": 0, "left_pending": 0}
+
+    queued = 0
+    for row in waiting:
+        try:
+            pool.submit(row.id, TranscriptionJob(bookmark_id=row.id, audio_file_path=row.audio_file_path))
+        except QueueFullError:
+            break
+        queued += 1
+    if rows:
+        logger.info(f"Recovered transcriptions: {queued} queued, {len(lost)} failed, "
+                    f"{len(waiting) - queued} left pending")
+    return {"queued": queued, "failed": len(lost), "left_pending": len(waiting) - queued}
+
+
+def _remove_audio_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not delete audio file {path}: {e}")
+
+
+# Global worker pool
+transcription_pool = WorkerPool(
+    name="transcription",
+    handler=transcribe_bookmark,
+    workers=settings.TRANSCRIPTION_WORKERS,
+    max_queue_size=settings.TRANSCRIPTION_QUEUE_MAX_SIZE
+)
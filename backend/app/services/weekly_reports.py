@@ -0,0 +1,274 @@
+"""Weekly review reports, rendered from the per-week aggregates.
+
+A report reads the user's `weekly_stats` row for the week and the one
+before it and the week's top `weekly_podcast_stats` rows, a fixed number of
+rows whatever the user's history. The highlights are the part that is not
+constant time: they are read from the bookmarks themselves, walking the
+partial index of summarized bookmarks backwards from the end of the week.
+That stops after `highlights` rows, so the cost grows only with the index
+depth (logarithmic in the user's summarized bookmarks); without that index
+it would scan every bookmark of the week that has no summary.
+Past weeks are stored once rendered, tagged with the user's change
+sequence; a stored report is served while the sequence is unchanged.
+
+A background loop pre-renders the previous week for every user who
+bookmarked anything in it, so the first request on Monday finds it ready.
+Every worker process runs the loop; on PostgreSQL an advisory lock lets one
+of them render while the others skip the run.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, dialect_name
+from app.models.bookmark import Bookmark
+from app.models.weekly_report import (
+    POSITION_EARLY, POSITION_LATE, POSITION_MIDDLE, WeeklyPodcastStats, WeeklyReport, WeeklyStats,
+    week_start
+)
+from app.services.bookmark_sync import bookmark_sync_service
+
+logger = logging.getLogger(__name__)
+
+# Held for the length of a pre-render run, released when its transaction ends
+_PRERENDER_LOCK_KEY = 0x504F4D4157524550
+_PRERENDER_LOCK_SQL = text("SELECT pg_try_advisory_xact_lock(:key)")
+
+
+def _average(total: int, count: int) -> Optional[int]:
+    return round(total / count) if count > 0 else None
+
+
+def _week_bounds(week: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(week, dt_time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=7)
+
+
+class WeeklyReportService:
+    """Serves and pre-renders weekly reports."""
+
+    def __init__(self, top_podcasts: int, highlights: int, prerender_interval_seconds: float):
+        self.top_podcasts = top_podcasts
+        self.highlights = highlights
+        self.prerender_interval = prerender_interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+        self.requests = 0
+        self.stored_hits = 0
+        self.renders = 0
+        self.render_ms = 0.0
+        self.prerendered = 0
+        self.prerender_runs = 0
+        self.prerender_skipped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the pre-render loop on the running event loop."""
+        if self.running or self.prerender_interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="weekly-reports")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def report(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        week: date,
+        version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """The report for the week starting on `week`, stored or freshly rendered."""
+        self.requests += 1
+        if version is None:
+            version = await bookmark_sync_service.collection_version(db, user_id)
+        stored = await db.get(WeeklyReport, (user_id, week))
+        if stored is not None and stored.version == version:
+            self.stored_hits += 1
+            return stored.payload
+
+        payload = await self.render(db, user_id, week)
+        # The current week still changes; only finished weeks are worth keeping
+        if week < week_start(None):
+            await self._store(db, user_id, week, version, payload)
+            await db.commit()
+        return payload
+
+    async def render(self, db: AsyncSession, user_id: int, week: date) -> Dict[str, Any]:
+        """Build a report from the aggregates of `week` and the week before."""
+        started_at = time.perf_counter()
+        previous_week = week - timedelta(days=7)
+        stats = {
+            row.week_start: row
+            for row in (await db.execute(
+                select(WeeklyStats).where(
+                    WeeklyStats.user_id == user_id,
+                    WeeklyStats.week_start.in_([week, previous_week])
+                )
+            )).scalars()
+        }
+        current = stats.get(week)
+        previous = stats.get(previous_week)
+        count = current.bookmark_count if current else 0
+
+        podcasts = (await db.execute(
+            select(WeeklyPodcastStats).where(
+                WeeklyPodcastStats.user_id == user_id,
+                WeeklyPodcastStats.week_start == week,
+                WeeklyPodcastStats.bookmark_count > 0
+            ).order_by(WeeklyPodcastStats.bookmark_count.desc(), WeeklyPodcastStats.podcast_name)
+            .limit(self.top_podcasts)
+        )).scalars().all()
+
+        # Walks ix_bookmarks_user_summarized backwards from the end of the week; the
+        # ai_summary condition must stay as written for the partial index to apply
+        week_from, week_to = _week_bounds(week)
+        highlights = (await db.execute(
+            select(
+                Bookmark.id, Bookmark.podcast_name, Bookmark.episode_name, Bookmark.timestamp_ms,
+                Bookmark.ai_summary, Bookmark.created_at
+            ).where(
+                Bookmark.user_id == user_id,
+                Bookmark.created_at >= week_from,
+                Bookmark.created_at < week_to,
+                Bookmark.ai_summary.isnot(None)
+            ).order_by(Bookmark.created_at.desc(), Bookmark.id.desc()).limit(self.highlights)
+        )).all() if count else []
+
+        payload = {
+            "week_start": week.isoformat(),
+            "week_end": (week + timedelta(days=6)).isoformat(),
+            "bookmark_count": count,
+            "previous_week_bookmark_count": previous.bookmark_count if previous else 0,
+            "voice_note_count": current.voice_count if current else 0,
+            "text_note_count": current.noted_count if current else 0,
+            "average_position_ms": _average(current.position_total_ms, count) if current else None,
+            "positions": {
+                POSITION_EARLY: current.early_count if current else 0,
+                POSITION_MIDDLE: current.middle_count if current else 0,
+                POSITION_LATE: current.late_count if current else 0,
+            },
+            "top_podcasts": [
+                {
+                    "podcast_name": podcast.podcast_name,
+                    "podcast_cover_url": podcast.cover_url,
+                    "bookmark_count": podcast.bookmark_count,
+                    "average_position_ms": _average(podcast.position_total_ms, podcast.bookmark_count),
+                }
+                for podcast in podcasts
+            ],
+            "highlights": [
+                {
+                    "id": row.id,
+                    "podcast_name": row.podcast_name,
+                    "episode_name": row.episode_name,
+                    "timestamp_ms": row.timestamp_ms,
+                    "ai_summary": row.ai_summary,
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                }
+                for row in highlights
+            ],
+        }
+        self.renders += 1
+        self.render_ms += (time.perf_counter() - started_at) * 1000
+        return payload
+
+    async def prerender_previous_week(self) -> int:
+        """Render and store last week's report for each user who bookmarked in it.
+
+        Returns 0 without rendering when another worker holds the pre-render lock.
+        """
+        async with AsyncSessionLocal() as lock_db:
+            if not await self._try_lock(lock_db):
+                self.prerender_skipped += 1
+                return 0
+            return await self._prerender(week_start(None) - timedelta(days=7))
+
+    async def _try_lock(self, db: AsyncSession) -> bool:
+        if dialect_name(db) != "postgresql":
+            return True  # No advisory locks; a duplicate run only repeats idempotent upserts
+        return bool((await db.execute(_PRERENDER_LOCK_SQL, {"key": _PRERENDER_LOCK_KEY})).scalar())
+
+    async def _prerender(self, week: date) -> int:
+        async with AsyncSessionLocal() as db:
+            stale = (await db.execute(
+                select(WeeklyStats.user_id, WeeklyReport.version).outerjoin(
+                    WeeklyReport,
+                    (WeeklyReport.user_id == WeeklyStats.user_id)
+                    & (WeeklyReport.week_start == WeeklyStats.week_start)
+                ).where(WeeklyStats.week_start == week, WeeklyStats.bookmark_count > 0)
+            )).all()
+
+        rendered = 0
+        for user_id, stored_version in stale:
+            async with AsyncSessionLocal() as db:
+                version = await bookmark_sync_service.collection_version(db, user_id)
+                if stored_version == version:
+                    continue
+                payload = await self.render(db, user_id, week)
+                await self._store(db, user_id, week, version, payload)
+                await db.commit()
+            rendered += 1
+        self.prerendered += rendered
+        self.prerender_runs += 1
+        return rendered
+
+    async def _store(self, db: AsyncSession, user_id: int, week: date, version: int, payload: Dict[str, Any]) -> None:
+        insert = postgresql.insert if dialect_name(db) == "postgresql" else sqlite.insert
+        statement = insert(WeeklyReport).values(
+            user_id=user_id, week_start=week, version=version, payload=payload,
+            rendered_at=datetime.now(timezone.utc)
+        )
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=["user_id", "week_start"],
+            set_={
+                "version": statement.excluded.version,
+                "payload": statement.excluded.payload,
+                "rendered_at": statement.excluded.rendered_at,
+            }
+        ))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                rendered = await self.prerender_previous_week()
+                if rendered:
+                    logger.info(f"Pre-rendered {rendered} weekly reports")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Pre-rendering weekly reports failed: {e}")
+            await asyncio.sleep(self.prerender_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "requests": self.requests,
+            "stored_hits": self.stored_hits,
+            "renders": self.renders,
+            "avg_render_ms": round(self.render_ms / self.renders, 2) if self.renders else 0.0,
+            "prerendered": self.prerendered,
+            "prerender_runs": self.prerender_runs,
+            "prerender_skipped": self.prerender_skipped,
+        }
+
+
+# Global service instance
+weekly_reports = WeeklyReportService(
+    top_podcasts=settings.REPORTS_TOP_PODCASTS,
+    highlights=settings.REPORTS_HIGHLIGHTS,
+    prerender_interval_seconds=settings.REPORTS_PRERENDER_INTERVAL_SECONDS
+)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Compare offline sync throughput: one POST per bookmark vs POST /bookmarks/batch.
+
+Both paths go through the ASGI app (validation, auth, idempotency keys,
+serialization), without a network in between. Each path runs twice: the
+first run inserts, the second replays the same keys as a client retrying
+after a lost response would.
+
+Usage:
+    python benchmarks/bench_batch_insert.py --items 2000
+    python benchmarks/bench_batch_insert.py --items 2000 --database-url postgresql:///poma_bench
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description="Benchmark batch bookmark creation")
+parser.add_argument("--items", type=int, default=2000)
+parser.add_argument("--batch-size", type=int, default=500)
+parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+args = parser.parse_args()
+
+temp_dir = None
+if not args.database_url:
+    temp_dir = tempfile.mkdtemp()
+    args.database_url = f"sqlite:///{temp_dir}/bench_batch.db"
+# The app's engines are built from settings at import time
+os.environ["DATABASE_URL"] = args.database_url
+
+import httpx  # noqa: E402
+import jwt  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import SessionLocal, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Base, User  # noqa: E402
+
+
+def make_items(prefix: str, count: int):
+    return [
+        {
+            "podcast_name": "Offline Podcast",
+            "episode_name": f"Episode {i // 20}",
+            "timestamp_ms": i * 1000,
+            "user_note": f"note {i}" if i % 4 == 0 else None,
+            "idempotency_key": f"{prefix}-{i}",
+        }
+        for i in range(count)
+    ]
+
+
+async def per_item(client, headers, items) -> None:
+    for item in items:
+        body = {name: value for name, value in item.items() if name != "idempotency_key"}
+        response = await client.post(
+            "/api/v1/bookmarks/", json=body, headers={**headers, "Idempotency-Key": item["idempotency_key"]}
+        )
+        response.raise_for_status()
+
+
+async def batched(client, headers, items) -> None:
+    for offset in range(0, len(items), args.batch_size):
+        response = await client.post(
+            "/api/v1/bookmarks/batch", json={"bookmarks": items[offset:offset + args.batch_size]}, headers=headers
+        )
+        response.raise_for_status()
+
+
+async def run() -> None:
+    token = jwt.encode(
+        {"sub": "1", "exp": datetime.utcnow() + timedelta(hours=1), "type": "access"},
+        settings.SECRET_KEY, algorithm=settings.ALGORITHM
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'path':<10} {'run':<8} {'items':>6} {'seconds':>8} {'items/s':>9}")
+        for name, path in (("per-item", per_item), ("batch", batched)):
+            items = make_items(name, args.items)
+            for run_name in ("insert", "replay"):
+                started_at = time.perf_counter()
+                await path(client, headers, items)
+                elapsed = time.perf_counter() - started_at
+                print(f"{name:<10} {run_name:<8} {len(items):>6} {elapsed:>8.2f} {len(items) / elapsed:>9.0f}")
+    await async_engine.dispose()
+
+
+def main() -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(id=1, email="bench@example.com", hashed_password="x"))
+    db.commit()
+    db.close()
+
+    asyncio.run(run())
+    if temp_dir:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
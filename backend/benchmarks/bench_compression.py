@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Measure response compression on transcript-heavy bookmark lists.
+
+For each list size the payload is what GET /bookmarks returns with all
+fields: orjson-encoded rows whose transcripts and summaries are drawn from
+a Zipf-distributed vocabulary of word-like tokens (repeating one sentence
+would flatter every compressor). Each setting reports the compressed size,
+the CPU time per response and the throughput; "stream" compresses the same
+body in 50-bookmark chunks with a flush after each, as the middleware does
+for streamed responses; "cached" is a repeat request for a tagged response.
+
+Usage:
+    python benchmarks/bench_compression.py [--sizes 20 100 500] [--repeat 20]
+"""
+import argparse
+import asyncio
+import gzip
+import itertools
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import orjson  # noqa: E402
+
+from app.core.compression import BROTLI, GZIP, ResponseCompressor, brotli  # noqa: E402
+
+VOCABULARY_SIZE = 5000
+TRANSCRIPT_WORDS = 180  # About 60 s of speech
+SUMMARY_WORDS = 40
+STREAM_CHUNK = 50
+
+
+def make_vocabulary(rng: random.Random):
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.choice((2, 3, 4, 4, 5, 6, 7, 8, 9))))
+        for _ in range(VOCABULARY_SIZE)
+    ]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(VOCABULARY_SIZE)))
+    return lambda k: " ".join(rng.choices(words, cum_weights=cum_weights, k=k))
+
+
+def make_bookmarks(count: int):
+    rng = random.Random(42)
+    sample = make_vocabulary(rng)
+    return [
+        {
+            "id": i,
+            "user_id": 1,
+            "podcast_name": f"Podcast {i % 12}",
+            "episode_name": f"Episode {sample(4)}",
+            "spotify_episode_id": f"{rng.getrandbits(64):016x}",
+            "timestamp_ms": rng.randint(0, 3_600_000),
+            "duration_ms": 3_600_000,
+            "podcast_cover_url": f"https://i.scdn.co/image/{rng.getrandbits(96):024x}",
+            "recording_status": "completed",
+            "transcript_text": sample(TRANSCRIPT_WORDS).capitalize() + ".",
+            "user_note": sample(10) if i % 3 == 0 else None,
+            "ai_summary": sample(SUMMARY_WORDS).capitalize() + ".",
+            "created_at": f"2024-01-{1 + i % 28:02d}T12:{i % 60:02d}:00+00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started_at)
+    return result, statistics.median(samples)
+
+
+def settings_to_measure():
+    settings = [("gzip", GZIP, 1), ("gzip", GZIP, 6), ("gzip", GZIP, 9)]
+    if brotli is not None:
+        settings += [("br", BROTLI, 1), ("br", BROTLI, 4), ("br", BROTLI, 6), ("br", BROTLI, 11)]
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response compression")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 500])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli is not installed; measuring gzip only")
+
+    for size in args.sizes:
+        bookmarks = make_bookmarks(size)
+        body = orjson.dumps(bookmarks)
+        chunks = [orjson.dumps(bookmarks[i:i + STREAM_CHUNK]) for i in range(0, size, STREAM_CHUNK)]
+        print(f"\n{size} bookmarks, {len(body) / 1024:.1f} KiB uncompressed")
+        print(f"{'setting':<14} {'bytes':>9} {'saved':>7} {'ms':>8} {'MB/s':>8}")
+
+        for label, encoding, level in settings_to_measure():
+            compressor = ResponseCompressor(
+                minimum_size=0, gzip_level=level, brotli_quality=level, cache_max_bytes=16 * 1024 * 1024
+            )
+            compressed, seconds = timed(lambda: compressor.compress(body, encoding), args.repeat)
+            if encoding == GZIP:
+                assert gzip.decompress(compressed) == body
+            else:
+                assert brotli.decompress(compressed) == body
+            saved = 1 - len(compressed) / len(body)
+            print(f"{label + ' ' + str(level):<14} {len(compressed):>9} {saved:>6.1%} "
+                  f"{seconds * 1000:>8.2f} {len(body) / seconds / 1e6:>8.1f}")
+
+            if (encoding, level) in ((GZIP, 6), (BROTLI, 4)):
+                def stream():
+                    stream_compressor = compressor.stream(encoding)
+                    output = b"".join(stream_compressor.compress(chunk) for chunk in chunks)
+                    return output + stream_compressor.finish()
+
+                streamed, seconds = timed(stream, args.repeat)
+                saved = 1 - len(streamed) / len(body)
+                print(f"{'  stream':<14} {len(streamed):>9} {saved:>6.1%} "
+                      f"{seconds * 1000:>8.2f} {len(body) / seconds / 1e6:>8.1f}")
+
+                loop = asyncio.new_event_loop()
+                loop.run_until_complete(compressor.compress_body(body, encoding, '"c-1-1-bench"'))
+                _, seconds = timed(
+                    lambda: loop.run_until_complete(compressor.compress_body(body, encoding, '"c-1-1-bench"')),
+                    args.repeat
+                )
+                loop.close()
+                print(f"{'  cached':<14} {'':>9} {'':>7} {seconds * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
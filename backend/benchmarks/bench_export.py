@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Measure bookmark export throughput and memory on a large library.
+
+Fills a database with synthetic bookmarks for one user, then streams the
+export in each format the way GET /bookmarks/export does, tracking the
+process's resident memory while chunks are produced. The last row loads
+the whole library at once, as a list endpoint without a limit would, for
+comparison; it runs last because freed memory is not always returned to
+the OS.
+
+Usage:
+    python benchmarks/bench_export.py [--bookmarks 1000000]
+    python benchmarks/bench_export.py --database-url postgresql:///poma_bench
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description="Benchmark streaming bookmark export")
+parser.add_argument("--bookmarks", type=int, default=1_000_000)
+parser.add_argument("--batch-size", type=int, default=1000)
+parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+args = parser.parse_args()
+
+temp_dir = None
+if not args.database_url:
+    temp_dir = tempfile.mkdtemp()
+    args.database_url = f"sqlite:///{temp_dir}/bench_export.db"
+# The app's engines are built from settings at import time
+os.environ["DATABASE_URL"] = args.database_url
+
+import orjson  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.database import AsyncSessionLocal, async_engine, engine  # noqa: E402
+from app.models import Base, Bookmark, User  # noqa: E402
+from app.services.bookmark_export import CSV, MARKDOWN, NDJSON, BookmarkExportService  # noqa: E402
+from app.services.bookmark_serializer import FULL_FIELDS, columns_for, row_to_dict  # noqa: E402
+
+WORDS = "the a of to and in that is it you we this for on with so but like really think about know".split()
+
+
+def rss_mb() -> float:
+    """Current resident set size; Linux only, 0 elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return 0.0
+
+
+def fill(count: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(42)
+    started = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [{"id": 1, "email": "bench@example.com", "hashed_password": "x"}])
+        for offset in range(0, count, 10_000):
+            connection.execute(insert(Bookmark.__table__), [
+                {
+                    "user_id": 1,
+                    "podcast_name": f"Podcast {i % 50}",
+                    "episode_name": f"Episode {i // 20}",
+                    "timestamp_ms": rng.randrange(3_600_000),
+                    "duration_ms": 3_600_000,
+                    "user_note": " ".join(rng.choice(WORDS) for _ in range(12)) if i % 3 == 0 else None,
+                    "transcript_text": " ".join(rng.choice(WORDS) for _ in range(25)) if i % 4 == 0 else None,
+                    "ai_summary": " ".join(rng.choice(WORDS) for _ in range(20)) if i % 2 == 0 else None,
+                    "created_at": started + timedelta(seconds=i * 30),
+                }
+                for i in range(offset, min(offset + 10_000, count))
+            ])
+
+
+async def streamed(service, export_format, gzip):
+    baseline = peak = rss_mb()
+    size = 0
+    started_at = time.perf_counter()
+    async for chunk in service.stream(1, export_format, FULL_FIELDS, gzip=gzip):
+        size += len(chunk)
+        peak = max(peak, rss_mb())
+    return time.perf_counter() - started_at, size, peak - baseline
+
+
+async def loaded_at_once():
+    baseline = rss_mb()
+    started_at = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(Bookmark.__table__.select().with_only_columns(columns_for(FULL_FIELDS))
+                                 .where(Bookmark.user_id == 1))).all()
+        body = orjson.dumps([row_to_dict(row, FULL_FIELDS) for row in rows])
+        peak = rss_mb()
+    return time.perf_counter() - started_at, len(body), peak - baseline
+
+
+def report(label, seconds, size, memory):
+    print(f"{label:<22} {seconds:>8.1f} {args.bookmarks / seconds:>10.0f} {size / 2**20:>9.1f} {memory:>9.1f}")
+
+
+async def run() -> None:
+    service = BookmarkExportService(batch_size=args.batch_size, chunk_bytes=64 * 1024)
+    print(f"{'format':<22} {'seconds':>8} {'rows/s':>10} {'MB out':>9} {'+RSS MB':>9}")
+    for export_format, gzip in ((NDJSON, False), (NDJSON, True), (CSV, False), (CSV, True), (MARKDOWN, False)):
+        report(f"{export_format}{' gzip' if gzip else ''}", *await streamed(service, export_format, gzip))
+    report("json, all rows at once", *await loaded_at_once())
+    await async_engine.dispose()
+
+
+def main() -> None:
+    started_at = time.perf_counter()
+    fill(args.bookmarks)
+    print(f"{args.bookmarks} bookmarks inserted in {time.perf_counter() - started_at:.1f}s, "
+          f"batch size {args.batch_size}")
+    asyncio.run(run())
+    if temp_dir:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Benchmark bookmark full-text search latency.
+
+Seeds synthetic bookmarks (Zipf-distributed vocabulary, so some words are in
+most transcripts and others are rare) and times first-page and deep-page
+searches for one user through SearchService.
+
+Usage:
+    python benchmarks/bench_search.py --rows 1000000
+    python benchmarks/bench_search.py --rows 1000000 --database-url postgresql:///poma_bench
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.database import async_database_url  # noqa: E402
+
+from app.models import Base, Bookmark, User  # noqa: E402
+from app.services.search_service import SearchService  # noqa: E402
+
+VOCABULARY_SIZE = 20000
+WORDS_PER_TRANSCRIPT = 60
+BATCH_SIZE = 5000
+
+QUERIES = {
+    "common word": "w1",
+    "mid word": "w200",
+    "rare word": "w15000",
+    "two words": "w3 w40",
+    "phrase": '"w1 w2"',
+    "or + exclude": "w50 or w60 -w1",
+}
+
+
+def make_vocabulary(rng: random.Random):
+    words = [f"w{i}" for i in range(VOCABULARY_SIZE)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(VOCABULARY_SIZE)))
+    return lambda k: " ".join(rng.choices(words, cum_weights=cum_weights, k=k))
+
+
+def seed(engine, rows: int, users: int) -> None:
+    rng = random.Random(42)
+    sample = make_vocabulary(rng)
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [
+            {"id": i, "email": f"user{i}@example.com", "hashed_password": "x"}
+            for i in range(1, users + 1)
+        ])
+    started_at = time.perf_counter()
+    for offset in range(0, rows, BATCH_SIZE):
+        batch = [
+            {
+                "user_id": rng.randint(1, users),
+                "podcast_name": f"Podcast {sample(2)}",
+                "episode_name": f"Episode {sample(4)}",
+                "timestamp_ms": i * 1000,
+                "transcript_text": sample(WORDS_PER_TRANSCRIPT),
+                "user_note": sample(8) if i % 3 == 0 else None,
+            }
+            for i in range(offset, min(offset + BATCH_SIZE, rows))
+        ]
+        with engine.begin() as connection:
+            connection.execute(insert(Bookmark.__table__), batch)
+        print(f"\rSeeded {offset + len(batch)} rows", end="", flush=True)
+    print(f" in {time.perf_counter() - started_at:.1f} s")
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bookmark full-text search")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=5, help="Depth of the deep-page measurement")
+    args = parser.parse_args()
+
+    temp_dir = None
+    database_url = args.database_url
+    if not database_url:
+        temp_dir = tempfile.mkdtemp()
+        database_url = f"sqlite:///{temp_dir}/bench_search.db"
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    seed(engine, args.rows, args.users)
+
+    asyncio.run(run_queries(database_url, args))
+    if temp_dir:
+        shutil.rmtree(temp_dir)
+
+
+async def run_queries(database_url: str, args) -> None:
+    engine = create_async_engine(async_database_url(database_url))
+    db = sessionmaker(engine, class_=AsyncSession)()
+    service = SearchService()
+    fields = ["id", "podcast_name", "episode_name", "timestamp_ms"]
+    user_id = 1
+
+    print(f"{'query':<14} {'hits/page':>9} {'p50 ms':>8} {'p95 ms':>8} {f'page {args.pages} ms':>10}")
+    for label, query in QUERIES.items():
+        timings = []
+        for _ in range(args.repeat):
+            started_at = time.perf_counter()
+            results, cursor = await service.search(db, user_id, query, fields, args.limit)
+            timings.append((time.perf_counter() - started_at) * 1000)
+
+        deep_ms = 0.0
+        for _ in range(args.pages - 1):
+            if cursor is None:
+                break
+            started_at = time.perf_counter()
+            _, cursor = await service.search(db, user_id, query, fields, args.limit, cursor)
+            deep_ms = (time.perf_counter() - started_at) * 1000
+
+        print(f"{label:<14} {len(results):>9} {statistics.median(timings):>8.2f} "
+              f"{percentile(timings, 0.95):>8.2f} {deep_ms:>10.2f}")
+
+    await db.close()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Compare bookmark response serialization paths.
+
+- pydantic: load Bookmark entities, validate through BookmarkResponse
+  (orm_mode), jsonable_encoder, stdlib json (FastAPI's response_model path)
+- manual: load entities, hand-built dicts, jsonable_encoder, stdlib json
+  (the old get_bookmarks path)
+- fast: select columns, row_to_dict, orjson (the current path)
+
+Usage:
+    python benchmarks/bench_serialization.py [--sizes 10 100 10000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.api.api_v1.endpoints.bookmarks import BookmarkResponse  # noqa: E402
+from app.models import Base, Bookmark, User  # noqa: E402
+from app.services.bookmark_serializer import FULL_FIELDS, columns_for, row_to_dict  # noqa: E402
+
+TRANSCRIPT = "So the interesting thing about spaced repetition is that it works with attention. " * 8
+
+
+def stdlib_json(content) -> bytes:
+    # What starlette's JSONResponse.render does
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def pydantic_path(db, user_id):
+    bookmarks = db.query(Bookmark).filter(Bookmark.user_id == user_id).all()
+    content = [BookmarkResponse.from_orm(b) for b in bookmarks]
+    return stdlib_json(jsonable_encoder(content))
+
+
+def manual_path(db, user_id):
+    bookmarks = db.query(Bookmark).filter(Bookmark.user_id == user_id).all()
+    content = []
+    for b in bookmarks:
+        data = {name: getattr(b, name) for name in FULL_FIELDS}
+        data["created_at"] = b.created_at.isoformat() if b.created_at else None
+        content.append(data)
+    return stdlib_json(jsonable_encoder(content))
+
+
+def fast_path(db, user_id):
+    rows = db.query(*columns_for(FULL_FIELDS)).filter(Bookmark.user_id == user_id).all()
+    return orjson.dumps([row_to_dict(row, FULL_FIELDS) for row in rows])
+
+
+def seed(db, user_id: int, count: int) -> None:
+    now = datetime(2024, 1, 1)
+    db.bulk_insert_mappings(Bookmark, [
+        {
+            "user_id": user_id,
+            "podcast_name": f"Podcast {i % 50}",
+            "episode_name": f"Episode {i}",
+            "spotify_episode_id": f"episode{i:016d}",
+            "timestamp_ms": i * 1000,
+            "duration_ms": 3_600_000,
+            "transcript_text": TRANSCRIPT,
+            "user_note": "Remember this",
+            "ai_summary": TRANSCRIPT[:200],
+            "created_at": now + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def measure(fn, db, user_id, repeat: int) -> float:
+    fn(db, user_id)  # Warm up
+    db.expire_all()
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        fn(db, user_id)
+        db.expire_all()
+    return (time.perf_counter() - started_at) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare bookmark serialization paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 10000])
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    print(f"{'bookmarks':>10} {'pydantic ms':>12} {'manual ms':>10} {'fast ms':>8} {'speedup':>8}")
+    for user_id, size in enumerate(args.sizes, start=1):
+        db.add(User(id=user_id, email=f"user{user_id}@example.com", hashed_password="x"))
+        seed(db, user_id, size)
+        repeat = max(3, 20000 // size)
+        pydantic_ms = measure(pydantic_path, db, user_id, repeat)
+        manual_ms = measure(manual_path, db, user_id, repeat)
+        fast_ms = measure(fast_path, db, user_id, repeat)
+        print(f"{size:>10} {pydantic_ms:>12.2f} {manual_ms:>10.2f} {fast_ms:>8.2f} {pydantic_ms / fast_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
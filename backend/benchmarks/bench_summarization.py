@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Measure summary throughput and cost per bookmark, offline.
+
+Runs the summarizer's grouping, packing, concurrency and rate limiting
+against the deterministic stub backend, whose latency is modelled on a
+hosted model (fixed overhead plus time per token). Bookmarks are spread
+over episodes the way a library is: several per episode, each with a voice
+note and the transcript context around it. A second pass over the same
+bookmarks shows the content-hash cache.
+
+Usage:
+    python benchmarks/bench_summarization.py [--bookmarks 400] [--episodes 40]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.core.config import settings  # noqa: E402
+from app.services.summarization import (  # noqa: E402
+    RateLimiter, Summarizer, bookmark_input, episode_context
+)
+from app.services.summary_backends import EpisodeSection, StubSummaryBackend, SummaryItem  # noqa: E402
+
+WORDS = "the a of to and in that is it you we this for on with so but like really think about know".split()
+
+
+def words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def make_library(summarizer: Summarizer, bookmarks: int, episodes: int):
+    rng = random.Random(42)
+    contexts = [
+        episode_context(f"Podcast {i % 7}", f"Episode {i}", words(rng, 90))
+        for i in range(episodes)
+    ]
+    by_episode = {}
+    for bookmark_id in range(1, bookmarks + 1):
+        episode = rng.randrange(episodes)
+        text = bookmark_input(
+            words(rng, 12) if bookmark_id % 3 == 0 else None,
+            words(rng, 25),
+            words(rng, 75),  # About 30 s of speech each side
+            words(rng, 75)
+        )
+        item = SummaryItem(bookmark_id, text, summarizer.content_hash(contexts[episode], text))
+        by_episode.setdefault(episode, EpisodeSection(contexts[episode])).items.append(item)
+    return list(by_episode.values())
+
+
+async def run(label, args, token_budget, max_items, concurrency):
+    backend = StubSummaryBackend(latency_ms=args.latency_ms, ms_per_1k_tokens=args.ms_per_1k_tokens)
+    summarizer = Summarizer(
+        backend=backend,
+        token_budget=token_budget,
+        max_items_per_request=max_items,
+        batch_window_ms=0,
+        concurrency=concurrency,
+        limiter=RateLimiter(args.requests_per_minute, args.tokens_per_minute),
+        cache_max_entries=args.bookmarks * 2,
+        input_price_per_1k=settings.SUMMARY_INPUT_PRICE_PER_1K_TOKENS,
+        output_price_per_1k=settings.SUMMARY_OUTPUT_PRICE_PER_1K_TOKENS
+    )
+    sections = make_library(summarizer, args.bookmarks, args.episodes)
+
+    started_at = time.perf_counter()
+    summaries = await summarizer.summarize_items(sections)
+    seconds = time.perf_counter() - started_at
+    assert len(summaries) == args.bookmarks
+
+    stats = summarizer.stats()
+    cached_at = time.perf_counter()
+    await summarizer.summarize_items(sections)
+    cached_ms = (time.perf_counter() - cached_at) * 1000
+
+    print(
+        f"{label:<26} {stats['requests']:>8} {args.bookmarks / seconds:>10.1f} "
+        f"{stats['input_tokens'] / args.bookmarks:>10.0f} "
+        f"{stats['estimated_cost_usd'] / args.bookmarks * 1000:>12.4f} "
+        f"{stats['rate_limit_wait_seconds']:>8.1f} {cached_ms:>10.1f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched bookmark summaries")
+    parser.add_argument("--bookmarks", type=int, default=400)
+    parser.add_argument("--episodes", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=400.0)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=150.0)
+    parser.add_argument("--requests-per-minute", type=int, default=500)
+    parser.add_argument("--tokens-per-minute", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    print(f"{args.bookmarks} bookmarks over {args.episodes} episodes, stub latency "
+          f"{args.latency_ms:.0f} ms + {args.ms_per_1k_tokens:.0f} ms/1k tokens, "
+          f"{args.requests_per_minute} req/min, {args.tokens_per_minute} tokens/min")
+    print(f"{'setting':<26} {'requests':>8} {'bm/s':>10} {'tokens/bm':>10} "
+          f"{'$ per 1k bm':>12} {'wait s':>8} {'cached ms':>10}")
+
+    await run("one per request, c=2", args, token_budget=10**6, max_items=1, concurrency=2)
+    await run("one per request, c=8", args, token_budget=10**6, max_items=1, concurrency=8)
+    for budget in (2000, 6000, 12000):
+        await run(f"budget {budget}, c=2", args, token_budget=budget, max_items=50, concurrency=2)
+    await run("budget 6000, c=8", args, token_budget=6000, max_items=50, concurrency=8)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Measure transcription throughput and latency per engine.
+
+Usage:
+    python benchmarks/bench_transcription.py path/to/clips --engine local --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.transcription_engines import create_transcription_engine  # noqa: E402
+
+AUDIO_EXTENSIONS = (".m4a", ".mp3", ".wav", ".ogg", ".webm", ".flac")
+
+
+async def run(clips, engine_name: str, concurrency: int) -> None:
+    engine = create_transcription_engine(engine_name)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def transcribe(path):
+        async with semaphore:
+            return await engine.transcribe(path)
+
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*[transcribe(path) for path in clips])
+    elapsed = time.perf_counter() - started_at
+
+    stats = engine.stats()
+    print(f"engine={engine_name} model={stats['model']} clips={len(clips)} concurrency={concurrency}")
+    print(f"  transcribed: {sum(1 for text in results if text)}/{len(clips)}")
+    print(f"  wall time:   {elapsed:.2f}s ({len(clips) / elapsed:.2f} clips/s)")
+    print(f"  latency:     avg {stats['avg_latency_ms']}ms, max {stats['max_latency_ms']}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("clips_dir")
+    parser.add_argument("--engine", default="openai", choices=["openai", "local"])
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    clips = sorted(
+        os.path.join(args.clips_dir, name)
+        for name in os.listdir(args.clips_dir)
+        if name.lower().endswith(AUDIO_EXTENSIONS)
+    )
+    if not clips:
+        sys.exit(f"No audio clips found in {args.clips_dir}")
+    asyncio.run(run(clips, args.engine, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Tests for streaming audio uploads."""
+
+import hashlib
+
+import pytest
+
+from app.services.audio_upload import UploadTooLargeError, parse_content_range, stream_to_file
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def test_parse_content_range():
+    """Content-Range headers are parsed and validated."""
+    assert parse_content_range("bytes 0-99/200") == (0, 99, 200)
+    assert parse_content_range(None) is None
+    with pytest.raises(ValueError):
+        parse_content_range("bytes 100-50/200")
+    with pytest.raises(ValueError):
+        parse_content_range("bytes 0-200/200")
+
+
+@pytest.mark.asyncio
+async def test_stream_to_file_resumes_and_hashes(tmp_path):
+    """Chunks are appended at an offset and hashed while streaming."""
+    path = str(tmp_path / "audio.part")
+    hasher = hashlib.sha256()
+
+    size = await stream_to_file(_chunks(b"abc", b"def"), path, max_bytes=100, hasher=hasher)
+    assert size == 6
+    size = await stream_to_file(_chunks(b"ghi"), path, max_bytes=100, offset=6)
+    assert size == 9
+
+    assert open(path, "rb").read() == b"abcdefghi"
+    assert hasher.hexdigest() == hashlib.sha256(b"abcdef").hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_stream_to_file_rejects_oversized(tmp_path):
+    """Streaming stops as soon as the size limit is exceeded."""
+    path = str(tmp_path / "audio.part")
+    with pytest.raises(UploadTooLargeError):
+        await stream_to_file(_chunks(b"a" * 60, b"b" * 60), path, max_bytes=100)
+
+
+def test_chunked_multipart_upload_is_cut_off(monkeypatch):
+    """A multipart body without Content-Length is rejected once it passes the limit."""
+    from fastapi import APIRouter, FastAPI, File, UploadFile
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.services.audio_upload import MULTIPART_OVERHEAD_BYTES, AudioUploadRoute
+
+    monkeypatch.setattr(settings, "AUDIO_UPLOAD_MAX_BYTES", 1000)
+    router = APIRouter(route_class=AudioUploadRoute)
+    received = []
+
+    @router.post("/upload")
+    async def upload(audio: UploadFile = File(...)):
+        received.append(audio.filename)
+        return {"ok": True}
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    def body(size):
+        yield b'--b\r\nContent-Disposition: form-data; name="audio"; filename="a.m4a"\r\n'
+        yield b"Content-Type: audio/mp4\r\n\r\n"
+        for _ in range(size // 1000):
+            yield b"x" * 1000
+        yield b"\r\n--b--\r\n"
+
+    headers = {"Content-Type": "multipart/form-data; boundary=b"}
+    assert client.post("/upload", content=body(1000), headers=headers).status_code == 200
+    response = client.post("/upload", content=body(1000 + MULTIPART_OVERHEAD_BYTES + 1000), headers=headers)
+    assert response.status_code == 413
+    assert received == ["a.m4a"]
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_does_not_keep_its_lock(monkeypatch, tmp_path):
+    """The per-bookmark upload lock is dropped once no chunk holds it."""
+    import gc
+
+    import httpx
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.api.api_v1.endpoints import bookmarks
+    from app.core.auth import get_current_user_id
+    from app.core.config import settings
+    from app.core.database import get_async_db
+    from app.models import Base, Bookmark, User
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    submitted = []
+    monkeypatch.setattr(bookmarks.transcription_pool, "submit", lambda key, job: submitted.append(key))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/poma.db")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    sessions = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with sessions() as db:
+        db.add(User(id=1, email="a@example.com", hashed_password="x"))
+        db.add(Bookmark(id=7, user_id=1, podcast_name="P", episode_name="E", timestamp_ms=0))
+        await db.commit()
+
+    async def override_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(bookmarks.router, prefix="/bookmarks")
+    app.dependency_overrides[get_async_db] = override_db
+    app.dependency_overrides[get_current_user_id] = lambda: 1
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        for content_range, chunk in (("bytes 0-3/8", b"abcd"), ("bytes 4-7/8", b"efgh")):
+            response = await client.post(
+                "/bookmarks/7/audio",
+                content=chunk,
+                headers={"Content-Type": "audio/mp4", "Content-Range": content_range}
+            )
+            assert response.status_code == 200
+            gc.collect()
+            assert 7 not in bookmarks._upload_locks
+
+    assert response.json()["complete"] is True
+    assert submitted == [7]
+    await engine.dispose()
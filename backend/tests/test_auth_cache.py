@@ -0,0 +1,50 @@
+"""Tests for the verified-token and user cache."""
+
+import time
+
+import jwt as pyjwt
+import pytest
+
+from app.core import auth
+from app.core.auth import PrincipalCache, get_current_user_id
+from app.core.config import settings
+from app.models.user import User
+
+
+def _token(user_id: int, expires_in: int) -> str:
+    payload = {"sub": str(user_id), "exp": int(time.time()) + expires_in, "type": "access"}
+    return pyjwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+@pytest.mark.asyncio
+async def test_claims_cached_until_invalidated(monkeypatch):
+    """A token is verified once; invalidating its user forces re-verification."""
+    cache = PrincipalCache(max_entries=10, claims_ttl_seconds=3600, user_ttl_seconds=60)
+    monkeypatch.setattr(auth, "principal_cache", cache)
+    decode_calls = []
+    real_decode = pyjwt.decode
+    monkeypatch.setattr(pyjwt, "decode", lambda *a, **kw: decode_calls.append(1) or real_decode(*a, **kw))
+
+    header = f"Bearer {_token(7, 600)}"
+    assert await get_current_user_id(header) == 7
+    assert await get_current_user_id(header) == 7
+    assert len(decode_calls) == 1
+
+    cache.invalidate_user(7)
+    assert await get_current_user_id(header) == 7
+    assert len(decode_calls) == 2
+    assert cache.stats()["claims_hits"] == 1
+
+
+def test_claims_ttl_capped_by_exp_and_users_detached():
+    """Claims never outlive the token; cached users come back as fresh instances."""
+    cache = PrincipalCache(max_entries=10, claims_ttl_seconds=3600, user_ttl_seconds=60)
+    cache.set_claims("expired", 1, {"sub": "1", "exp": time.time() - 1})
+    assert cache.get_claims("expired") is None
+
+    cache.set_user(User(id=3, email="a@example.com", hashed_password="x", is_active=True))
+    first, second = cache.get_user(3), cache.get_user(3)
+    assert first is not second and first.email == "a@example.com"
+
+    cache.invalidate_user(3)
+    assert cache.get_user(3) is None
@@ -0,0 +1,55 @@
+"""Tests for batch bookmark creation."""
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Bookmark, BookmarkChange, User, WeeklyStats
+from app.services.bookmark_batch import CONFLICT, CREATED, EXISTING, BatchItem, BookmarkBatchService
+from app.services.idempotency import request_fingerprint
+
+
+def _item(index, key, note=None, episode=None):
+    episode = index if episode is None else episode
+    values = {"podcast_name": "Show", "episode_name": f"Episode {episode}", "timestamp_ms": episode,
+              "spotify_episode_id": None, "user_note": note}
+    return BatchItem(index, values, key, request_fingerprint("create", values))
+
+
+@pytest.mark.asyncio
+async def test_replayed_batch_does_not_duplicate_rows():
+    """Keys already stored, or repeated within the batch, return the existing bookmark."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    await db.commit()
+
+    service = BookmarkBatchService(max_items=100, key_ttl_seconds=3600)
+    first = await service.create_many(db, 1, [_item(i, f"k{i}") for i in range(3)] + [_item(3, None)])
+    assert [status for status, _ in first.values()] == [CREATED] * 4
+
+    replay = await service.create_many(db, 1, [
+        _item(0, "k0"),
+        _item(1, "k1", note="edited"),
+        _item(2, "k4", episode=4),
+        _item(3, "k4", episode=4),
+    ])
+    assert replay[0] == (EXISTING, first[0][1])
+    assert replay[1][0] == CONFLICT
+    assert replay[2][0] == CREATED
+    assert replay[3] == (EXISTING, replay[2][1])
+
+    count = (await db.execute(select(func.count(Bookmark.id)))).scalar()
+    assert count == 5
+    # Ids line up with the items, and the Core insert is logged like an ORM one
+    episodes = dict((await db.execute(select(Bookmark.id, Bookmark.episode_name))).all())
+    assert [episodes[first[i][1]] for i in range(4)] == [f"Episode {i}" for i in range(4)]
+    assert episodes[replay[2][1]] == "Episode 4"
+    assert (await db.execute(select(func.count(BookmarkChange.id)))).scalar() == 5
+    assert (await db.execute(select(func.sum(WeeklyStats.bookmark_count)))).scalar() == 5
+    assert service.stats()["replayed"] == 2
+    await db.close()
+    await engine.dispose()
@@ -0,0 +1,60 @@
+"""Tests for streaming bookmark export."""
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Bookmark, User
+from app.services.bookmark_export import CSV, MARKDOWN, NDJSON, BookmarkExportService, format_timestamp
+
+
+async def _export(service, factory, export_format, fields, compress=False) -> bytes:
+    chunks = [chunk async for chunk in service.stream(1, export_format, fields, gzip=compress, session_factory=factory)]
+    body = b"".join(chunks)
+    return gzip.decompress(body) if compress else body
+
+
+def test_timestamps_are_clock_style():
+    assert format_timestamp(65_000) == "1:05"
+    assert format_timestamp(3_725_000) == "1:02:05"
+
+
+@pytest.mark.asyncio
+async def test_export_streams_every_bookmark_in_each_format():
+    """Small batches and chunks force many cursor fetches; the output is still complete."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    db = factory()
+    db.add_all([
+        User(id=1, email="a@example.com", hashed_password="x"),
+        User(id=2, email="b@example.com", hashed_password="x"),
+    ])
+    db.add_all([
+        Bookmark(user_id=1, podcast_name=f"Show {i % 2}", episode_name=f"E{i % 3}", timestamp_ms=i * 1000,
+                 user_note=f"note, {i}\nsecond line" if i % 5 == 0 else None)
+        for i in range(25)
+    ])
+    db.add(Bookmark(user_id=2, podcast_name="Private", episode_name="E", timestamp_ms=0))
+    await db.commit()
+    await db.close()
+
+    service = BookmarkExportService(batch_size=4, chunk_bytes=64)
+    lines = (await _export(service, factory, NDJSON, ["id", "user_note"], compress=True)).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == list(range(1, 26))
+
+    rows = list(csv.reader(io.StringIO((await _export(service, factory, CSV, ["id", "user_note"])).decode())))
+    assert rows[0] == ["id", "user_note"] and len(rows) == 26
+    assert rows[1] == ["1", "note, 0\nsecond line"]
+
+    markdown = (await _export(service, factory, MARKDOWN, [])).decode()
+    assert markdown.count("\n## ") == 2 and markdown.count("\n### ") == 6
+    assert "Private" not in markdown
+    assert "- **0:05** note, 5\n    second line\n" in markdown
+    assert service.stats()["exports"] == 3 and service.stats()["rows"] == 75
+    await engine.dispose()
@@ -0,0 +1,59 @@
+"""Tests for bookmark field selection."""
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.api_v1.endpoints.bookmarks import get_bookmarks
+from app.models import Base, Bookmark, User
+from app.services.bookmark_serializer import FIELD_PRESETS, FULL_FIELDS, columns_for, resolve_fields, row_to_dict
+
+
+def test_resolve_fields_presets_and_names():
+    """Presets expand in order, names are deduplicated and id always comes first."""
+    assert resolve_fields(None) == FULL_FIELDS
+    assert resolve_fields("summary") == FIELD_PRESETS["summary"]
+    assert resolve_fields("user_note, podcast_name,,user_note") == ["id", "user_note", "podcast_name"]
+    assert resolve_fields("summary,context_before")[-1] == "context_before"
+    assert "updated_at" not in resolve_fields("full")
+    with pytest.raises(ValueError, match="Unknown field: password"):
+        resolve_fields("summary,password")
+
+
+@pytest.mark.asyncio
+async def test_unknown_field_is_a_bad_request():
+    """The list endpoint answers 400 before touching the database."""
+    with pytest.raises(HTTPException) as error:
+        await get_bookmarks(
+            request=None, skip=None, limit=10, cursor=None, include_total=False,
+            fields="id,secret", if_none_match=None, db=None, current_user_id=1
+        )
+    assert error.value.status_code == 400
+    assert error.value.detail == "Unknown field: secret"
+
+
+@pytest.mark.asyncio
+async def test_projection_selects_only_requested_columns():
+    """Large Text columns stay out of the SELECT unless asked for."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    db.add(Bookmark(user_id=1, podcast_name="P", episode_name="E", timestamp_ms=5, transcript_text="long" * 100))
+    await db.commit()
+
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    field_names = resolve_fields("podcast_name,timestamp_ms")
+    row = (await db.execute(select(*columns_for(field_names)).where(Bookmark.user_id == 1))).one()
+
+    assert row_to_dict(row, field_names) == {"id": 1, "podcast_name": "P", "timestamp_ms": 5}
+    selected = statements[-1].split("FROM")[0]
+    assert "bookmarks.podcast_name" in selected and "bookmarks.timestamp_ms" in selected
+    assert "transcript_text" not in selected and "ai_summary" not in selected
+    await db.close()
+    await engine.dispose()
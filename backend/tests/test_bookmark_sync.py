@@ -0,0 +1,49 @@
+"""Tests for incremental bookmark sync."""
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Bookmark, User
+from app.models.bookmark_change import record_changes
+from app.services.bookmark_sync import BookmarkSyncService, decode_sync_token, encode_sync_token
+
+
+@pytest.mark.asyncio
+async def test_changes_since_token_cover_creates_updates_and_deletes():
+    """Only bookmarks touched after the token come back, deletes as tombstones."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    db.add_all([
+        User(id=1, email="a@example.com", hashed_password="x"),
+        User(id=2, email="b@example.com", hashed_password="x"),
+    ])
+    bookmarks = [Bookmark(user_id=1, podcast_name="Show", episode_name=f"E{i}", timestamp_ms=i) for i in range(4)]
+    db.add_all(bookmarks)
+    db.add(Bookmark(user_id=2, podcast_name="Other", episode_name="E", timestamp_ms=0))
+    await db.commit()
+
+    service = BookmarkSyncService()
+    fields = ["id", "episode_name"]
+    full, deleted, sequence, has_more = await service.changes(db, 1, 0, fields, 3)
+    assert len(full) == 3 and has_more
+    rest, _, sequence, has_more = await service.changes(db, 1, sequence, fields, 3)
+    assert len(rest) == 1 and not has_more
+
+    bookmarks[0].episode_name = "renamed"
+    await db.delete(bookmarks[1])
+    await db.commit()
+    await db.execute(update(Bookmark).where(Bookmark.id == bookmarks[2].id).values(timestamp_ms=99))
+    await record_changes(db, Bookmark.id == bookmarks[2].id)
+    await db.commit()
+
+    changed, deleted, sequence, _ = await service.changes(db, 1, sequence, fields, 100)
+    assert {b["id"] for b in changed} == {bookmarks[0].id, bookmarks[2].id}
+    assert deleted == [bookmarks[1].id]
+    assert await service.changes(db, 1, sequence, fields, 100) == ([], [], sequence, False)
+    assert decode_sync_token(encode_sync_token(sequence)) == sequence
+    await db.close()
+    await engine.dispose()
@@ -0,0 +1,35 @@
+"""Tests for the in-process LRU cache."""
+
+import time
+
+from app.core.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used_by_size():
+    """The oldest untouched entries go first once the byte budget is exceeded."""
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    assert cache.get("a") == "aaaa"  # "b" is now least recently used
+
+    cache.set("c", "cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 8
+
+
+def test_lru_bounded_by_entries_and_ttl():
+    """Entry limits and per-entry TTLs are honoured."""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("a") is None
+
+    cache.set("short", 4, ttl_seconds=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.stats()["misses"] == 2
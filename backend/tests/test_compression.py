@@ -0,0 +1,98 @@
+"""Tests for response compression."""
+import gzip
+
+from fastapi import FastAPI, Header
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, ResponseCompressor, choose_encoding
+from app.core.etag import etag_matches, not_modified
+
+TEXT = "spaced repetition beats cramming, every single time. " * 100
+
+
+def make_client():
+    compressor = ResponseCompressor(
+        minimum_size=500, gzip_level=6, brotli_quality=4, cache_max_bytes=1024 * 1024
+    )
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, compressor=compressor)
+
+    @app.get("/large")
+    def large(if_none_match: str = Header(None)):
+        if etag_matches(if_none_match, '"c-1-7"'):
+            return not_modified('"c-1-7"')
+        return PlainTextResponse(TEXT, headers={"ETag": '"c-1-7"'})
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("short")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((TEXT[:100] for _ in range(50)), media_type="application/x-ndjson")
+
+    @app.get("/image")
+    def image():
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    return TestClient(app), compressor
+
+
+def test_choose_encoding_honours_quality_values():
+    """brotli is preferred, q=0 refuses an encoding, identity is the fallback."""
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip, deflate, br", brotli_available=False) == "gzip"
+    assert choose_encoding("br;q=0.5, gzip") == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0") is None
+    assert choose_encoding("*") == "br"
+    assert choose_encoding("identity") is None
+    assert choose_encoding(None) is None
+
+
+def test_large_responses_are_compressed_and_reused_by_etag():
+    """A tagged body is compressed once; small and binary responses pass through."""
+    client, compressor = make_client()
+    headers = {"Accept-Encoding": "gzip"}
+
+    for _ in range(2):
+        response = client.get("/large", headers=headers)
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == 'W/"c-1-7"'
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(TEXT) / 5
+        assert response.text == TEXT
+    assert compressor.stats()["cache_hits"] == 1
+
+    assert "content-encoding" not in client.get("/small", headers=headers).headers
+    assert "content-encoding" not in client.get("/image", headers=headers).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_encoded_bodies_get_a_weak_etag_that_still_revalidates():
+    """Only the identity body keeps the strong tag; the weak one still gets a 304."""
+    client, compressor = make_client()
+    identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+    encoded = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert identity.headers["etag"] == '"c-1-7"'
+    assert encoded.headers["etag"] == 'W/"c-1-7"' != identity.headers["etag"]
+
+    revalidated = client.get(
+        "/large", headers={"Accept-Encoding": "gzip", "If-None-Match": encoded.headers["etag"]}
+    )
+    assert revalidated.status_code == 304 and revalidated.headers["etag"] == 'W/"c-1-7"'
+    # The compressed body is cached under the resource's own tag
+    client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert compressor.stats()["cache_hits"] == 1
+
+
+def test_streamed_responses_are_compressed_incrementally():
+    """A streamed body is gzip-compressed without a Content-Length and decodes intact."""
+    client, compressor = make_client()
+
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw).decode() == TEXT[:100] * 50
+    assert compressor.stats()["streamed"] == 1
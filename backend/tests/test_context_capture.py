@@ -0,0 +1,121 @@
+"""Tests for bookmark context capture."""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.services.context_capture import ContextCaptureService, chunk_indexes, episode_key, split_context
+from app.services.episode_audio import EpisodeAudioStore, episode_audio
+from app.services.episode_transcripts import EpisodeTranscriptStore, episode_transcripts
+from app.services.transcription_engines import TranscriptSegment
+
+
+def test_windows_map_to_grid_chunks():
+    """A ±30 s window spans two or three 30 s chunks and never a negative one."""
+    assert list(chunk_indexes(90_000, 30_000, 30_000)) == [2, 3]
+    assert list(chunk_indexes(100_000, 30_000, 30_000)) == [2, 3, 4]
+    assert list(chunk_indexes(5_000, 30_000, 30_000)) == [0, 1]
+
+
+def test_segments_are_split_by_midpoint():
+    """Speech ending just after the bookmark still counts as before it."""
+    segments = [
+        TranscriptSegment(30_000, 38_000, "too early"),
+        TranscriptSegment(60_000, 66_000, "before"),
+        TranscriptSegment(66_000, 71_000, "straddling"),
+        TranscriptSegment(72_000, 80_000, "after"),
+        TranscriptSegment(100_000, 105_000, "too late"),
+    ]
+    assert split_context(segments, 70_000, 30_000) == ("before straddling", "after")
+    assert split_context([], 70_000, 30_000) == (None, None)
+
+
+def test_episode_key_prefers_the_spotify_id():
+    assert episode_key("abc", "spotify:episode:def") == "abc"
+    assert episode_key(None, "spotify:episode:def") == "def"
+    assert episode_key(None, "spotify:episode:def", "com.spotify.music") == "def"
+    assert episode_key(None, "42", "au.com.shiftyjelly.pocketcasts") == "au.com.shiftyjelly.pocketcasts:42"
+    assert episode_key(None, "42", "com.google.android.apps.podcasts") == "com.google.android.apps.podcasts:42"
+    assert episode_key(None, "42") == "unknown:42"
+    assert episode_key(None, None) is None
+
+
+@pytest.mark.asyncio
+async def test_only_spotify_ids_are_downloaded(tmp_path, monkeypatch):
+    """Client-supplied keys never reach the download URL."""
+    store = EpisodeAudioStore("", "https://media.example.com/{episode_id}.mp3", str(tmp_path), 10**9, 10**9)
+    urls = []
+
+    async def fake_download(key, path):
+        urls.append(store.url_template.format(episode_id=key))
+        return path
+
+    monkeypatch.setattr(store, "_download", fake_download)
+    assert await store.locate("../private?token=1") is None
+    assert await store.locate("com.pocketcasts:42") is None
+    assert await store.locate("4rOoJ6Egrf8K2IrywzwOMk") is not None
+    assert urls == ["https://media.example.com/4rOoJ6Egrf8K2IrywzwOMk.mp3"]
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_transcribed_once_and_read_back_by_range(monkeypatch):
+    """Later bookmarks in the episode reuse stored chunks; only uncovered ones are transcribed."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+
+    service = ContextCaptureService(window_seconds=30, chunk_seconds=30)
+    decoded = []
+
+    async def fake_locate(key):
+        return "episode.mp3"
+
+    async def fake_transcribe_chunk(audio_path, start_ms):
+        decoded.append(start_ms)
+        return [TranscriptSegment(start_ms + offset, start_ms + offset + 5_000, f"s{start_ms + offset}")
+                for offset in range(0, 30_000, 5_000)]
+
+    monkeypatch.setattr(episode_audio, "locate", fake_locate)
+    monkeypatch.setattr(service, "_transcribe_chunk", fake_transcribe_chunk)
+
+    before, after = await service.context_for(db, "episode1", 100_000)
+    assert sorted(decoded) == [60_000, 90_000, 120_000]
+    assert before.split() == [f"s{ms}" for ms in range(70_000, 100_000, 5_000)]
+    assert after.split() == [f"s{ms}" for ms in range(100_000, 130_000, 5_000)]
+
+    await service.context_for(db, "episode1", 110_000)
+    assert len(decoded) == 3
+    await service.context_for(db, "episode1", 140_000)
+    assert sorted(decoded) == [60_000, 90_000, 120_000, 150_000]
+
+    # Another episode never sees these segments
+    assert await episode_transcripts.segments_overlapping(db, "episode2", "whisper-1", 0, 10**9) == []
+    stats = service.stats()
+    assert stats["chunks_transcribed"] == 4 and stats["chunks_reused"] == 5
+    await db.close()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_overlap_range_is_bounded_by_the_longest_chunk():
+    """Segments starting before the window are found, also in chunks of an older, longer grid."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+
+    await EpisodeTranscriptStore(chunk_ms=60_000).save_chunks(db, "ep", "m", {
+        0: [TranscriptSegment(0, 60_000, "whole chunk")],
+        60_000: [TranscriptSegment(85_000, 95_000, "straddling"), TranscriptSegment(110_000, 115_000, "later")],
+    })
+    await db.commit()
+
+    store = EpisodeTranscriptStore(chunk_ms=30_000)
+    segments = await store.segments_overlapping(db, "ep", "m", 50_000, 55_000)
+    assert [segment.text for segment in segments] == ["whole chunk"]
+    segments = await store.segments_overlapping(db, "ep", "m", 90_000, 100_000)
+    assert [segment.text for segment in segments] == ["straddling"]
+    assert store._max_chunk_ms == 60_000
+    await db.close()
+    await engine.dispose()
@@ -0,0 +1,51 @@
+"""Tests for database engine configuration."""
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.database import async_database_url, engine_options
+from app.models import Base, ensure_bookmark_columns, ensure_bookmark_indexes
+
+
+def test_async_database_url():
+    """Sync URLs map onto the matching async driver."""
+    assert async_database_url("sqlite:///./poma.db") == "sqlite+aiosqlite:///./poma.db"
+    assert async_database_url("postgresql://u:p@db/poma") == "postgresql+asyncpg://u:p@db/poma"
+    assert async_database_url("postgresql+psycopg2://u:p@db/poma") == "postgresql+asyncpg://u:p@db/poma"
+    assert async_database_url("postgresql://u:p@db/poma?sslmode=require") == (
+        "postgresql+asyncpg://u:p@db/poma?ssl=require"
+    )
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u:p@db/poma")
+
+
+def test_pool_options_skip_sqlite():
+    """Pool sizing only applies to server databases."""
+    assert "pool_size" not in engine_options("sqlite:///./poma.db")
+    assert engine_options("postgresql://u:p@db/poma")["pool_pre_ping"] is True
+
+
+def test_older_bookmarks_table_gets_new_columns():
+    """Columns added since the first release are added once, before create_all."""
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR)"))
+        connection.execute(text(
+            "CREATE TABLE bookmarks (id INTEGER PRIMARY KEY, user_id INTEGER, podcast_name VARCHAR, "
+            "episode_name VARCHAR, timestamp_ms BIGINT, duration_ms BIGINT, created_at DATETIME, "
+            "user_note TEXT, ai_summary TEXT, podcast_cover_url VARCHAR)"
+        ))
+        connection.execute(text(
+            "INSERT INTO bookmarks (user_id, podcast_name, episode_name, timestamp_ms) VALUES (1, 'P', 'E', 5)"
+        ))
+        ensure_bookmark_columns(connection)
+        ensure_bookmark_columns(connection)
+    columns = {column["name"] for column in inspect(engine).get_columns("bookmarks")}
+    assert {"transcription_status", "transcription_error"} <= columns
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        ensure_bookmark_indexes(connection)
+        ensure_bookmark_indexes(connection)
+    indexes = {index["name"] for index in inspect(engine).get_indexes("bookmarks")}
+    assert {"ix_bookmarks_user_created_id", "ix_bookmarks_user_summarized"} <= indexes
+    engine.dispose()
@@ -0,0 +1,123 @@
+"""Tests for the shared episode metadata store."""
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, PodcastEpisode, User
+from app.services.episode_metadata import EpisodeMetadataService, cover_url
+from app.services.spotify_client import API_BASE_URL, spotify_client
+
+
+def _id(name):
+    """A well-formed (22 character base62) Spotify id."""
+    return name.rjust(22, "0")
+
+
+def _episode(episode_id):
+    return {
+        "id": episode_id, "name": f"Episode {episode_id}", "description": "", "duration_ms": 1000,
+        "uri": f"spotify:episode:{episode_id}", "images": [],
+        "show": {"id": "show1", "name": "Show", "publisher": "Pub", "images": [{"url": "https://img/show"}]},
+    }
+
+
+@pytest.mark.asyncio
+async def test_batches_lookups_and_serves_repeats_locally(monkeypatch):
+    """Misses are fetched 50 per call; later lookups hit memory, then the database."""
+    requested = []
+
+    def handler(request):
+        ids = request.url.params["ids"].split(",")
+        requested.append(ids)
+        return httpx.Response(200, json={"episodes": [None if i == _id("gone") else _episode(i) for i in ids]})
+
+    monkeypatch.setattr(spotify_client, "_client", httpx.AsyncClient(
+        base_url=API_BASE_URL, transport=httpx.MockTransport(handler)
+    ))
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+
+    service = EpisodeMetadataService(max_entries=200, ttl_seconds=60, max_age_days=30)
+    ids = [_id(f"ep{i}") for i in range(120)] + [_id("gone")]
+    found = await service.get_episodes(db, ids, "token")
+
+    assert [len(batch) for batch in requested] == [50, 50, 21]
+    assert len(found) == 120
+    assert cover_url(found[_id("ep0")]) == "https://img/show"
+
+    assert (await service.get_episode(db, _id("ep1"), "token"))["podcast"]["name"] == "Show"
+    # A fresh worker finds it in the database without a token
+    other = EpisodeMetadataService(max_entries=100, ttl_seconds=60, max_age_days=30)
+    assert (await other.get_episode(db, _id("ep1")))["podcast"]["publisher"] == "Pub"
+    assert len(requested) == 3
+
+    stats = service.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["upstream_calls"] == 3
+    assert stats["misses"] == 1
+    assert other.stats()["db_hits"] == 1
+    await db.close()
+    await engine.dispose()
+    await spotify_client.close()
+
+
+@pytest.mark.asyncio
+async def test_one_bad_id_does_not_sink_its_batch(monkeypatch):
+    """Malformed ids are never sent; an id Spotify still rejects is isolated by splitting the batch."""
+    requested = []
+    rejected = _id("bad")
+
+    def handler(request):
+        ids = request.url.params["ids"].split(",")
+        requested.append(ids)
+        if rejected in ids:
+            return httpx.Response(400, json={"error": {"status": 400, "message": "invalid id"}})
+        return httpx.Response(200, json={"episodes": [_episode(i) for i in ids]})
+
+    monkeypatch.setattr(spotify_client, "_client", httpx.AsyncClient(
+        base_url=API_BASE_URL, transport=httpx.MockTransport(handler)
+    ))
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+
+    service = EpisodeMetadataService(max_entries=200, ttl_seconds=60, max_age_days=30)
+    ids = [_id(f"ep{i}") for i in range(49)] + [rejected, "not-an-id", "spotify:episode:x"]
+    found = await service.get_episodes(db, ids, "token")
+
+    assert set(found) == set(ids[:49])
+    assert all("not-an-id" not in batch for batch in requested)
+    assert len(requested[0]) == 50
+    # Halving isolates the rejected id in about 2 * log2(50) calls
+    assert [rejected] in requested
+    assert len(requested) <= 13
+    assert service.stats()["misses"] == 3
+    await db.close()
+    await engine.dispose()
+    await spotify_client.close()
+
+
+@pytest.mark.asyncio
+async def test_storing_metadata_leaves_the_callers_transaction_alone(tmp_path):
+    """The cache write commits on its own; the request's pending work is neither committed nor dropped."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/poma.db")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    user = User(id=1, email="a@example.com", hashed_password="x")
+    db.add(user)
+
+    service = EpisodeMetadataService(max_entries=10, ttl_seconds=60, max_age_days=30)
+    await service._store(db, [_episode("ep1")])
+    assert user in db.new
+
+    await db.rollback()
+    assert await db.get(User, 1) is None
+    assert (await db.get(PodcastEpisode, "ep1")).name == "Episode ep1"
+    await db.close()
+    await engine.dispose()
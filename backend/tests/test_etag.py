@@ -0,0 +1,20 @@
+"""Tests for entity tag helpers."""
+
+from app.core.etag import etag_matches, make_etag, query_digest
+
+
+def test_if_none_match_uses_weak_comparison():
+    """Listed, weak and wildcard tags match; other versions do not."""
+    etag = make_etag("b", 7, 42)
+    assert etag == '"b-7-42"'
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(make_etag("b", 7, 41), etag)
+    assert not etag_matches(None, etag)
+
+
+def test_query_digest_ignores_parameter_order():
+    """The same representation gets the same tag however the query is written."""
+    assert query_digest("fields=summary&limit=20") == query_digest("limit=20&fields=summary")
+    assert query_digest("fields=summary") != query_digest("fields=full")
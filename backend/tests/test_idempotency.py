@@ -0,0 +1,97 @@
+"""Tests for idempotent bookmark creation."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.api_v1.endpoints.bookmarks import _replayed_bookmark
+from app.models import Base, Bookmark, IdempotencyKey, User
+from app.services.idempotency import IdempotencyKeyReusedError, IdempotencyService
+
+
+def _service():
+    return IdempotencyService(key_ttl_seconds=3600, cache_ttl_seconds=60, cache_max_entries=10)
+
+
+def _bookmark(name="E"):
+    return Bookmark(user_id=1, podcast_name="P", episode_name=name, timestamp_ms=0)
+
+
+async def _factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/poma.db")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    async with factory() as db:
+        db.add(User(id=1, email="a@example.com", hashed_password="x"))
+        await db.commit()
+    return engine, factory
+
+
+@pytest.mark.asyncio
+async def test_replay_returns_the_stored_bookmark_and_rejects_other_bodies(tmp_path):
+    """The same key and body get the original bookmark; a different body is a 422."""
+    engine, factory = await _factory(tmp_path)
+    service = _service()
+    async with factory() as db:
+        bookmark, created = await service.create_once(db, 1, "key-1", "body-a", _bookmark())
+        assert created
+
+        replayed = await service.find_bookmark(db, 1, "key-1", "body-a")
+        assert replayed.id == bookmark.id and service.replays == 1
+        with pytest.raises(IdempotencyKeyReusedError):
+            await service.find_bookmark(db, 1, "key-1", "body-b")
+
+        service.remember_response(1, "key-1", "body-a", {"id": bookmark.id})
+        assert service.cached_response(1, "key-1", "body-a") == {"id": bookmark.id}
+        with pytest.raises(IdempotencyKeyReusedError):
+            service.cached_response(1, "key-1", "body-b")
+
+        with pytest.raises(HTTPException) as error:
+            await _replayed_bookmark(db, 1, "key-1", "body-b")
+        assert error.value.status_code == 422
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_expired_key_runs_the_request_again(tmp_path):
+    """An expired key is released and the request creates a new bookmark."""
+    engine, factory = await _factory(tmp_path)
+    service = _service()
+    async with factory() as db:
+        first, _ = await service.create_once(db, 1, "key-1", "body-a", _bookmark())
+        await db.execute(update(IdempotencyKey).values(
+            created_at=datetime.now(timezone.utc) - timedelta(hours=2)
+        ))
+        await db.commit()
+
+        assert await service.find_bookmark(db, 1, "key-1", "body-a") is None
+        second, created = await service.create_once(db, 1, "key-1", "body-a", _bookmark())
+        assert created and second.id != first.id
+        keys = (await db.execute(select(IdempotencyKey))).scalars().all()
+        assert [(key.key, key.bookmark_id) for key in keys] == [("key-1", second.id)]
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_insert_on_the_same_key_returns_the_winner(tmp_path):
+    """The loser of the race hits the unique index and gets the winner's bookmark."""
+    engine, factory = await _factory(tmp_path)
+    service = _service()
+    async with factory() as first_db, factory() as second_db:
+        # Both requests looked the key up before either inserted it
+        assert await service.find_bookmark(first_db, 1, "key-1", "body-a") is None
+        assert await service.find_bookmark(second_db, 1, "key-1", "body-a") is None
+        await first_db.commit()
+        await second_db.commit()
+
+        winner, created = await service.create_once(first_db, 1, "key-1", "body-a", _bookmark("first"))
+        assert created
+        loser, created = await service.create_once(second_db, 1, "key-1", "body-a", _bookmark("second"))
+        assert not created and loser.id == winner.id
+        count = len((await second_db.execute(select(Bookmark.id))).all())
+        assert count == 1
+    await engine.dispose()
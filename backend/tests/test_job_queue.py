@@ -0,0 +1,52 @@
+"""Tests for the background worker pool."""
+
+import asyncio
+
+import pytest
+
+from app.services.job_queue import QueueFullError, WorkerPool
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_runs_jobs():
+    """Submitted jobs are handled by the workers."""
+    done = []
+
+    async def handler(job):
+        done.append(job)
+
+    pool = WorkerPool("test", handler, workers=2, max_queue_size=10)
+    pool.start()
+    for i in range(5):
+        pool.submit(i, i)
+    await asyncio.sleep(0.05)
+    await pool.stop()
+
+    assert sorted(done) == [0, 1, 2, 3, 4]
+    assert pool.stats()["completed"] == 5
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_backpressure():
+    """A full queue rejects new jobs and reports queue positions."""
+    release = asyncio.Event()
+
+    async def handler(job):
+        await release.wait()
+
+    pool = WorkerPool("test", handler, workers=1, max_queue_size=2)
+    pool.start()
+    pool.submit("running", 0)
+    await asyncio.sleep(0)  # Let the worker pick up the first job
+
+    assert pool.submit("a", 1) == 1
+    assert pool.submit("b", 2) == 2
+    assert pool.position("b") == 2
+    assert pool.is_full()
+    with pytest.raises(QueueFullError):
+        pool.submit("c", 3)
+
+    release.set()
+    await asyncio.sleep(0.05)
+    await pool.stop()
+    assert pool.stats()["rejected"] == 1
@@ -0,0 +1,25 @@
+"""Tests for cursor pagination helpers."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    """Cursors are opaque and decode back to the original sort key."""
+    created_at = datetime(2024, 1, 1, 12, 30, 15, 500, tzinfo=timezone.utc)
+    token = encode_cursor(created_at, 42)
+
+    assert "42" not in token
+    assert decode_cursor(token, 2) == [created_at, 42]
+    assert decode_cursor(encode_cursor("2024-01-01 12:30:15", 7), 2) == ["2024-01-01 12:30:15", 7]
+
+
+def test_invalid_cursor_rejected():
+    """Tampered or mismatched cursors raise InvalidCursorError."""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor", 2)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor(1, 2, 3), 2)
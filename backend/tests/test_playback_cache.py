@@ -0,0 +1,41 @@
+"""Tests for the per-user playback snapshot cache."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.playback_cache import PlaybackCache, estimate_progress
+
+
+@pytest.mark.asyncio
+async def test_concurrent_polls_share_one_upstream_call():
+    """N simultaneous polls for a user cost one fetch; other users fetch separately."""
+    cache = PlaybackCache(ttl_seconds=60, max_entries=10)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"is_playing": False, "progress_ms": 1000, "duration_ms": 5000}
+
+    results = await asyncio.gather(*(cache.get(1, fetch) for _ in range(10)))
+    assert len(calls) == 1
+    assert all(r["progress_ms"] == 1000 for r in results)
+
+    await cache.get(1, fetch)
+    await cache.get(2, fetch)
+    assert len(calls) == 2
+    assert cache.stats()["coalesced"] == 9
+
+
+def test_progress_is_extrapolated_while_playing():
+    """Cached positions advance with wall time, stop at the end and stay put when paused."""
+    two_seconds_ago = time.monotonic() - 2
+    playing = {"is_playing": True, "progress_ms": 1000, "duration_ms": 60000}
+
+    assert 3000 <= estimate_progress(playing, two_seconds_ago)["progress_ms"] < 3500
+    assert playing["progress_ms"] == 1000  # The cached snapshot is not modified
+    assert estimate_progress({**playing, "duration_ms": 2000}, two_seconds_ago)["progress_ms"] == 2000
+    assert estimate_progress({**playing, "is_playing": False}, two_seconds_ago)["progress_ms"] == 1000
+    assert estimate_progress(None, two_seconds_ago) is None
@@ -0,0 +1,58 @@
+"""Tests for bookmark full-text search on SQLite."""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Bookmark, User
+from app.services.search_service import InvalidSearchQueryError, SearchService, fts5_query
+
+
+def test_fts5_query_translation():
+    """Web-search syntax becomes a quoted FTS5 expression."""
+    assert fts5_query("spaced repetition") == '"spaced" "repetition"'
+    assert fts5_query('"spaced repetition" or sleep') == '"spaced repetition" OR "sleep"'
+    assert fts5_query("memory -cramming") == '("memory") NOT "cramming"'
+    assert fts5_query('NEAR(a "b') == '"NEAR(a" "b"'
+    with pytest.raises(InvalidSearchQueryError):
+        fts5_query("-only")
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_highlights_and_pages():
+    """Matches are scoped to the user, highlighted and paged without overlap."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession)()
+    db.add_all([
+        User(id=1, email="a@example.com", hashed_password="x"),
+        User(id=2, email="b@example.com", hashed_password="x"),
+    ])
+    for i in range(5):
+        db.add(Bookmark(user_id=1, podcast_name="Show", episode_name=f"Episode {i}",
+                        timestamp_ms=i, transcript_text="spaced repetition beats cramming"))
+    db.add(Bookmark(user_id=1, podcast_name="Repetition Weekly", episode_name="Intro",
+                    timestamp_ms=0, transcript_text="welcome"))
+    db.add(Bookmark(user_id=2, podcast_name="Show", episode_name="Other user",
+                    timestamp_ms=0, transcript_text="spaced repetition"))
+    db.add(Bookmark(user_id=1, podcast_name="Show", episode_name="Unrelated",
+                    timestamp_ms=0, transcript_text="sleep and memory"))
+    await db.commit()
+
+    service = SearchService()
+    seen, cursor = [], None
+    while True:
+        results, cursor = await service.search(db, 1, "repetition", ["id", "podcast_name"], 2, cursor)
+        seen.extend(results)
+        if cursor is None:
+            break
+
+    assert len(seen) == 6
+    assert len({r["id"] for r in seen}) == 6
+    # Title matches outrank transcript matches
+    assert seen[0]["podcast_name"] == "Repetition Weekly"
+    assert "<b>repetition</b>" in seen[-1]["snippet"]
+    assert service.stats()["searches"] == 3
+    await db.close()
+    await engine.dispose()
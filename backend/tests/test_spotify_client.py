@@ -0,0 +1,76 @@
+"""Tests for the pooled Spotify client."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.spotify_client import API_BASE_URL, SpotifyClient, SpotifyRateLimitedError, spotify_client
+from app.services.spotify_service import spotify_service
+
+
+def _client(handler, **overrides) -> SpotifyClient:
+    options = dict(
+        timeout_seconds=1, max_connections=5, max_keepalive_connections=5,
+        max_retries=2, max_retry_after_seconds=1
+    )
+    options.update(overrides)
+    client = SpotifyClient(**options)
+    client._client = httpx.AsyncClient(base_url=API_BASE_URL, transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.mark.asyncio
+async def test_retries_short_rate_limits_and_fails_fast_on_long_ones():
+    """Short Retry-After waits are retried; long ones block further calls."""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if request.url.path.endswith("/slow"):
+            return httpx.Response(429, headers={"Retry-After": "60"})
+        return httpx.Response(200, json={"ok": True})
+
+    client = _client(handler)
+    assert await client.get("/me/player", "token") == {"ok": True}
+    assert client.stats()["retries"] == 1
+
+    with pytest.raises(SpotifyRateLimitedError):
+        await client.get("/slow", "token")
+    with pytest.raises(SpotifyRateLimitedError):
+        await client.get("/me/player", "token")
+    assert len(calls) == 3  # The last call never left the process
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_playback_fallbacks_run_concurrently(monkeypatch):
+    """When /me/player has no item, both fallback lookups are in flight together."""
+    in_flight = 0
+    max_in_flight = 0
+    episode = {"type": "episode", "id": "ep1", "name": "Episode", "duration_ms": 1000,
+               "uri": "spotify:episode:ep1", "show": {"name": "Show"}}
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        if request.url.path == "/v1/me/player":
+            return httpx.Response(200, json={
+                "is_playing": True, "progress_ms": 500, "item": None, "currently_playing_type": "episode"
+            })
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if request.url.path == "/v1/me/player/currently-playing":
+            return httpx.Response(200, json={"item": episode})
+        return httpx.Response(200, json={"items": []})
+
+    monkeypatch.setattr(spotify_client, "_client", _client(handler)._client)
+    playback = await spotify_service.get_current_playback("token")
+
+    assert playback["episode_id"] == "ep1"
+    assert playback["podcast_name"] == "Show"
+    assert max_in_flight == 2
+    await spotify_client.close()
@@ -0,0 +1,175 @@
+"""Tests for the Spotify token refresh manager."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, User
+from app.services.playback_cache import PlaybackCache
+from app.services.spotify_client import API_BASE_URL, SpotifyAPIError, spotify_client
+from app.services.spotify_service import spotify_service
+from app.services.spotify_tokens import SpotifyTokenManager
+
+
+@pytest.mark.asyncio
+async def test_refreshes_once_before_expiry_and_persists(monkeypatch):
+    """Concurrent callers share one refresh; the new token is stored and then served from memory."""
+    refreshes = []
+
+    async def handler(request):
+        refreshes.append(request.content.decode())
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"access_token": "new", "expires_in": 3600})
+
+    monkeypatch.setattr(spotify_client, "_client", httpx.AsyncClient(
+        base_url=API_BASE_URL, transport=httpx.MockTransport(handler)
+    ))
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    db.add(User(
+        id=1, email="a@example.com", hashed_password="x",
+        spotify_access_token="old", spotify_refresh_token="refresh-1",
+        spotify_token_expires_at=datetime.now(timezone.utc) + timedelta(seconds=60)
+    ))
+    await db.commit()
+
+    manager = SpotifyTokenManager(refresh_margin_seconds=300, max_entries=10)
+    tokens = await asyncio.gather(*(manager.get_access_token(db, 1) for _ in range(5)))
+
+    assert tokens == ["new"] * 5
+    assert len(refreshes) == 1
+    assert "grant_type=refresh_token" in refreshes[0]
+    assert manager.stats()["coalesced"] == 4
+
+    user = await db.get(User, 1, populate_existing=True)
+    assert user.spotify_access_token == "new"
+    assert user.spotify_refresh_token == "refresh-1"  # Kept when Spotify does not rotate it
+    assert user.spotify_token_expires_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(minutes=50)
+
+    # Fresh tokens need neither Spotify nor the database
+    assert await manager.get_access_token(None, 1) == "new"
+    assert manager.stats()["hits"] == 1
+    await db.close()
+    await engine.dispose()
+    await spotify_client.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_does_not_commit_the_callers_work(monkeypatch, tmp_path):
+    """A refresh in the middle of a request persists only the token."""
+    monkeypatch.setattr(spotify_client, "_client", httpx.AsyncClient(
+        base_url=API_BASE_URL,
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"access_token": "new", "expires_in": 3600}))
+    ))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/poma.db")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)()
+    db.add(User(id=1, email="a@example.com", hashed_password="x",
+                spotify_access_token="old", spotify_refresh_token="refresh-1",
+                spotify_token_expires_at=datetime.now(timezone.utc)))
+    await db.commit()
+
+    pending = User(id=2, email="b@example.com", hashed_password="x")
+    db.add(pending)
+    manager = SpotifyTokenManager(refresh_margin_seconds=300, max_entries=10)
+    assert await manager.get_access_token(db, 1) == "new"
+    assert pending in db.new
+
+    await db.rollback()
+    assert await db.get(User, 2) is None
+    assert (await db.get(User, 1, populate_existing=True)).spotify_access_token == "new"
+    await db.close()
+    await engine.dispose()
+    await spotify_client.close()
+
+
+async def _user_with_token(engine, refresh_token="refresh-1"):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    db.add(User(id=1, email="a@example.com", hashed_password="x",
+                spotify_access_token="revoked", spotify_refresh_token=refresh_token,
+                spotify_token_expires_at=datetime.now(timezone.utc) + timedelta(hours=1)))
+    await db.commit()
+    return db
+
+
+@pytest.mark.asyncio
+async def test_rejected_token_is_renewed_and_the_call_retried_once(monkeypatch):
+    """A 401 on a token that is not due yet forces one refresh and a retry."""
+    refreshes = []
+    players = []
+
+    async def handler(request):
+        if request.url.path.endswith("/token"):
+            refreshes.append(request.content.decode())
+            return httpx.Response(200, json={"access_token": "renewed", "expires_in": 3600})
+        players.append(request.headers["Authorization"])
+        if request.headers["Authorization"] != "Bearer renewed":
+            return httpx.Response(401, json={"error": {"status": 401, "message": "The access token expired"}})
+        return httpx.Response(200, json={
+            "is_playing": True, "progress_ms": 1000, "currently_playing_type": "track",
+            "item": {"type": "track", "id": "t1", "name": "Song", "duration_ms": 5000, "artists": []}
+        })
+
+    monkeypatch.setattr(spotify_client, "_client", httpx.AsyncClient(
+        base_url=API_BASE_URL, transport=httpx.MockTransport(handler)
+    ))
+    engine = create_async_engine("sqlite+aiosqlite://")
+    db = await _user_with_token(engine)
+    manager = SpotifyTokenManager(refresh_margin_seconds=300, max_entries=10)
+    cache = PlaybackCache(ttl_seconds=60, max_entries=10)
+
+    assert await manager.get_access_token(db, 1) == "revoked"
+    playback = await cache.get(1, lambda: manager.call_with_token(db, 1, spotify_service.get_current_playback))
+
+    assert playback["episode_id"] == "t1"
+    assert players == ["Bearer revoked", "Bearer renewed"]
+    assert len(refreshes) == 1
+    assert manager.stats()["rejected"] == 1
+    assert await manager.get_access_token(None, 1) == "renewed"
+    assert (await db.get(User, 1, populate_existing=True)).spotify_access_token == "renewed"
+    await db.close()
+    await engine.dispose()
+    await spotify_client.close()
+
+
+@pytest.mark.asyncio
+async def test_rejected_token_without_refresh_is_not_cached(monkeypatch):
+    """When the token cannot be renewed the 401 surfaces and no snapshot is kept."""
+    players = []
+
+    async def handler(request):
+        players.append(request.url.path)
+        return httpx.Response(401, json={"error": {"status": 401, "message": "Invalid access token"}})
+
+    monkeypatch.setattr(spotify_client, "_client", httpx.AsyncClient(
+        base_url=API_BASE_URL, transport=httpx.MockTransport(handler)
+    ))
+    engine = create_async_engine("sqlite+aiosqlite://")
+    db = await _user_with_token(engine, refresh_token=None)
+    manager = SpotifyTokenManager(refresh_margin_seconds=300, max_entries=10)
+    cache = PlaybackCache(ttl_seconds=60, max_entries=10)
+
+    def fetch():
+        return manager.call_with_token(db, 1, spotify_service.get_current_playback)
+
+    with pytest.raises(SpotifyAPIError) as error:
+        await cache.get(1, fetch)
+    assert error.value.status_code == 401
+    assert len(players) == 1  # Nothing to retry with
+
+    # The failure was not cached: the next poll calls Spotify again
+    with pytest.raises(SpotifyAPIError):
+        await cache.get(1, fetch)
+    assert len(players) == 2
+    await db.close()
+    await engine.dispose()
+    await spotify_client.close()
@@ -0,0 +1,140 @@
+"""Tests for batched bookmark summaries."""
+import time
+
+import pytest
+
+from app.services.summarization import RateLimiter, Summarizer, bookmark_input, pack_requests
+from app.services.summary_backends import EpisodeSection, StubSummaryBackend, SummaryItem
+
+
+def _summarizer(backend, token_budget=2000, max_items=20):
+    return Summarizer(
+        backend=backend,
+        token_budget=token_budget,
+        max_items_per_request=max_items,
+        batch_window_ms=0,
+        concurrency=2,
+        limiter=RateLimiter(requests_per_minute=6000, tokens_per_minute=10**7),
+        cache_max_entries=100,
+        input_price_per_1k=0.001,
+        output_price_per_1k=0.002
+    )
+
+
+def _section(summarizer, episode, ids, words=50):
+    context = f"Podcast: Show\nEpisode: {episode}"
+    items = []
+    for bookmark_id in ids:
+        text = bookmark_input(None, f"voice note {bookmark_id} " + "word " * words, None, None)
+        items.append(SummaryItem(bookmark_id, text, summarizer.content_hash(context, text)))
+    return EpisodeSection(context, items)
+
+
+def test_requests_share_episode_context_within_the_budget():
+    """Small episodes share a request; a large one is split, its context repeated per request."""
+    summarizer = _summarizer(StubSummaryBackend())
+    sections = [
+        _section(summarizer, "A", range(1, 4)),
+        _section(summarizer, "B", range(4, 6)),
+        _section(summarizer, "C", range(6, 16), words=200),
+    ]
+    requests = pack_requests(sections, token_budget=1200, max_items=20)
+
+    assert [item.bookmark_id for item in requests[0].items][:5] == [1, 2, 3, 4, 5]
+    assert sorted(item.bookmark_id for request in requests for item in request.items) == list(range(1, 16))
+    for request in requests:
+        contexts = [section.context for section in request.sections]
+        assert len(contexts) == len(set(contexts))
+        assert sum(item.tokens for item in request.items) <= 1200
+    assert len(requests) > 2
+
+
+@pytest.mark.asyncio
+async def test_summaries_are_batched_and_cached_by_content():
+    """One call covers several bookmarks; unchanged inputs are never sent twice."""
+    backend = StubSummaryBackend()
+    summarizer = _summarizer(backend)
+    sections = [_section(summarizer, "A", [1, 2, 3]), _section(summarizer, "B", [4])]
+
+    summaries = await summarizer.summarize_items(sections)
+    assert sorted(summaries) == [1, 2, 3, 4]
+    assert summaries[1].startswith("Voice note: voice note 1")
+    assert backend.calls == 1
+
+    again = await summarizer.summarize_items(sections + [_section(summarizer, "B", [5])])
+    assert again[1] == summaries[1]
+    assert backend.calls == 2
+    stats = summarizer.stats()
+    assert stats["cache_hits"] == 4 and stats["avg_bookmarks_per_request"] == 2.5
+    assert stats["estimated_cost_usd"] > 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_out_requests():
+    """Past the burst, requests wait for the bucket to refill."""
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10**6)  # One request per 0.1 s
+    limiter._requests = 1
+    started_at = time.perf_counter()
+    for _ in range(3):
+        await limiter.acquire(10)
+    assert time.perf_counter() - started_at >= 0.18
+    assert limiter.waits == 2
+
+
+@pytest.mark.asyncio
+async def test_recovery_summarizes_bookmarks_left_without_a_summary(monkeypatch):
+    """Bookmarks with text and no summary are summarized on startup; others are left alone."""
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Base, Bookmark, User
+    from app.models.bookmark import TRANSCRIPTION_COMPLETED, TRANSCRIPTION_PENDING
+    from app.services import summarization
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(summarization, "AsyncSessionLocal", factory)
+    monkeypatch.setattr(summarization, "RECOVERY_BATCH_SIZE", 2)
+
+    db = factory()
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    fields = [
+        {"user_note": "note only"},
+        {"transcript_text": "voice note", "transcription_status": TRANSCRIPTION_COMPLETED},
+        {"context_before": "said before"},
+        {"user_note": "done", "ai_summary": "already"},
+        {"user_note": ""},
+        {"transcription_status": TRANSCRIPTION_PENDING},
+    ]
+    db.add_all([
+        Bookmark(id=i, user_id=1, podcast_name="P", episode_name="E", timestamp_ms=0, **values)
+        for i, values in enumerate(fields, start=1)
+    ])
+    await db.commit()
+
+    summarizer = _summarizer(StubSummaryBackend())
+    assert await summarizer.recover() == 3
+    summaries = dict((await db.execute(select(Bookmark.id, Bookmark.ai_summary))).all())
+    assert summaries[1] and summaries[2] and summaries[3]
+    assert summaries[4] == "already" and summaries[5] is None and summaries[6] is None
+    assert await summarizer.recover() == 0
+    assert summarizer.stats()["recovered"] == 3
+    await db.close()
+    await engine.dispose()
+
+
+def test_new_notes_are_submitted_unless_another_step_will_submit_them(monkeypatch):
+    """A note is summarized at once when no transcription or context capture follows."""
+    from app.api.api_v1.endpoints import bookmarks
+    from app.models.bookmark import TRANSCRIPTION_PENDING
+
+    submitted = []
+    monkeypatch.setattr(bookmarks.summarizer, "submit", submitted.append)
+    bookmarks._summarize_note(1, "a note", None, context_queued=False)
+    bookmarks._summarize_note(2, "a note", None, context_queued=True)
+    bookmarks._summarize_note(3, "a note", TRANSCRIPTION_PENDING, context_queued=False)
+    bookmarks._summarize_note(4, None, None, context_queued=False)
+    assert submitted == [1]
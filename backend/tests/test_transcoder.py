@@ -0,0 +1,106 @@
+"""Tests for the ffmpeg subprocess pool, with a stub in place of ffmpeg."""
+
+import asyncio
+
+import pytest
+
+from app.services import transcoder as transcoder_module
+from app.services.transcoder import TranscodeError, Transcoder
+
+
+class _FakeProcess:
+    def __init__(self, stdout=b"mp3", stderr=b"", returncode=0, delay=0.0):
+        self._stdout = stdout
+        self._stderr = stderr
+        self._exit_code = returncode
+        self._delay = delay
+        self.returncode = None
+        self.killed = False
+
+    async def communicate(self, input_bytes=None):
+        await asyncio.sleep(self._delay)
+        self.returncode = self._exit_code
+        return self._stdout, self._stderr
+
+    def kill(self):
+        self.killed = True
+        self.returncode = -9
+
+    async def wait(self):
+        return self.returncode
+
+
+def _stub_subprocess(monkeypatch, make_process):
+    processes = []
+
+    async def create_subprocess_exec(*command, **kwargs):
+        process = make_process()
+        processes.append((command, process))
+        return process
+
+    monkeypatch.setattr(transcoder_module.asyncio, "create_subprocess_exec", create_subprocess_exec)
+    return processes
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_are_capped_by_the_semaphore(monkeypatch):
+    """No more than max_processes ffmpeg processes run at once; the rest queue."""
+    running = peak = 0
+
+    class _Tracked(_FakeProcess):
+        async def communicate(self, input_bytes=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                return await super().communicate(input_bytes)
+            finally:
+                running -= 1
+
+    processes = _stub_subprocess(monkeypatch, lambda: _Tracked(delay=0.01))
+    pool = Transcoder(max_processes=2, timeout_seconds=5)
+
+    outputs = await asyncio.gather(*[pool.to_mp3(f"{i}.m4a") for i in range(6)])
+    assert outputs == [b"mp3"] * 6
+    assert peak == 2 and len(processes) == 6
+    assert processes[0][0][:2] == ("ffmpeg", "-hide_banner")
+    stats = pool.stats()
+    assert stats["conversions"] == 6 and stats["failures"] == 0
+    assert stats["running"] == 0 and stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_non_zero_exit_raises_with_stderr(monkeypatch):
+    """A failed conversion raises TranscodeError and frees its slot."""
+    _stub_subprocess(monkeypatch, lambda: _FakeProcess(stderr=b"Invalid data found", returncode=1))
+    pool = Transcoder(max_processes=1, timeout_seconds=5)
+
+    with pytest.raises(TranscodeError, match="exited with 1: Invalid data found"):
+        await pool.to_mp3("broken.m4a")
+    assert pool.stats()["failures"] == 1
+
+    _stub_subprocess(monkeypatch, _FakeProcess)
+    assert await pool.to_mp3("ok.m4a") == b"mp3"
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_the_process(monkeypatch):
+    """A conversion past the timeout is killed and reaped."""
+    processes = _stub_subprocess(monkeypatch, lambda: _FakeProcess(delay=10))
+    pool = Transcoder(max_processes=1, timeout_seconds=0.05)
+
+    with pytest.raises(TranscodeError, match="timed out"):
+        await pool.extract_mp3("long.m4a", 60_000, 30_000)
+    assert processes[0][1].killed
+    assert pool.stats()["failures"] == 1 and pool.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_missing_ffmpeg_is_reported(monkeypatch):
+    """A missing ffmpeg binary surfaces as a TranscodeError."""
+    async def create_subprocess_exec(*command, **kwargs):
+        raise FileNotFoundError(command[0])
+
+    monkeypatch.setattr(transcoder_module.asyncio, "create_subprocess_exec", create_subprocess_exec)
+    with pytest.raises(TranscodeError, match="not installed"):
+        await Transcoder(max_processes=1, timeout_seconds=5).to_mp3("a.m4a")
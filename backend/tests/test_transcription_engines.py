@@ -0,0 +1,114 @@
+"""Tests for transcription engine selection and fallbacks."""
+
+import logging
+
+import openai
+import pytest
+
+from app.services import transcription_engines
+from app.services.openai_service import OpenAIService
+from app.services.transcoder import TranscodeError
+from app.services.transcription_engines import (
+    LocalWhisperEngine, OpenAIWhisperEngine, TranscriptionEngine, TranscriptSegment, create_transcription_engine
+)
+
+
+class FakeEngine(TranscriptionEngine):
+    name = "fake"
+
+    def __init__(self, transcripts):
+        super().__init__()
+        self.transcripts = list(transcripts)
+        self.calls = []
+
+    @property
+    def model_version(self) -> str:
+        return "fake-1"
+
+    async def _transcribe(self, audio_path):
+        self.calls.append(audio_path)
+        transcript = self.transcripts.pop(0)
+        if isinstance(transcript, Exception):
+            raise transcript
+        return transcript
+
+
+def test_engine_selection():
+    """TRANSCRIPTION_ENGINE picks the engine; the local model is not loaded until used."""
+    assert isinstance(create_transcription_engine("openai"), OpenAIWhisperEngine)
+    local = create_transcription_engine("local")
+    assert isinstance(local, LocalWhisperEngine) and local._model is None
+    assert local.model_version.startswith("faster-whisper-")
+    with pytest.raises(ValueError):
+        create_transcription_engine("nope")
+
+
+@pytest.mark.asyncio
+async def test_engine_failure_returns_none_and_is_not_cached(tmp_path):
+    """A failed transcription counts as a failure and the next attempt runs again."""
+    audio = tmp_path / "note.m4a"
+    audio.write_bytes(b"voice")
+    service = OpenAIService()
+    service.engine = FakeEngine([RuntimeError("boom"), "hello", "unused"])
+
+    assert await service.transcribe_audio(str(audio)) is None
+    assert await service.transcribe_audio(str(audio)) == "hello"
+    assert await service.transcribe_audio(str(audio)) == "hello"  # From the cache
+    assert len(service.engine.calls) == 2
+    stats = service.engine.stats()
+    assert stats["engine"] == "fake" and stats["requests"] == 2 and stats["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_openai_engine_falls_back_to_the_original_file(tmp_path, monkeypatch, caplog):
+    """When ffmpeg fails the m4a is sent as it is, with a warning instead of a print."""
+    audio = tmp_path / "note.m4a"
+    audio.write_bytes(b"voice")
+    sent = []
+
+    async def to_mp3(path):
+        raise TranscodeError("ffmpeg is not installed")
+
+    async def atranscribe(model, file, response_format):
+        sent.append(file.read())
+        return " hello \n"
+
+    monkeypatch.setattr(transcription_engines.transcoder, "to_mp3", to_mp3)
+    monkeypatch.setattr(openai.Audio, "atranscribe", atranscribe)
+    monkeypatch.setattr(openai, "api_key", "sk-test")
+    engine = OpenAIWhisperEngine()
+
+    with caplog.at_level(logging.WARNING, logger=transcription_engines.__name__):
+        assert await engine.transcribe(str(audio)) == "hello"
+    assert sent == [b"voice"]
+    assert "sending original file" in caplog.text
+
+    monkeypatch.setattr(openai, "api_key", None)
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger=transcription_engines.__name__):
+        assert await engine.transcribe(str(audio)) is None
+    assert "API key not configured" in caplog.text
+    assert engine.stats()["failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_local_engine_transcribes_each_clip_on_the_inference_thread():
+    """Clips go to the model one call each, off the event loop."""
+    import threading
+    from types import SimpleNamespace
+
+    calls = []
+
+    class FakeModel:
+        def transcribe(self, path, beam_size):
+            calls.append((path, threading.current_thread().name))
+            segments = [SimpleNamespace(start=0.5, end=1.25, text=f" {path} "), SimpleNamespace(start=2, end=3, text=" ")]
+            return iter(segments), None
+
+    engine = create_transcription_engine("local")
+    engine._model = FakeModel()
+    assert await engine.transcribe_segments("a.wav") == [TranscriptSegment(500, 1250, "a.wav")]
+    assert await engine.transcribe("b.wav") == "b.wav"
+    assert [path for path, _ in calls] == ["a.wav", "b.wav"]
+    assert all(thread.startswith("local-whisper") for _, thread in calls)
+    assert "avg_batch_size" not in engine.stats()
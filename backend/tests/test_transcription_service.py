@@ -0,0 +1,104 @@
+"""Tests for recovering background transcriptions after a restart."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Bookmark, User
+from app.models.bookmark import (
+    TRANSCRIPTION_COMPLETED, TRANSCRIPTION_FAILED, TRANSCRIPTION_PENDING, TRANSCRIPTION_PROCESSING
+)
+from app.services import transcription_service
+from app.services.job_queue import WorkerPool
+
+
+@pytest.mark.asyncio
+async def test_unfinished_transcriptions_are_queued_again(tmp_path, monkeypatch):
+    """Pending and stale jobs with audio are re-queued, those without audio fail; running jobs are left alone."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(transcription_service, "AsyncSessionLocal", factory)
+
+    audio = tmp_path / "voice.m4a"
+    audio.write_bytes(b"audio")
+    db = factory()
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    now = datetime.now(timezone.utc)
+    states = [
+        (TRANSCRIPTION_PENDING, str(audio), None),
+        (TRANSCRIPTION_PROCESSING, str(audio), now - timedelta(hours=1)),
+        (TRANSCRIPTION_PROCESSING, str(tmp_path / "gone.m4a"), None),
+        (TRANSCRIPTION_COMPLETED, None, None),
+        # Another live process is transcribing this one and already removed the file
+        (TRANSCRIPTION_PROCESSING, str(tmp_path / "gone.m4a"), now),
+    ]
+    bookmarks = [
+        Bookmark(user_id=1, podcast_name="P", episode_name="E", timestamp_ms=0,
+                 transcription_status=status, audio_file_path=path, transcription_started_at=started_at)
+        for status, path, started_at in states
+    ]
+    db.add_all(bookmarks)
+    await db.commit()
+
+    release = asyncio.Event()
+
+    async def handler(job):
+        await release.wait()
+
+    pool = WorkerPool("test", handler, workers=1, max_queue_size=10)
+    counts = await transcription_service.recover_transcriptions(pool, factory)
+    assert counts == {"queued": 2, "failed": 1, "left_pending": 0}
+    assert pool.stats()["submitted"] == 2
+
+    for bookmark in bookmarks:
+        await db.refresh(bookmark)
+    assert [b.transcription_status for b in bookmarks] == [
+        TRANSCRIPTION_PENDING, TRANSCRIPTION_PENDING, TRANSCRIPTION_FAILED, TRANSCRIPTION_COMPLETED,
+        TRANSCRIPTION_PROCESSING
+    ]
+    assert bookmarks[2].audio_file_path is None
+
+    # Every worker process re-queues the same bookmarks; only the first claim runs the job
+    assert await transcription_service._claim(bookmarks[0].id)
+    assert not await transcription_service._claim(bookmarks[0].id)
+
+    release.set()
+    await pool.stop()
+    await db.close()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_audio_of_a_bookmark_deleted_while_queued_is_removed(tmp_path, monkeypatch):
+    """A job whose bookmark is gone deletes the upload; one taken by another process keeps it."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(transcription_service, "AsyncSessionLocal", factory)
+    db = factory()
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    taken = Bookmark(user_id=1, podcast_name="P", episode_name="E", timestamp_ms=0,
+                     transcription_status=TRANSCRIPTION_PROCESSING)
+    db.add(taken)
+    await db.commit()
+
+    orphan = tmp_path / "orphan.m4a"
+    orphan.write_bytes(b"audio")
+    await transcription_service.transcribe_bookmark(
+        transcription_service.TranscriptionJob(bookmark_id=999, audio_file_path=str(orphan))
+    )
+    assert not orphan.exists()
+
+    in_use = tmp_path / "in_use.m4a"
+    in_use.write_bytes(b"audio")
+    await transcription_service.transcribe_bookmark(
+        transcription_service.TranscriptionJob(bookmark_id=taken.id, audio_file_path=str(in_use))
+    )
+    assert in_use.exists()
+    await db.close()
+    await engine.dispose()
@@ -0,0 +1,154 @@
+"""Tests for weekly bookmark aggregates and reports."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, Bookmark, User, WeeklyPodcastStats, WeeklyReport, WeeklyStats
+from app.models.weekly_report import record_weekly_stats, week_start
+from app.services import weekly_reports as weekly_reports_module
+from app.services.weekly_reports import WeeklyReportService
+
+WEEK = date(2024, 3, 4)
+
+
+def _bookmark(day, podcast="Show", timestamp_ms=100_000, **fields):
+    return Bookmark(
+        user_id=1, podcast_name=podcast, episode_name="E", timestamp_ms=timestamp_ms,
+        duration_ms=600_000, created_at=datetime(2024, 3, day, 12, tzinfo=timezone.utc), **fields
+    )
+
+
+async def _session():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)()
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    await db.commit()
+    return engine, db
+
+
+def test_weeks_start_on_monday_utc():
+    assert week_start(datetime(2024, 3, 10, 23, 30, tzinfo=timezone.utc)) == WEEK
+    assert week_start(datetime(2024, 3, 11, 0, 30, tzinfo=timezone.utc)) == date(2024, 3, 11)
+
+
+@pytest.mark.asyncio
+async def test_aggregates_follow_inserts_moves_and_deletes():
+    """Counters are adjusted in the flush; a bookmark moving weeks or shows moves its counts."""
+    engine, db = await _session()
+    first, second, third = _bookmark(5), _bookmark(6, podcast="Other", timestamp_ms=500_000), _bookmark(7)
+    first.user_note = "note"
+    db.add_all([first, second, third])
+    await db.commit()
+
+    stats = await db.get(WeeklyStats, (1, WEEK))
+    assert (stats.bookmark_count, stats.noted_count, stats.early_count, stats.late_count) == (3, 1, 2, 1)
+    assert stats.position_total_ms == 700_000
+
+    second.podcast_name = "Show"
+    third.created_at = datetime(2024, 2, 28, tzinfo=timezone.utc)
+    await db.delete(first)
+    await db.commit()
+
+    podcasts = {
+        row.podcast_name: row.bookmark_count
+        for row in (await db.execute(select(WeeklyPodcastStats).where(WeeklyPodcastStats.week_start == WEEK))).scalars()
+    }
+    assert podcasts == {"Show": 1, "Other": 0}
+    await db.refresh(stats)
+    assert (stats.bookmark_count, stats.noted_count, stats.late_count) == (1, 0, 1)
+    assert (await db.get(WeeklyStats, (1, date(2024, 2, 26)))).bookmark_count == 1
+    await db.close()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_report_is_rendered_from_aggregates_and_stored_per_version():
+    engine, db = await _session()
+    db.add_all([_bookmark(5, ai_summary="big idea"), _bookmark(6), _bookmark(6, podcast="Other")])
+    db.add(_bookmark(1))  # Previous week
+    await db.commit()
+    # Bulk inserts go through Core and are counted explicitly
+    await db.execute(Bookmark.__table__.insert().values(
+        user_id=1, podcast_name="Other", episode_name="bulk", timestamp_ms=0,
+        created_at=datetime(2024, 3, 8, tzinfo=timezone.utc)
+    ))
+    await record_weekly_stats(db, Bookmark.episode_name == "bulk")
+    await db.commit()
+
+    service = WeeklyReportService(top_podcasts=1, highlights=5, prerender_interval_seconds=0)
+    report = await service.report(db, 1, WEEK, version=7)
+    assert report["bookmark_count"] == 4 and report["previous_week_bookmark_count"] == 1
+    assert report["top_podcasts"] == [
+        {"podcast_name": "Other", "podcast_cover_url": None, "bookmark_count": 2, "average_position_ms": 50_000}
+    ]
+    assert [h["ai_summary"] for h in report["highlights"]] == ["big idea"]
+
+    assert await service.report(db, 1, WEEK, version=7) == report
+    assert service.stored_hits == 1 and service.renders == 1
+    await service.report(db, 1, WEEK, version=8)
+    assert service.renders == 2 and (await db.get(WeeklyReport, (1, WEEK))).version == 8
+    await db.close()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_highlights_read_only_summarized_bookmarks(monkeypatch):
+    """The highlights query is served by the partial index, so unsummarized bookmarks are never read."""
+    engine, db = await _session()
+    db.add_all([_bookmark(5, ai_summary=f"idea {i}") for i in range(3)] + [_bookmark(6) for _ in range(20)])
+    await db.commit()
+    # Without statistics SQLite picks between the two (user_id, created_at) indexes arbitrarily
+    await db.execute(text("ANALYZE"))
+
+    plans = []
+    execute = db.execute
+
+    async def explain(statement, *args, **kwargs):
+        if "ai_summary IS NOT NULL" in str(statement):
+            compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+            plans.extend(row[-1] for row in (await execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all())
+        return await execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", explain)
+    service = WeeklyReportService(top_podcasts=1, highlights=2, prerender_interval_seconds=0)
+    report = await service.render(db, 1, WEEK)
+
+    assert [h["ai_summary"] for h in report["highlights"]] == ["idea 2", "idea 1"]
+    assert any("ix_bookmarks_user_summarized" in plan for plan in plans), plans
+    assert not any("TEMP B-TREE" in plan for plan in plans), plans
+    await db.close()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_prerender_runs_only_while_holding_the_lock(tmp_path, monkeypatch):
+    """A worker that cannot take the pre-render lock skips the run."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/poma.db")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    last_week = datetime.combine(week_start(None) - timedelta(days=5), datetime.min.time(), tzinfo=timezone.utc)
+    async with factory() as db:
+        db.add(User(id=1, email="a@example.com", hashed_password="x"))
+        db.add(Bookmark(user_id=1, podcast_name="Show", episode_name="E", timestamp_ms=0, created_at=last_week))
+        await db.commit()
+    monkeypatch.setattr(weekly_reports_module, "AsyncSessionLocal", factory)
+    service = WeeklyReportService(top_podcasts=1, highlights=5, prerender_interval_seconds=0)
+
+    async def locked_elsewhere(db):
+        return False
+
+    monkeypatch.setattr(service, "_try_lock", locked_elsewhere)
+    assert await service.prerender_previous_week() == 0
+    assert service.stats()["prerender_skipped"] == 1 and service.renders == 0
+
+    monkeypatch.delattr(service, "_try_lock")
+    assert await service.prerender_previous_week() == 1
+    assert await service.prerender_previous_week() == 0  # Already stored at this version
+    assert service.renders == 1 and service.prerender_runs == 2
+    await engine.dispose()